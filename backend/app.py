@@ -9,9 +9,17 @@ from config.settings import get_config
 from database.firebase import firebase_manager
 from services.chapa_service import ChapaService
 from services.telegram_service import TelegramService, AdvancedTelegramBot
+from services.message_dispatcher import MessageDispatcher
+from services.update_worker import UpdateWorkerPool, validate_update
+from services.update_dedup import UpdateDeduplicator
+from services.user_resolver import user_resolver, stage_identity
+from services.wallet_service import wallet_service
+from services.matchmaker import Matchmaker
+from services.room_players import room_players, lists_players
 from routes.payment_routes import payment_bp
 from routes.telegram_routes import telegram_bp
 from routes.app_routes import app_bp
+from routes.game_routes import game_bp
 
 # Initialize Flask app
 app = Flask(__name__)
@@ -31,6 +39,9 @@ firebase_manager.initialize(config)
 # Initialize services
 chapa_service = ChapaService(config)
 telegram_service = TelegramService(config)
+message_dispatcher = MessageDispatcher.from_config(telegram_service, config)
+update_dedup = UpdateDeduplicator.from_config(config, firebase_manager)
+matchmaker = Matchmaker.from_config(firebase_manager, config)
 
 # Initialize Advanced Telegram Bot (optional)
 advanced_bot = None
@@ -50,6 +61,7 @@ if config.TELEGRAM_BOT_TOKEN:
 app.register_blueprint(payment_bp)
 app.register_blueprint(telegram_bp)
 app.register_blueprint(app_bp)
+app.register_blueprint(game_bp)
 
 # Print startup information
 print(f"Environment: {config.ENVIRONMENT}")
@@ -140,6 +152,21 @@ def advanced_bot_status():
         "status": "running" if advanced_bot else "not_available"
     }), 200
 
+@app.route('/api/telegram/stats', methods=['GET'])
+def telegram_stats():
+    """Get outbound Telegram client statistics"""
+    return jsonify({
+        "http": telegram_service.get_http_stats(),
+        "dispatcher": message_dispatcher.get_stats(),
+        "webhook": {
+            "async": config.TELEGRAM_WEBHOOK_ASYNC,
+            **update_workers.get_stats()
+        },
+        "dedup": update_dedup.get_stats(),
+        "user_cache": user_resolver.get_stats(),
+        "matchmaker": matchmaker.get_stats()
+    }), 200
+
 # Telegram webhook handlers (these need access to services)
 def handle_telegram_update(update):
     """Handle Telegram update"""
@@ -152,94 +179,46 @@ def handle_telegram_update(update):
         db = firebase_manager.get_db()
         if not db:
             # Firebase not available - send error response
-            telegram_service.send_message(chat_id, "Firebase is not configured. Some features are unavailable. Please set up Firebase for full functionality.")
+            message_dispatcher.enqueue(chat_id, "Firebase is not configured. Some features are unavailable. Please set up Firebase for full functionality.")
             return
 
-        # Try to find user by Telegram chat ID
-        user_ref = None
-        user_doc = None
-        user_id = None
-        users = db.collection('users').where('telegramChatId', '==', chat_id).stream()
-        for doc in users:
-            user_doc = doc
-            user_id = doc.id
-            break
-
-        # If not found by chat ID, try to link by username
-        if not user_id and telegram_username:
-            users_by_username = db.collection('users').where('telegramUsername', '==', telegram_username).stream()
-            for doc in users_by_username:
-                user_doc = doc
-                user_id = doc.id
-                # Link this Telegram chat ID to the user
-                db.collection('users').document(user_id).update({
-                    'telegramChatId': chat_id,
-                    'telegramUsername': telegram_username
-                })
-                telegram_service.send_message(chat_id, f"Your Telegram account has been linked to Bingo user {user_doc.to_dict().get('displayName', 'Player')}! You can now use all bot features.")
-                break
+        # Resolve the user by Telegram chat ID, linking by username if needed
+        user = user_resolver.resolve(chat_id, telegram_username)
+        user_id = user['uid'] if user else None
+        display_name = user['displayName'] if user else 'Player'
+        if user and user['linked']:
+            message_dispatcher.enqueue(chat_id, f"Your Telegram account has been linked to Bingo user {display_name}! You can now use all bot features.")
 
         if text.startswith('/start'):
             if not user_id:
-                telegram_service.send_message(chat_id, "Welcome to Bingo Game! Please link your Telegram in your web profile to use all features. Use /help for more.")
+                message_dispatcher.enqueue(chat_id, "Welcome to Bingo Game! Please link your Telegram in your web profile to use all features. Use /help for more.")
             else:
-                # Try to find a waiting game
-                waiting_games = db.collection('gameRooms').where('status', '==', 'waiting').limit(1).stream()
-                game_id = None
-                for game in waiting_games:
-                    game_id = game.id
-                    break
+                # Seat the player in a waiting room (batched, capacity-checked)
+                game_id = matchmaker.join(user_id, display_name, chat_id, telegram_username)
                 if not game_id:
-                    # No waiting game, create a new one
-                    new_game = db.collection('gameRooms').document()
-                    new_game.set({
-                        'name': f"{user_doc.to_dict().get('displayName', 'Player')}'s Game",
-                        'status': 'waiting',
-                        'players': [{
-                            'userId': user_id,
-                            'displayName': user_doc.to_dict().get('displayName', 'Player'),
-                            'telegramChatId': chat_id,
-                            'telegramUsername': telegram_username
-                        }],
-                        'createdAt': firestore.SERVER_TIMESTAMP,
-                        'entryFee': 0,
-                        'maxPlayers': 10
-                    })
-                    game_id = new_game.id
-                else:
-                    # Add user to the waiting game
-                    game_ref = db.collection('gameRooms').document(game_id)
-                    game_ref.update({
-                        'players': firestore.ArrayUnion([{
-                            'userId': user_id,
-                            'displayName': user_doc.to_dict().get('displayName', 'Player'),
-                            'telegramChatId': chat_id,
-                            'telegramUsername': telegram_username
-                        }])
-                    })
+                    message_dispatcher.enqueue(chat_id, "❌ Could not find a game for you right now. Please try /start again.")
+                    return
                 # Send the user a link to the game
                 game_url = f"https://bingo-game-39ba5.web.app/game/{game_id}"
-                telegram_service.send_message(chat_id, f"Welcome! Your game is ready. Click here to play: {game_url}")
+                message_dispatcher.enqueue(chat_id, f"Welcome! Your game is ready. Click here to play: {game_url}")
         elif text.startswith('/help'):
-            telegram_service.send_message(chat_id, "Available commands:\n/start - Welcome\n/join <game_id> - Join a game\n/balance - Show your wallet balance\n/deposit <amount> - Deposit money\n/games - List active games\n/help - Show this help message")
+            message_dispatcher.enqueue(chat_id, "Available commands:\n/start - Welcome\n/join <game_id> - Join a game\n/balance - Show your wallet balance\n/deposit <amount> - Deposit money\n/games - List active games\n/help - Show this help message")
         elif text.startswith('/balance'):
             if not user_id:
-                telegram_service.send_message(chat_id, "Your Telegram is not linked to a Bingo account. Please link it in your web profile.")
+                message_dispatcher.enqueue(chat_id, "Your Telegram is not linked to a Bingo account. Please link it in your web profile.")
             else:
-                wallet_ref = db.collection('wallets').document(user_id)
-                wallet_doc = wallet_ref.get()
-                if wallet_doc.exists:
-                    balance = wallet_doc.to_dict().get('balance', 0)
-                    telegram_service.send_message(chat_id, f"Your wallet balance: {balance} ETB")
+                balance = wallet_service.get_balance(user_id, db)
+                if balance is not None:
+                    message_dispatcher.enqueue(chat_id, f"Your wallet balance: {balance} ETB")
                 else:
-                    telegram_service.send_message(chat_id, "No wallet found for your account.")
+                    message_dispatcher.enqueue(chat_id, "No wallet found for your account.")
         elif text.startswith('/deposit'):
             parts = text.split()
             if len(parts) == 2:
                 try:
                     amount = float(parts[1])
                     if amount <= 0:
-                        telegram_service.send_message(chat_id, "Amount must be greater than 0.")
+                        message_dispatcher.enqueue(chat_id, "Amount must be greater than 0.")
                         return
                     
                     # Create payment invoice
@@ -254,26 +233,26 @@ def handle_telegram_update(update):
                     )
                     
                     if invoice:
-                        telegram_service.send_message(chat_id, f"💳 Payment invoice created for {amount} ETB. Please complete the payment to add funds to your wallet.")
+                        message_dispatcher.enqueue(chat_id, f"💳 Payment invoice created for {amount} ETB. Please complete the payment to add funds to your wallet.")
                     else:
-                        telegram_service.send_message(chat_id, "❌ Failed to create payment invoice. Please try again later.")
+                        message_dispatcher.enqueue(chat_id, "❌ Failed to create payment invoice. Please try again later.")
                         
                 except ValueError:
-                    telegram_service.send_message(chat_id, "Invalid amount. Please use a number (e.g., /deposit 100)")
+                    message_dispatcher.enqueue(chat_id, "Invalid amount. Please use a number (e.g., /deposit 100)")
             else:
-                telegram_service.send_message(chat_id, "Usage: /deposit <amount> (e.g., /deposit 100)")
+                message_dispatcher.enqueue(chat_id, "Usage: /deposit <amount> (e.g., /deposit 100)")
         elif text.startswith('/join'):
             parts = text.split()
             if len(parts) == 2:
                 game_id = parts[1]
                 if not user_id:
-                    telegram_service.send_message(chat_id, "Your Telegram is not linked to a Bingo account. Please link it in your web profile.")
+                    message_dispatcher.enqueue(chat_id, "Your Telegram is not linked to a Bingo account. Please link it in your web profile.")
                 else:
                     # Check if game exists and has entry fee
                     game_ref = db.collection('gameRooms').document(game_id)
                     game_doc = game_ref.get()
                     if not game_doc.exists:
-                        telegram_service.send_message(chat_id, f"Game {game_id} not found.")
+                        message_dispatcher.enqueue(chat_id, f"Game {game_id} not found.")
                     else:
                         game_data = game_doc.to_dict()
                         entry_fee = game_data.get('entryFee', 0)
@@ -291,26 +270,27 @@ def handle_telegram_update(update):
                             )
                             
                             if invoice:
-                                telegram_service.send_message(chat_id, f"💳 Payment invoice created for game entry ({entry_fee} ETB). Please complete the payment to join the game.")
+                                message_dispatcher.enqueue(chat_id, f"💳 Payment invoice created for game entry ({entry_fee} ETB). Please complete the payment to join the game.")
                             else:
-                                telegram_service.send_message(chat_id, "❌ Failed to create payment invoice. Please try again later.")
+                                message_dispatcher.enqueue(chat_id, "❌ Failed to create payment invoice. Please try again later.")
                         else:
                             # Free game, add user directly
                             player_info = {
                                 'userId': user_id,
-                                'displayName': user_doc.to_dict().get('displayName', 'Player'),
+                                'displayName': display_name,
                                 'telegramChatId': chat_id,
                                 'telegramUsername': telegram_username
                             }
                             # Add player to game
-                            game_ref.update({
-                                'players': firestore.ArrayUnion([player_info])
-                            })
-                            telegram_service.send_message(chat_id, f"You have joined game {game_id}!")
+                            if room_players.join(game_id, player_info, db, listed=lists_players(game_data),
+                                                 room_data=game_data):
+                                message_dispatcher.enqueue(chat_id, f"You have joined game {game_id}!")
+                            else:
+                                message_dispatcher.enqueue(chat_id, f"You are already in game {game_id}.")
             else:
-                telegram_service.send_message(chat_id, "Usage: /join <game_id>")
+                message_dispatcher.enqueue(chat_id, "Usage: /join <game_id>")
         else:
-            telegram_service.send_message(chat_id, "Unknown command. Use /help.")
+            message_dispatcher.enqueue(chat_id, "Unknown command. Use /help.")
 
 def handle_pre_checkout_query(pre_checkout_query):
     """Handle pre-checkout queries from Telegram payments"""
@@ -374,28 +354,9 @@ def handle_successful_payment(successful_payment, message):
         if not db:
             return jsonify({'error': 'Firestore DB not initialized'}), 500
 
-        # Find user by Telegram chat ID
-        user_doc = None
-        firebase_user_id = None
-        users = db.collection('users').where('telegramChatId', '==', str(user_id)).stream()
-        for doc in users:
-            user_doc = doc
-            firebase_user_id = doc.id
-            break
-
-        if not firebase_user_id:
-            # Try to find by username
-            telegram_username = message['from'].get('username', '')
-            if telegram_username:
-                users_by_username = db.collection('users').where('telegramUsername', '==', telegram_username).stream()
-                for doc in users_by_username:
-                    user_doc = doc
-                    firebase_user_id = doc.id
-                    # Link this Telegram chat ID
-                    db.collection('users').document(firebase_user_id).update({
-                        'telegramChatId': str(user_id)
-                    })
-                    break
+        # Find user by Telegram chat ID (or link by username)
+        user = user_resolver.resolve(user_id, message['from'].get('username', ''))
+        firebase_user_id = user['uid'] if user else None
 
         if not firebase_user_id:
             # Create new user if not found
@@ -405,13 +366,18 @@ def handle_successful_payment(successful_payment, message):
                     uid=f"tg_{user_id}"
                 )
                 firebase_user_id = user_record.uid
-                db.collection('users').document(firebase_user_id).set({
+                telegram_username = message['from'].get('username', '')
+                batch = db.batch()
+                batch.set(db.collection('users').document(firebase_user_id), {
                     'displayName': user_record.display_name,
                     'telegramChatId': str(user_id),
-                    'telegramUsername': message['from'].get('username', ''),
+                    'telegramUsername': telegram_username,
                     'createdAt': firestore.firestore.SERVER_TIMESTAMP,
                     'updatedAt': firestore.firestore.SERVER_TIMESTAMP
                 })
+                stage_identity(batch, db, user_id, firebase_user_id, user_record.display_name, telegram_username)
+                batch.commit()
+                user_resolver.remember(user_id, firebase_user_id, user_record.display_name)
             except Exception as e:
                 print(f"Error creating user: {e}")
                 # Try to get existing user
@@ -435,7 +401,8 @@ def handle_successful_payment(successful_payment, message):
 
         if success:
             # Send confirmation message
-            telegram_service.send_message(chat_id, f"✅ Payment successful! {amount} {currency} has been processed.")
+            message_dispatcher.enqueue(chat_id, f"✅ Payment successful! {amount} {currency} has been processed.",
+                                       priority=MessageDispatcher.PRIORITY_PAYMENT)
 
         return jsonify({'status': 'ok'})
     except Exception as e:
@@ -454,11 +421,43 @@ def handle_shipping_query(shipping_query):
         print(f"Error handling shipping query: {e}")
         return jsonify({'error': str(e)}), 500
 
+# Worker pool for acknowledge-then-process webhook mode
+update_workers = UpdateWorkerPool.from_config(handle_telegram_update, config)
+
 # Update the route handlers to use the new functions
 @app.route('/api/telegram/webhook', methods=['POST'])
 def telegram_webhook():
-    update = request.json
-    handle_telegram_update(update)
+    if not config.TELEGRAM_WEBHOOK_ASYNC:
+        update = request.json
+        update_id = update.get('update_id') if isinstance(update, dict) else None
+        # Redelivered updates stop here, before any Firestore or Telegram I/O
+        if update_id is not None and not update_dedup.claim(update_id):
+            return jsonify({'status': 'duplicate'})
+        try:
+            handle_telegram_update(update)
+        except Exception:
+            # Let Telegram's redelivery retry the failed update
+            if update_id is not None:
+                update_dedup.release(update_id)
+            raise
+        return jsonify({'status': 'ok'})
+
+    update = request.get_json(silent=True)
+    error = validate_update(update)
+    if error:
+        # Acknowledge anyway so Telegram does not keep redelivering an unusable update
+        return jsonify({'status': 'ignored', 'reason': error})
+
+    if not update_dedup.claim(update['update_id']):
+        return jsonify({'status': 'duplicate'})
+
+    if not update_workers.submit(update):
+        update_dedup.release(update['update_id'])
+        # Saturated: let Telegram back off and redeliver instead of growing the backlog
+        response = jsonify({'status': 'busy'})
+        response.headers['Retry-After'] = '1'
+        return response, 503
+
     return jsonify({'status': 'ok'})
 
 @app.route('/api/telegram/payment-webhook', methods=['POST'])
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Telegram Identity Backfill
+Builds the telegramIdentities/{chatId} and telegramUsernames/{username}
+lookup collections for users created before the index existed.
+
+Usage: python backfill_telegram_identities.py [--dry-run]
+"""
+
+import argparse
+import sys
+
+from firebase_admin import firestore
+
+from config.settings import get_config
+from database.firebase import firebase_manager
+from services.user_resolver import (
+    IDENTITIES_COLLECTION, USERNAMES_COLLECTION, normalize_chat_id, normalize_username
+)
+
+def backfill(db, dry_run=False):
+    """Index every user that has a telegramChatId"""
+    writer = None if dry_run else db.bulk_writer()
+    indexed = 0
+    skipped = 0
+
+    # order_by only returns documents that have the field
+    for doc in db.collection('users').order_by('telegramChatId').stream():
+        data = doc.to_dict() or {}
+        chat_id = data.get('telegramChatId')
+        if chat_id in (None, ''):
+            skipped += 1
+            continue
+
+        key = normalize_chat_id(chat_id)
+        username = data.get('telegramUsername') or ''
+        indexed += 1
+        if dry_run:
+            print(f"Would index chat {key} -> {doc.id}")
+            continue
+
+        writer.set(db.collection(IDENTITIES_COLLECTION).document(key), {
+            'uid': doc.id,
+            'displayName': data.get('displayName', 'Player'),
+            'username': username,
+            'updatedAt': firestore.SERVER_TIMESTAMP
+        })
+        if username:
+            writer.set(db.collection(USERNAMES_COLLECTION).document(normalize_username(username)), {
+                'uid': doc.id,
+                'chatId': key,
+                'updatedAt': firestore.SERVER_TIMESTAMP
+            })
+
+    if writer:
+        writer.close()
+    return indexed, skipped
+
+def main():
+    parser = argparse.ArgumentParser(description='Backfill the Telegram identity index')
+    parser.add_argument('--dry-run', action='store_true', help='List what would be written')
+    args = parser.parse_args()
+
+    if not firebase_manager.initialize(get_config()):
+        print("❌ Firebase is not configured")
+        sys.exit(1)
+
+    indexed, skipped = backfill(firebase_manager.get_db(), dry_run=args.dry_run)
+    print(f"✅ Indexed {indexed} users ({skipped} skipped)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""
+Card Matrix Benchmark
+Measures calls per second of the vectorized CardMatrix (mark + winner
+detection + near-win counts) for rooms of 1k, 10k and 100k cards.
+
+Usage: python benchmarks/bench_card_matrix.py [--sizes 1000 10000 100000] [--games 3]
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from engine import CardMatrix, generate_cards  # noqa: E402
+
+def run_game(cards, seed):
+    """Call all 75 numbers on a fresh matrix; returns (seconds, winners)"""
+    matrix = CardMatrix(capacity=len(cards))
+    matrix.add_many(cards)
+    order = list(range(1, 76))
+    random.Random(seed).shuffle(order)
+
+    winners = 0
+    start = time.perf_counter()
+    for number in order:
+        rows, _ = matrix.mark(number)
+        winners += len(rows)
+        matrix.near_wins()
+    return time.perf_counter() - start, winners
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark vectorized win detection')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000])
+    parser.add_argument('--games', type=int, default=3, help='Full 75-call games per size')
+    args = parser.parse_args()
+
+    print(f"{'cards':>8} {'calls/s':>10} {'ms/call':>9} {'winners':>8}")
+    for size in args.sizes:
+        cards = generate_cards(size, seed=size)
+        total = 0.0
+        winners = 0
+        for game in range(args.games):
+            elapsed, game_winners = run_game(cards, seed=game)
+            total += elapsed
+            winners += game_winners
+        calls = 75 * args.games
+        print(f"{size:>8} {calls / total:>10.0f} {total / calls * 1000:>9.3f} {winners // args.games:>8}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Encoding Benchmark
+Compares the compact binary encodings (engine/encoding.py) with the
+dicts stored today: Firestore document size and serialization time for
+a card, a full call history, and a room snapshot.
+
+Usage: python benchmarks/bench_encoding.py [--players 50] [--iterations 2000]
+"""
+
+import argparse
+import datetime
+import json
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from engine import BingoRoom  # noqa: E402
+from engine.encoding import (  # noqa: E402
+    decode_calls, decode_cards, decode_room, encode_calls, encode_cards, encode_room
+)
+
+def firestore_size(value) -> int:
+    """Stored size per Firestore's documented rules (strings +1, numbers 8, maps sum keys + values)"""
+    if value is None or isinstance(value, bool):
+        return 1
+    if isinstance(value, (int, float, datetime.datetime)):
+        return 8
+    if isinstance(value, str):
+        return len(value.encode('utf-8')) + 1
+    if isinstance(value, bytes):
+        return len(value)
+    if isinstance(value, (list, tuple)):
+        return sum(firestore_size(item) for item in value)
+    if isinstance(value, dict):
+        return sum(len(key.encode('utf-8')) + 1 + firestore_size(item) for key, item in value.items())
+    raise TypeError(type(value))
+
+def build_room(player_count: int):
+    room = BingoRoom('bench', seed=7, stop_on_win=False)
+    players = []
+    for index in range(player_count):
+        user_id = f'{index:028d}'
+        players.append({
+            'userId': user_id,
+            'displayName': f'Player {index}',
+            'telegramChatId': 500000000 + index,
+            'telegramUsername': f'player_{index}'
+        })
+        room.deal(user_id)
+    while len(room.winners) < 3:
+        room.call()
+    return room, {
+        'status': 'playing',
+        'currentCall': room.called[-1],
+        'calledNumbers': list(room.called),
+        'players': players,
+        'winners': room.winners[:3]
+    }
+
+def compare(name, as_dict, encode, decode, encoded, iterations):
+    dict_size = firestore_size(as_dict)
+    packed_size = firestore_size(encoded)
+    dict_us = timeit.timeit(lambda: json.loads(json.dumps(as_dict)), number=iterations) / iterations * 1e6
+    packed_us = timeit.timeit(lambda: decode(encode()), number=iterations) / iterations * 1e6
+    print(f"{name:<16} {dict_size:>8} {packed_size:>8} {dict_size / packed_size:>6.1f}x"
+          f" {dict_us:>10.1f} {packed_us:>10.1f}")
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark compact encodings against dicts')
+    parser.add_argument('--players', type=int, default=50)
+    parser.add_argument('--iterations', type=int, default=2000)
+    args = parser.parse_args()
+
+    room, room_dict = build_room(args.players)
+    card = room.cards[0]
+    card_dict = {'numbers': list(card.numbers), 'grid': card.grid()}
+    called = list(range(1, 76))
+    cards = [list(c.numbers) for c in room.cards]
+
+    print(f"{'value':<16} {'dict B':>8} {'packed B':>8} {'ratio':>7} {'json us':>10} {'packed us':>10}")
+    compare('card', card_dict, lambda: encode_cards([card.numbers]), decode_cards,
+            encode_cards([card.numbers]), args.iterations)
+    compare(f'{len(cards)} cards', {'cards': [{'numbers': c} for c in cards]}, lambda: encode_cards(cards),
+            decode_cards, encode_cards(cards), args.iterations)
+    compare('75 calls', {'calledNumbers': called}, lambda: encode_calls(called), decode_calls,
+            encode_calls(called), args.iterations)
+    compare(f'room ({args.players}p)', room_dict, lambda: encode_room(room_dict), decode_room,
+            encode_room(room_dict), args.iterations)
+    print("Sizes use Firestore's storage rules; times are one encode + decode round trip.")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,277 @@
+#!/usr/bin/env python3
+"""
+Tournament Sharding Benchmark
+Measures join throughput and call latency of a tournament as the shard
+count grows, running the real TournamentService.join transaction and
+TournamentService.call_number against an in-memory Firestore.
+
+The in-memory store keeps a version per document and follows
+transaction semantics: a commit is atomic, and it aborts if any document
+the transaction read has changed since, in which case the service's
+transaction function is rerun, as firestore.transactional does, up to 5
+attempts. Every read, batched read and commit costs --rpc-ms. Firestore's server SDKs
+lock the documents a transaction reads rather than aborting, so there
+the same contention shows up as waiting instead of retries; either way
+a shard room document takes one join at a time. Joins that run out of
+attempts are reported as failed.
+
+Winner detection is the real engine: every shard is a BingoRoom on the
+same draw seed, and a TournamentArbiter settles the winners, which must
+be identical for every shard count.
+
+Usage: python benchmarks/bench_tournament.py [--shards 1 2 4 8 16 32] [--joins 2000] [--rpc-ms 2]
+"""
+
+import argparse
+import itertools
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from firebase_admin import firestore
+from google.api_core.exceptions import Aborted, AlreadyExists, NotFound
+from google.cloud.firestore_v1 import transforms
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from engine import BingoRoom, TournamentArbiter, generate_cards, shard_for, shard_room_id  # noqa: E402
+from services.game_engine_service import GameEngineService  # noqa: E402
+from services.room_players import RoomPlayerStore  # noqa: E402
+from services.tournament_service import TournamentService  # noqa: E402
+
+class MemorySnapshot:
+    def __init__(self, reference, data):
+        self.reference = reference
+        self.id = reference.id
+        self.exists = data is not None
+        self._data = data
+
+    def to_dict(self):
+        return dict(self._data) if self._data is not None else None
+
+class MemoryDocument:
+    def __init__(self, store, path):
+        self.store = store
+        self.path = path
+        self.id = path[-1]
+
+    def collection(self, name):
+        return MemoryCollection(self.store, self.path + (name,))
+
+    def get(self, transaction=None):
+        return self.store.read(self, transaction)
+
+    def update(self, data):
+        self.store.commit([('update', self, data)])
+
+class MemoryCollection:
+    def __init__(self, store, path):
+        self.store = store
+        self.path = path
+
+    def document(self, document_id=None):
+        return MemoryDocument(self.store, self.path + (document_id or f"auto{next(self.store.ids)}",))
+
+class MemoryBatch:
+    def __init__(self, store):
+        self.store = store
+        self.writes = []
+
+    def create(self, reference, data):
+        self.writes.append(('create', reference, data))
+
+    def set(self, reference, data):
+        self.writes.append(('set', reference, data))
+
+    def update(self, reference, data):
+        self.writes.append(('update', reference, data))
+
+    def commit(self):
+        self.store.commit(self.writes)
+
+class MemoryTransaction(MemoryBatch):
+    def __init__(self, store):
+        super().__init__(store)
+        self.read_versions = {}
+
+    def get_all(self, references):
+        return self.store.read_all(references, self)
+
+class MemoryFirestore:
+    """Documents with versions; batches and transactions commit atomically"""
+
+    def __init__(self, rpc_seconds):
+        self.rpc_seconds = rpc_seconds
+        self.docs = {}
+        self.lock = threading.Lock()
+        self.ids = itertools.count()
+        self.aborts = 0
+
+    def get_db(self):
+        return self
+
+    def collection(self, name):
+        return MemoryCollection(self, (name,))
+
+    def batch(self):
+        return MemoryBatch(self)
+
+    def transaction(self):
+        return MemoryTransaction(self)
+
+    def read(self, reference, transaction=None):
+        time.sleep(self.rpc_seconds)
+        with self.lock:
+            data, version = self.docs.get(reference.path, (None, 0))
+        if transaction is not None:
+            transaction.read_versions.setdefault(reference.path, version)
+        return MemorySnapshot(reference, data)
+
+    def read_all(self, references, transaction=None):
+        """One round trip for many documents, like BatchGetDocuments"""
+        time.sleep(self.rpc_seconds)
+        snapshots = []
+        with self.lock:
+            for reference in references:
+                data, version = self.docs.get(reference.path, (None, 0))
+                if transaction is not None:
+                    transaction.read_versions.setdefault(reference.path, version)
+                snapshots.append(MemorySnapshot(reference, data))
+        return snapshots
+
+    def commit(self, writes, read_versions=None):
+        time.sleep(self.rpc_seconds)
+        with self.lock:
+            for path, version in (read_versions or {}).items():
+                if self.docs.get(path, (None, 0))[1] != version:
+                    self.aborts += 1
+                    raise Aborted(f'{"/".join(path)} changed during the transaction')
+            staged = {}
+            for kind, reference, data in writes:
+                current, version = staged.get(reference.path) or self.docs.get(reference.path, (None, 0))
+                if kind == 'create' and current is not None:
+                    raise AlreadyExists('/'.join(reference.path))
+                if kind == 'update' and current is None:
+                    raise NotFound('/'.join(reference.path))
+                staged[reference.path] = (apply_write(current if kind == 'update' else None, data), version + 1)
+            self.docs.update(staged)
+
+def apply_write(current, data):
+    result = dict(current or {})
+    for field, value in data.items():
+        if value is firestore.SERVER_TIMESTAMP:
+            value = time.time()
+        elif isinstance(value, transforms.Increment):
+            value = (result.get(field) or 0) + value.value
+        elif isinstance(value, transforms.ArrayUnion):
+            value = list(result.get(field) or []) + [item for item in value.values if item not in (result.get(field) or [])]
+        result[field] = value
+    return result
+
+def transactional(function, max_attempts=5):
+    """Stands in for firestore.transactional: rerun the function while its commit aborts"""
+    def run(transaction, *args, **kwargs):
+        for _ in range(max_attempts):
+            transaction.writes, transaction.read_versions = [], {}
+            result = function(transaction, *args, **kwargs)
+            try:
+                transaction.store.commit(transaction.writes, transaction.read_versions)
+                return result
+            except Aborted:
+                continue
+        raise Aborted(f'Transaction aborted {max_attempts} times')
+    return run
+
+def build_shards(cards, player_ids, shard_count, seed, stop_on_win):
+    """One BingoRoom per shard holding the cards of its players"""
+    members = [[] for _ in range(shard_count)]
+    for index, player_id in enumerate(player_ids):
+        members[shard_for(player_id, shard_count)].append(index)
+    rooms = []
+    for shard, indexes in enumerate(members):
+        room = BingoRoom(shard_room_id('bench', shard), stop_on_win=stop_on_win, draw_seed=seed)
+        if indexes:
+            room.deal_many('bench', cards[indexes], card_ids=[player_ids[i] for i in indexes])
+        rooms.append(room)
+    return rooms
+
+def tournament_throughput(player_ids, shard_count, rpc_seconds, workers, calls):
+    """Join every player through TournamentService.join, then make tournament calls
+
+    Returns (completed joins/s, aborted commits, failed joins, ms per call).
+    """
+    store = MemoryFirestore(rpc_seconds)
+    engine = GameEngineService(store)
+    service = TournamentService(store, engine, RoomPlayerStore(store), max_shards=shard_count)
+    tournament_id = service.create_tournament('bench', shard_count=shard_count,
+                                              max_players_per_shard=len(player_ids))['tournamentId']
+    store.aborts = 0
+
+    def join(player_id):
+        try:
+            service.join(tournament_id, {'userId': player_id, 'displayName': player_id})
+            return True
+        except Aborted:
+            return False
+
+    with ThreadPoolExecutor(workers) as pool:
+        start = time.perf_counter()
+        joined = sum(pool.map(join, player_ids))
+        joins_per_second = joined / (time.perf_counter() - start)
+    aborts = store.aborts
+
+    start = time.perf_counter()
+    for _ in range(calls):
+        service.call_number(tournament_id)
+    ms_per_call = (time.perf_counter() - start) * 1000 / calls
+    return joins_per_second, aborts, len(player_ids) - joined, ms_per_call
+
+def settle(cards, player_ids, shard_count, seed):
+    """Call until the arbiter settles; returns (ms per call, winning call index, winning card IDs)"""
+    rooms = build_shards(cards, player_ids, shard_count, seed, stop_on_win=True)
+    arbiter = TournamentArbiter(shard_count)
+    start = time.perf_counter()
+    for target in range(1, 76):
+        for shard, room in enumerate(rooms):
+            if not room.finished:
+                room.call()
+            arbiter.report(shard, target, room.winners)
+        resolution = arbiter.resolve()
+        if resolution:
+            call_index, winners = resolution
+            return ((time.perf_counter() - start) * 1000 / target, call_index,
+                    sorted(winner['cardId'] for winner in winners))
+    raise RuntimeError('No winner after 75 calls')
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark tournament joins and calls by shard count')
+    parser.add_argument('--shards', type=int, nargs='+', default=[1, 2, 4, 8, 16, 32])
+    parser.add_argument('--players', type=int, default=50000, help='Players (one card each) for winner detection')
+    parser.add_argument('--joins', type=int, default=2000, help='Players joined per shard count')
+    parser.add_argument('--calls', type=int, default=10, help='Tournament calls timed per shard count')
+    parser.add_argument('--rpc-ms', type=float, default=2, help='Latency of one read or commit')
+    parser.add_argument('--workers', type=int, default=64)
+    args = parser.parse_args()
+
+    firestore.transactional = transactional
+    seed = bytes(32)
+    player_ids = [f"player-{i}" for i in range(args.players)]
+    cards = generate_cards(args.players, seed=1)
+    rpc_seconds = args.rpc_ms / 1000
+
+    print(f"{'shards':>6} {'joins/s':>9} {'aborts':>7} {'failed':>6} {'call ms':>8} {'win call':>8} {'winners':>7}")
+    reference = None
+    for shard_count in args.shards:
+        joins, aborts, failed, call_ms = tournament_throughput(player_ids[:args.joins], shard_count, rpc_seconds,
+                                                               args.workers, args.calls)
+        _, call_index, winners = settle(cards, player_ids, shard_count, seed)
+        if reference is None:
+            reference = (call_index, winners)
+        elif (call_index, winners) != reference:
+            raise AssertionError(f'{shard_count} shards settled different winners')
+        print(f"{shard_count:>6} {joins:>9.0f} {aborts:>7} {failed:>6} {call_ms:>8.1f} {call_index:>8} {len(winners):>7}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Batch Translation Benchmark
+Renders the same set of keys against a running backend two ways: one
+POST /api/translations/text/<language> per key, and a single
+POST /api/translations/batch. Prints screens (batches) per second for
+each batch size and checks both return the same texts.
+
+Usage: python benchmarks/bench_translation_batch.py [--url http://localhost:5000] [--sizes 10 50 200 2000]
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+import requests
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.translation_service import TranslationService, flatten  # noqa: E402
+
+def per_key(session, url, items, language):
+    texts = []
+    for item in items:
+        response = session.post(f"{url}/api/translations/text/{language}",
+                                json={'key': item['key'], 'params': item.get('params', {})})
+        response.raise_for_status()
+        texts.append(response.json()['text'])
+    return texts
+
+def batched(session, url, items, language):
+    response = session.post(f"{url}/api/translations/batch", json={'language': language, 'items': items})
+    response.raise_for_status()
+    return [entry['text'] for entry in json.loads(response.content)['texts']]
+
+def measure(call, seconds):
+    """Calls per second over at least `seconds`"""
+    calls = 0
+    start = time.perf_counter()
+    while True:
+        call()
+        calls += 1
+        elapsed = time.perf_counter() - start
+        if elapsed >= seconds:
+            return calls / elapsed
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the batch translation endpoint')
+    parser.add_argument('--url', default='http://localhost:5000')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10, 50, 200, 2000])
+    parser.add_argument('--language', default='am')
+    parser.add_argument('--seconds', type=float, default=3)
+    args = parser.parse_args()
+
+    keys = sorted(flatten(TranslationService().translations.get('en', {})))
+    session = requests.Session()
+    print(f"{'keys':>6} {'per-key screens/s':>18} {'batch screens/s':>16} {'speedup':>8}")
+    for size in args.sizes:
+        items = [{'key': keys[index % len(keys)], 'params': {'number': index, 'amount': 100}}
+                 for index in range(size)]
+        if per_key(session, args.url, items, args.language) != batched(session, args.url, items, args.language):
+            raise AssertionError(f'Batch texts differ from per-key texts for {size} keys')
+        before = measure(lambda: per_key(session, args.url, items, args.language), args.seconds)
+        after = measure(lambda: batched(session, args.url, items, args.language), args.seconds)
+        print(f"{size:>6} {before:>18.1f} {after:>16.1f} {after / before:>7.0f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Translation Lookup Benchmark
+Compares get_text lookups per second of the compiled flat catalog with
+the previous implementation (split the dotted key, walk the nested dicts,
+walk English again on a miss, then str.format), and checks both return
+the same text for every key. Then compares translate_dict on a large
+templated menu payload: full traversal and the cached static rendering,
+after checking that payloads of other shapes under the same cache key
+still come out as a full traversal would.
+
+Usage: python benchmarks/bench_translations.py [--rounds 20] [--menu-items 200]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.translation_service import TranslationService, flatten  # noqa: E402
+
+def legacy_get_text(translations, key, language='en', **kwargs):
+    """TranslationService.get_text before the catalogs were compiled"""
+    if language not in translations:
+        language = 'en'
+    keys = key.split('.')
+    text = translations.get(language, {})
+    for k in keys:
+        if isinstance(text, dict) and k in text:
+            text = text[k]
+        else:
+            text = translations.get('en', {})
+            for k in keys:
+                if isinstance(text, dict) and k in text:
+                    text = text[k]
+                else:
+                    return key
+            break
+    if isinstance(text, str):
+        try:
+            return text.format(**kwargs)
+        except KeyError:
+            return text
+    return key
+
+def measure(lookup, keys, rounds):
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for key, language, params in keys:
+            lookup(key, language, **params)
+    return rounds * len(keys) / (time.perf_counter() - start)
+
+def menu_payload(keys, items, counter=0):
+    """A config/menu payload: mostly static fields, a few translated labels"""
+    return {
+        'version': '2.0.0',
+        'title': 't:game.title',
+        'items': [{
+            'id': f"item-{index}",
+            'label': f"t:{keys[index % len(keys)]}",
+            'icon': 'star',
+            'badge': counter + index,
+            'enabled': True,
+            'style': {'color': '#ffcc00', 'size': 'md', 'order': index},
+            'children': [{'id': f"item-{index}-{child}", 'label': 't:common.back', 'weight': child}
+                         for child in range(3)]
+        } for index in range(items)]
+    }
+
+def measure_calls(call, rounds):
+    start = time.perf_counter()
+    for _ in range(rounds):
+        call()
+    return rounds / (time.perf_counter() - start)
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark translation lookups')
+    parser.add_argument('--rounds', type=int, default=20)
+    parser.add_argument('--menu-items', type=int, default=200)
+    args = parser.parse_args()
+
+    service = TranslationService()
+    params = {'number': 42, 'amount': 100, 'name': 'Abebe', 'count': 3}
+    keys = []
+    for language in service.supported_languages:
+        for key in flatten(service.translations.get('en', {})):
+            keys.append((key, language, params))
+        # Misses fall back to English, unknown keys return themselves
+        keys.append(('game.no_such_key', language, {}))
+
+    def legacy(key, language, **kwargs):
+        return legacy_get_text(service.translations, key, language, **kwargs)
+
+    mismatches = [(key, language) for key, language, kwargs in keys
+                  if legacy(key, language, **kwargs) != service.get_text(key, language, **kwargs)]
+    if mismatches:
+        raise AssertionError(f'Compiled catalog differs for {mismatches[:5]}')
+
+    templated = [entry for entry in keys if '{' in service.get_text(entry[0], entry[1])]
+    print(f"{len(keys)} keys ({len(templated)} with placeholders), identical output")
+    print(f"{'':>10} {'legacy/s':>12} {'compiled/s':>12} {'speedup':>8}")
+    for label, sample in (('all keys', keys), ('templated', [(k, l, params) for k, l, _ in templated] or keys)):
+        before = measure(legacy, sample, args.rounds)
+        after = measure(service.get_text, sample, args.rounds)
+        print(f"{label:>10} {before:>12,.0f} {after:>12,.0f} {after / before:>7.1f}x")
+
+    flat_keys = sorted(flatten(service.translations.get('en', {})))
+    template = menu_payload(flat_keys, args.menu_items)
+    fresh = menu_payload(flat_keys, args.menu_items, counter=7)
+    # Differently shaped payloads under the same key must not reuse the plan
+    reshaped = [menu_payload(flat_keys, args.menu_items + 5), menu_payload(flat_keys, max(args.menu_items - 5, 1))]
+    for language in service.supported_languages:
+        for payload in [template, fresh] + reshaped:
+            if service.translate_dict(payload, language, cache_key='menu') != service.translate_dict(payload, language):
+                raise AssertionError('Plan output differs from a full traversal')
+
+    rounds = args.rounds * 20
+    full = measure_calls(lambda: service.translate_dict(fresh, 'am'), rounds)
+    static = measure_calls(lambda: service.translate_dict(template, 'am', cache_key='menu'), rounds)
+    print(f"\ntranslate_dict, {args.menu_items}-item menu (calls/s, identical output)")
+    print(f"  full traversal {full:>12,.0f}")
+    print(f"  static payload {static:>12,.0f} {static / full:>7.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+Realtime Load Test
+Opens thousands of SSE connections and measures how quickly called
+numbers reach every client.
+
+By default it starts the realtime hub in a child process with a scripted
+room source (no Firestore) that calls a number in every room each
+interval.
+With --url it only connects clients to a running realtime server.
+
+Usage: python benchmarks/load_test_realtime.py [--connections 10000] [--rooms 100] [--seconds 30]
+       python benchmarks/load_test_realtime.py --url http://host:8081 --room-ids a,b,c --token ID_TOKEN
+"""
+
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import resource
+import statistics
+import sys
+import time
+
+import aiohttp
+from aiohttp import web
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.realtime_hub import RealtimeHub, create_app  # noqa: E402
+
+class ScriptedRoomSource:
+    """Calls a number in every subscribed room at wall-clock times t0 + k * interval
+
+    The called "number" is the tick k, so a client can compute when it was
+    published without sharing state with the server process.
+    """
+
+    def __init__(self, t0: float, interval: float):
+        self.t0 = t0
+        self.interval = interval
+        self.listeners = {}
+
+    def subscribe(self, room_id, on_state):
+        self.listeners[room_id] = on_state
+        on_state({'status': 'playing', 'calledNumbers': [], 'players': [], 'winners': []})
+        return lambda: self.listeners.pop(room_id, None)
+
+    async def run(self):
+        tick = 0
+        called = []
+        while True:
+            tick += 1
+            await asyncio.sleep(max(0.0, self.t0 + tick * self.interval - time.time()))
+            # A full game resets, which clients receive as a snapshot
+            called = called + [tick] if len(called) < 75 else [tick]
+            for on_state in list(self.listeners.values()):
+                on_state({'status': 'playing', 'calledNumbers': list(called), 'players': [], 'winners': []})
+
+def run_scripted_server(port, t0, interval, queue_size):
+    """Realtime hub on a scripted source, in its own process (and descriptor limit)"""
+    raise_fd_limit(20000)
+
+    async def serve():
+        source = ScriptedRoomSource(t0, interval)
+        runner = web.AppRunner(create_app(RealtimeHub(source, queue_size=queue_size)))
+        await runner.setup()
+        await web.TCPSite(runner, '127.0.0.1', port, backlog=4096).start()
+        await source.run()
+
+    asyncio.run(serve())
+
+def raise_fd_limit(wanted):
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if soft < wanted:
+        resource.setrlimit(resource.RLIMIT_NOFILE, (min(wanted, hard), hard))
+
+async def client(session, url, results, source, stop):
+    try:
+        async with session.get(url) as response:
+            results['connected'] += 1
+            event = None
+            async for line in response.content:
+                if stop.is_set():
+                    break
+                line = line.decode().rstrip('\n')
+                if line.startswith('event: '):
+                    event = line[7:]
+                elif line.startswith('data: ') and event == 'number_call':
+                    results['events'] += 1
+                    if source:
+                        tick = json.loads(line[6:])['number']
+                        results['latencies'].append(time.time() - (source['t0'] + tick * source['interval']))
+    except Exception as e:
+        results['errors'] += 1
+        results['last_error'] = repr(e)
+
+async def main_async(args):
+    source = None
+    base_url = args.url
+    server = None
+    if not base_url:
+        source = {'t0': time.time() + 2, 'interval': args.interval_ms / 1000}
+        server = multiprocessing.Process(target=run_scripted_server, daemon=True,
+                                         args=(args.port, source['t0'], source['interval'], args.queue_size))
+        server.start()
+        base_url = f'http://127.0.0.1:{args.port}'
+        await asyncio.sleep(1)
+
+    room_ids = args.room_ids.split(',') if args.room_ids else [f'room-{i}' for i in range(args.rooms)]
+    token = f'?token={args.token}' if args.token else ''
+    results = {'connected': 0, 'events': 0, 'errors': 0, 'latencies': [], 'last_error': None}
+    stop = asyncio.Event()
+
+    connector = aiohttp.TCPConnector(limit=0)
+    timeout = aiohttp.ClientTimeout(total=None, sock_read=None)
+    async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
+        tasks = []
+        start = time.perf_counter()
+        for index in range(args.connections):
+            room_id = room_ids[index % len(room_ids)]
+            url = f'{base_url}/api/realtime/rooms/{room_id}/events{token}'
+            tasks.append(asyncio.create_task(client(session, url, results, source, stop)))
+            if index % 500 == 499:
+                await asyncio.sleep(0.05)
+        print(f"Opened {args.connections} connections in {time.perf_counter() - start:.1f}s")
+        # Measure steady state only, not the ramp-up
+        await asyncio.sleep(args.interval_ms / 1000)
+        results['events'] = 0
+        results['latencies'] = []
+
+        await asyncio.sleep(args.seconds)
+        stop.set()
+        async with session.get(f'{base_url}/api/realtime/stats') as response:
+            stats = await response.json()
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+    if server:
+        server.terminate()
+
+    latencies = sorted(results['latencies'])
+    print(f"Connected: {results['connected']}  errors: {results['errors']}  number_call events: {results['events']}")
+    if results['last_error']:
+        print(f"Last error: {results['last_error']}")
+    if latencies:
+        p99 = latencies[int(len(latencies) * 0.99) - 1]
+        print(f"Delivery latency ms: p50 {statistics.median(latencies) * 1000:.1f}  "
+              f"p99 {p99 * 1000:.1f}  max {latencies[-1] * 1000:.1f}")
+    print(json.dumps(stats, indent=2))
+
+def main():
+    parser = argparse.ArgumentParser(description='Load test the SSE realtime hub')
+    parser.add_argument('--connections', type=int, default=10000)
+    parser.add_argument('--rooms', type=int, default=100)
+    parser.add_argument('--seconds', type=float, default=30)
+    parser.add_argument('--interval-ms', type=int, default=2000, help='Call interval of the scripted rooms')
+    parser.add_argument('--queue-size', type=int, default=64)
+    parser.add_argument('--port', type=int, default=8089)
+    parser.add_argument('--url', help='Target a running realtime server instead of an in-process hub')
+    parser.add_argument('--room-ids', help='Comma-separated room IDs for --url')
+    parser.add_argument('--token', help='Firebase ID token for --url')
+    args = parser.parse_args()
+
+    raise_fd_limit(args.connections + 1024)
+    asyncio.run(main_async(args))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Locale Isolation Check
+Fires parallel requests at a running backend, each asking for a language
+a different way (?lang=, the lang cookie, Accept-Language), while other
+clients keep changing their own language with POST /api/language. Every
+response must be in the language its own request asked for; with the
+old process-global current_language they overwrote each other.
+
+Usage: python benchmarks/verify_locale_isolation.py [--url http://localhost:5000] [--requests 100] [--rounds 5]
+"""
+
+import argparse
+import os
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.translation_service import TranslationService  # noqa: E402
+
+KEY = 'game.title'
+ACCEPT_LANGUAGE = {'en': 'en-US,en;q=0.9,am;q=0.5', 'am': 'am-ET,am;q=0.9,en;q=0.8'}
+
+def client(index, url, barrier, expected_texts):
+    """One client; returns a list of problems (empty if its responses were all in its language)"""
+    language = ('en', 'am')[index % 2]
+    method = ('query', 'cookie', 'header', 'set')[index % 4]
+    session = requests.Session()
+    params, headers = {}, {}
+    if method == 'query':
+        params['lang'] = language
+    elif method == 'cookie':
+        session.cookies.set('lang', language)
+    elif method == 'header':
+        headers['Accept-Language'] = ACCEPT_LANGUAGE[language]
+
+    barrier.wait()
+    if method == 'set':
+        # Used to flip the language for everyone; now it only sets this client's cookie
+        session.post(f"{url}/api/language", json={'language': language}).raise_for_status()
+    problems = []
+    current = session.get(f"{url}/api/languages", params=params, headers=headers).json()['current_language']
+    if current != language:
+        problems.append(f"client {index} ({method}) asked for {language}, /api/languages said {current}")
+    texts = session.post(f"{url}/api/translations/batch", params=params, headers=headers,
+                         json={'items': [KEY]}).json()['texts']
+    if texts[0]['text'] != expected_texts[language]:
+        problems.append(f"client {index} ({method}) asked for {language}, got {texts[0]['text']!r}")
+    return problems
+
+def main():
+    parser = argparse.ArgumentParser(description='Check per-request locale isolation')
+    parser.add_argument('--url', default='http://localhost:5000')
+    parser.add_argument('--requests', type=int, default=100, help='Parallel clients per round')
+    parser.add_argument('--rounds', type=int, default=5)
+    args = parser.parse_args()
+
+    service = TranslationService()
+    expected_texts = {language: service.get_text(KEY, language) for language in ('en', 'am')}
+    problems = []
+    with ThreadPoolExecutor(args.requests) as pool:
+        for _ in range(args.rounds):
+            barrier = threading.Barrier(args.requests)
+            futures = [pool.submit(client, index, args.url, barrier, expected_texts)
+                       for index in range(args.requests)]
+            for future in futures:
+                problems.extend(future.result())
+
+    total = args.requests * args.rounds
+    if problems:
+        print("\n".join(problems[:20]))
+        print(f"❌ {len(problems)} wrong-language responses out of {total * 2}")
+        sys.exit(1)
+    print(f"✅ {total} clients x 2 requests, every response in the client's own language")
+
+if __name__ == "__main__":
+    main()
@@ -41,6 +41,65 @@ class Config:
     TELEGRAM_BOT_TOKEN = os.getenv('TELEGRAM_BOT_TOKEN')
     TELEGRAM_PAYMENT_PROVIDER_TOKEN = os.getenv('TELEGRAM_PAYMENT_PROVIDER_TOKEN')
     
+    # Telegram HTTP Client Configuration
+    TELEGRAM_HTTP_POOL_SIZE = int(os.getenv('TELEGRAM_HTTP_POOL_SIZE', '20'))
+    TELEGRAM_HTTP_CONNECT_TIMEOUT = float(os.getenv('TELEGRAM_HTTP_CONNECT_TIMEOUT', '3.05'))
+    TELEGRAM_HTTP_READ_TIMEOUT = float(os.getenv('TELEGRAM_HTTP_READ_TIMEOUT', '10'))
+    TELEGRAM_HTTP_MAX_RETRIES = int(os.getenv('TELEGRAM_HTTP_MAX_RETRIES', '2'))
+    
+    # Telegram Outbound Rate Limits (messages per second)
+    TELEGRAM_GLOBAL_RATE = float(os.getenv('TELEGRAM_GLOBAL_RATE', '30'))
+    TELEGRAM_PER_CHAT_RATE = float(os.getenv('TELEGRAM_PER_CHAT_RATE', '1'))
+    TELEGRAM_DISPATCH_WORKERS = int(os.getenv('TELEGRAM_DISPATCH_WORKERS', '4'))
+    TELEGRAM_DISPATCH_QUEUE_SIZE = int(os.getenv('TELEGRAM_DISPATCH_QUEUE_SIZE', '10000'))
+    
+    # Telegram Webhook Processing
+    # When enabled, updates are acknowledged immediately and processed by a worker pool
+    TELEGRAM_WEBHOOK_ASYNC = os.getenv('TELEGRAM_WEBHOOK_ASYNC', 'False').lower() == 'true'
+    TELEGRAM_WEBHOOK_WORKERS = int(os.getenv('TELEGRAM_WEBHOOK_WORKERS', '8'))
+    TELEGRAM_WEBHOOK_QUEUE_SIZE = int(os.getenv('TELEGRAM_WEBHOOK_QUEUE_SIZE', '1000'))
+    
+    # Telegram Update Deduplication ('memory' or 'firestore' for multi-worker deployments)
+    TELEGRAM_DEDUP_BACKEND = os.getenv('TELEGRAM_DEDUP_BACKEND', 'memory')
+    TELEGRAM_DEDUP_TTL = int(os.getenv('TELEGRAM_DEDUP_TTL', '86400'))
+    TELEGRAM_DEDUP_MAX_SIZE = int(os.getenv('TELEGRAM_DEDUP_MAX_SIZE', '100000'))
+    
+    # Matchmaking Configuration (/start)
+    MATCHMAKER_MAX_PLAYERS = int(os.getenv('MATCHMAKER_MAX_PLAYERS', '10'))
+    MATCHMAKER_BATCH_INTERVAL_MS = int(os.getenv('MATCHMAKER_BATCH_INTERVAL_MS', '100'))
+    
+    # Card Pool (generate with generate_card_pool.py; empty = random cards)
+    CARD_POOL_PATH = os.getenv('CARD_POOL_PATH', '')
+    
+    # Engine rooms: cards one player may hold in a room
+    ENGINE_MAX_CARDS_PER_PLAYER = int(os.getenv('ENGINE_MAX_CARDS_PER_PLAYER', '10'))
+    
+    # Auto-Caller Configuration (engine rooms)
+    AUTO_CALLER_INTERVAL_MS = int(os.getenv('AUTO_CALLER_INTERVAL_MS', '8000'))
+    AUTO_CALLER_TICK_MS = int(os.getenv('AUTO_CALLER_TICK_MS', '50'))
+    AUTO_CALLER_MAX_FAILURES = int(os.getenv('AUTO_CALLER_MAX_FAILURES', '5'))
+    
+    # Tournaments (engine rooms split into shards)
+    TOURNAMENT_SHARD_COUNT = int(os.getenv('TOURNAMENT_SHARD_COUNT', '16'))
+    TOURNAMENT_MAX_SHARDS = int(os.getenv('TOURNAMENT_MAX_SHARDS', '500'))
+    
+    # Settlement (payouts and refunds through the wallet ledger)
+    SETTLEMENT_HOUSE_CUT = float(os.getenv('SETTLEMENT_HOUSE_CUT', '0.10'))
+    SETTLEMENT_OPS_PER_SECOND = int(os.getenv('SETTLEMENT_OPS_PER_SECOND', '500'))
+    
+    # Realtime Server (realtime_server.py, Server-Sent Events)
+    REALTIME_PORT = int(os.getenv('REALTIME_PORT', '8081'))
+    REALTIME_QUEUE_SIZE = int(os.getenv('REALTIME_QUEUE_SIZE', '64'))
+    REALTIME_MAX_OVERFLOWS = int(os.getenv('REALTIME_MAX_OVERFLOWS', '3'))
+    REALTIME_HEARTBEAT_SECONDS = int(os.getenv('REALTIME_HEARTBEAT_SECONDS', '15'))
+    REALTIME_REQUIRE_AUTH = os.getenv('REALTIME_REQUIRE_AUTH', 'True').lower() == 'true'
+    
+    # Translation/content responses (served with ETags; translations change only on deploy)
+    TRANSLATIONS_CACHE_MAX_AGE = int(os.getenv('TRANSLATIONS_CACHE_MAX_AGE', '86400'))
+    # POST /api/translations/batch: item limit, and the size above which the response is streamed
+    TRANSLATION_BATCH_MAX_ITEMS = int(os.getenv('TRANSLATION_BATCH_MAX_ITEMS', '10000'))
+    TRANSLATION_BATCH_STREAM_THRESHOLD = int(os.getenv('TRANSLATION_BATCH_STREAM_THRESHOLD', '1000'))
+    
     # Firebase Configuration
     FIREBASE_SERVICE_ACCOUNT_KEY = os.getenv("FIREBASE_SERVICE_ACCOUNT_KEY")
     
@@ -0,0 +1,8 @@
+"""Server-side bingo engine: bitmask cards, win pattern masks and room state"""
+
+from engine.card import Card, describe_number, generate_card, validate_card
+from engine.draw import DRAW_ALGORITHM, draw_commitment, draw_sequence, new_seed, verify_draw
+from engine.matrix import CardMatrix, generate_cards
+from engine.patterns import FREE_MASK, FULL_MASK, PATTERNS, PATTERNS_BY_ID, WinPattern, match_pattern
+from engine.room import BingoRoom
+from engine.tournament import TournamentArbiter, shard_for, shard_room_id
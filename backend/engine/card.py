@@ -0,0 +1,66 @@
+import random
+from typing import Any, Dict, Optional, Sequence, Tuple
+
+from engine.patterns import (
+    CELL_COUNT, COLUMN_RANGES, COLUMNS, FREE_CELL, GRID_SIZE, column_letter
+)
+
+def generate_card(rng: Optional[random.Random] = None) -> Tuple[int, ...]:
+    """Random card as 25 numbers in cell order; the free space is 0"""
+    rng = rng or random
+    numbers = []
+    for _, low, high in COLUMN_RANGES:
+        numbers.extend(rng.sample(range(low, high + 1), GRID_SIZE))
+    numbers[FREE_CELL] = 0
+    return tuple(numbers)
+
+def validate_card(numbers: Sequence[int]) -> bool:
+    """Check a card has distinct numbers in the right columns and a free centre"""
+    if len(numbers) != CELL_COUNT or numbers[FREE_CELL] != 0:
+        return False
+    seen = set()
+    for index, number in enumerate(numbers):
+        if index == FREE_CELL:
+            continue
+        _, low, high = COLUMN_RANGES[index // GRID_SIZE]
+        if not low <= number <= high or number in seen:
+            return False
+        seen.add(number)
+    return True
+
+class Card:
+    """A dealt card; its marked mask lives in the room's CardMatrix row"""
+
+    __slots__ = ('card_id', 'player_id', 'numbers', 'matrix', 'index', 'win')
+
+    def __init__(self, card_id: str, player_id: str, numbers: Sequence[int], matrix, index: int):
+        self.card_id = card_id
+        self.player_id = player_id
+        self.numbers = tuple(numbers)
+        self.matrix = matrix
+        self.index = index
+        self.win = None
+
+    @property
+    def marked(self) -> int:
+        """25-bit mask of marked cells"""
+        return int(self.matrix.marks[self.index])
+
+    def grid(self) -> Dict[str, list]:
+        """Frontend card shape: {'B': [n, ...], ...} with 0 for the free space"""
+        return {letter: list(self.numbers[col * GRID_SIZE:(col + 1) * GRID_SIZE])
+                for col, letter in enumerate(COLUMNS)}
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'cardId': self.card_id,
+            'playerId': self.player_id,
+            'numbers': list(self.numbers),
+            'grid': self.grid(),
+            'marked': self.marked,
+            'win': self.win
+        }
+
+def describe_number(number: int) -> str:
+    """Caller format, e.g. 'B-7'"""
+    return f"{column_letter(number)}-{number}"
@@ -0,0 +1,107 @@
+import mmap
+import struct
+import threading
+from typing import Optional, Tuple
+
+import numpy as np
+
+from engine.matrix import generate_cards
+from engine.patterns import CELL_COUNT, FREE_CELL
+
+# Header: magic, version, record size, seed, card count (little endian, 32 bytes)
+POOL_MAGIC = b'BINGOPL\x00'
+POOL_VERSION = 1
+HEADER_FORMAT = '<8sHHxxxxQQ'
+HEADER_SIZE = struct.calcsize(HEADER_FORMAT)
+
+# 24 numbered cells (the free space is implied) at 7 bits each
+CELL_BITS = 7
+PACKED_CELLS = CELL_COUNT - 1
+RECORD_SIZE = PACKED_CELLS * CELL_BITS // 8
+
+def pack_cards(cards: np.ndarray) -> np.ndarray:
+    """(n, 25) card numbers -> (n, 21) packed records"""
+    cells = np.delete(cards.astype(np.uint8), FREE_CELL, axis=1)
+    bits = np.unpackbits(cells[..., None], axis=-1)[..., 8 - CELL_BITS:]
+    return np.packbits(bits.reshape(len(cards), PACKED_CELLS * CELL_BITS), axis=1)
+
+def unpack_cards(records: np.ndarray) -> np.ndarray:
+    """(n, 21) packed records -> (n, 25) card numbers with 0 for the free space"""
+    bits = np.unpackbits(records, axis=1).reshape(len(records), PACKED_CELLS, CELL_BITS)
+    padded = np.zeros((len(records), PACKED_CELLS, 8), dtype=np.uint8)
+    padded[..., 8 - CELL_BITS:] = bits
+    cells = np.packbits(padded, axis=-1)[..., 0]
+    return np.insert(cells, FREE_CELL, 0, axis=1)
+
+def generate_unique_records(count: int, seed: int, chunk_size: int = 1_000_000) -> np.ndarray:
+    """count distinct packed cards from a seeded generator, in generation order"""
+    rng = np.random.default_rng(seed)
+    records = np.empty((0, RECORD_SIZE), dtype=np.uint8)
+    while len(records) < count:
+        chunk = pack_cards(generate_cards(min(chunk_size, count - len(records)) + 16,
+                                          seed=int(rng.integers(2 ** 63))))
+        records = np.concatenate([records, chunk])
+        # Drop duplicates but keep the first occurrence of each card in order
+        keys = records.view(np.dtype((np.void, RECORD_SIZE))).ravel()
+        _, first = np.unique(keys, return_index=True)
+        records = records[np.sort(first)]
+    return records[:count]
+
+def write_pool(path: str, records: np.ndarray, seed: int):
+    """Write packed records with a header recording the seed"""
+    with open(path, 'wb') as f:
+        f.write(struct.pack(HEADER_FORMAT, POOL_MAGIC, POOL_VERSION, RECORD_SIZE, seed, len(records)))
+        f.write(np.ascontiguousarray(records, dtype=np.uint8).tobytes())
+
+class CardPool:
+    """Memory-mapped pool of pre-generated distinct cards
+
+    Records are read straight out of the mapped file: slicing returns a
+    view, and only the requested cards are unpacked. The seed in the
+    header together with a card's index makes every deal reproducible.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, 'rb')
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, record_size, self.seed, self.count = struct.unpack_from(HEADER_FORMAT, self._map)
+        if magic != POOL_MAGIC or version != POOL_VERSION or record_size != RECORD_SIZE:
+            raise ValueError(f'{path} is not a version {POOL_VERSION} card pool')
+        if len(self._map) < HEADER_SIZE + self.count * RECORD_SIZE:
+            raise ValueError(f'{path} is truncated')
+        self.records = np.frombuffer(self._map, dtype=np.uint8, count=self.count * RECORD_SIZE,
+                                     offset=HEADER_SIZE).reshape(self.count, RECORD_SIZE)
+        self._lock = threading.Lock()
+        self._stats = {'cards_dealt': 0}
+
+    @classmethod
+    def from_config(cls, config) -> Optional['CardPool']:
+        """Open CARD_POOL_PATH if set; None means cards are generated on the fly"""
+        path = getattr(config, 'CARD_POOL_PATH', None)
+        if not path:
+            return None
+        try:
+            return cls(path)
+        except (OSError, ValueError) as e:
+            print(f"Card pool unavailable ({e}); dealing random cards")
+            return None
+
+    def take(self, start: int, count: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Unpacked cards at indexes start..start+count (wrapping); returns (indexes, cards)"""
+        if count > self.count:
+            raise ValueError(f'Pool only holds {self.count} cards')
+        indexes = (start + np.arange(count)) % self.count
+        first = indexes[0]
+        if first + count <= self.count:
+            # Contiguous slice: a view of the mapping, no copy before unpacking
+            records = self.records[first:first + count]
+        else:
+            records = self.records[indexes]
+        with self._lock:
+            self._stats['cards_dealt'] += count
+        return indexes, unpack_cards(records)
+
+    def get_stats(self):
+        with self._lock:
+            return {'path': self.path, 'seed': self.seed, 'cards': self.count, **self._stats}
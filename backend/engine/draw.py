@@ -0,0 +1,55 @@
+import hashlib
+import hmac
+import secrets
+from typing import Sequence
+
+from engine.patterns import MAX_NUMBER
+
+DRAW_ALGORITHM = 'sha256-fisher-yates-v1'
+SEED_BYTES = 32
+
+def new_seed() -> bytes:
+    return secrets.token_bytes(SEED_BYTES)
+
+def draw_commitment(seed: bytes) -> str:
+    """Published before the game: SHA-256 of the seed, hex encoded"""
+    return hashlib.sha256(seed).hexdigest()
+
+def _random_words(seed: bytes):
+    """32-bit words from SHA-256(seed || counter), counter as 4 big-endian bytes"""
+    counter = 0
+    while True:
+        block = hashlib.sha256(seed + counter.to_bytes(4, 'big')).digest()
+        for offset in range(0, len(block), 4):
+            yield int.from_bytes(block[offset:offset + 4], 'big')
+        counter += 1
+
+def draw_sequence(seed: bytes) -> bytes:
+    """The room's draw order: a permutation of 1..75 as 75 bytes
+
+    Fisher-Yates from the last position down; the swap index for position
+    i is drawn uniformly from 0..i by rejection sampling 32-bit words of
+    the SHA-256 counter stream, so anyone holding the seed can recompute
+    the exact order.
+    """
+    numbers = list(range(1, MAX_NUMBER + 1))
+    words = _random_words(seed)
+    for i in range(len(numbers) - 1, 0, -1):
+        bound = i + 1
+        limit = (2 ** 32 // bound) * bound
+        word = next(words)
+        while word >= limit:
+            word = next(words)
+        j = word % bound
+        numbers[i], numbers[j] = numbers[j], numbers[i]
+    return bytes(numbers)
+
+def verify_draw(seed_hex: str, commitment: str, called: Sequence[int]) -> bool:
+    """Check a revealed seed matches the commitment and produced the called numbers in order"""
+    try:
+        seed = bytes.fromhex(seed_hex)
+    except (TypeError, ValueError):
+        return False
+    if not hmac.compare_digest(draw_commitment(seed), commitment):
+        return False
+    return list(draw_sequence(seed)[:len(called)]) == list(called)
@@ -0,0 +1,152 @@
+"""Versioned compact binary encodings for cards, call history and room snapshots
+
+Every encoded value starts with a one-byte format version. Multi-byte
+integers are little endian. Strings are UTF-8, NUL-padded to fixed widths
+and truncated at a character boundary if longer.
+"""
+
+import struct
+from typing import Any, Dict, List, Sequence
+
+import numpy as np
+
+from engine.card_pool import RECORD_SIZE, pack_cards, unpack_cards
+from engine.patterns import MAX_NUMBER, PATTERNS
+
+ENCODING_VERSION = 1
+
+# userId (Firebase UIDs are 28 characters), displayName, telegramUsername, telegramChatId.
+# Display fields are truncated to 24 bytes; the chat ID identifies the Telegram user.
+PLAYER_RECORD = struct.Struct('<32s24s24sq')
+PLAYER_SIZE = PLAYER_RECORD.size
+WINNER_RECORD = struct.Struct('<32s32sBB')
+WINNER_SIZE = WINNER_RECORD.size
+CALL_BITMAP_SIZE = (MAX_NUMBER + 7) // 8
+
+STATUSES = ('waiting', 'playing', 'completed', 'cancelled')
+ROOM_HEADER = struct.Struct('<BBBBHH')
+# Winner records store the index into PATTERNS; version 1 fixes that order
+PATTERN_INDEX = {pattern.id: index for index, pattern in enumerate(PATTERNS)}
+
+def _fixed(text: Any, width: int) -> bytes:
+    data = str(text or '').encode('utf-8')[:width]
+    # Drop a multi-byte character cut in half by the truncation
+    return data.decode('utf-8', 'ignore').encode('utf-8')
+
+def _text(data: bytes) -> str:
+    return data.rstrip(b'\x00').decode('utf-8')
+
+def _check_version(data: bytes):
+    if not data or data[0] != ENCODING_VERSION:
+        raise ValueError(f'Unsupported encoding version: {data[0] if data else None}')
+
+# --- Cards ---
+
+def encode_cards(cards) -> bytes:
+    """Cards as (n, 25) numbers -> version byte + 21 bytes per card"""
+    cards = np.asarray(cards, dtype=np.uint8).reshape(-1, 25)
+    return bytes([ENCODING_VERSION]) + pack_cards(cards).tobytes()
+
+def decode_cards(data: bytes) -> np.ndarray:
+    _check_version(data)
+    records = np.frombuffer(data, dtype=np.uint8, offset=1).reshape(-1, RECORD_SIZE)
+    return unpack_cards(records)
+
+# --- Call history ---
+
+def encode_calls(called: Sequence[int]) -> bytes:
+    """Called numbers -> version byte + 75-bit bitmap (10 bytes) + one byte per call in order"""
+    bitmap = 0
+    for number in called:
+        if not 1 <= number <= MAX_NUMBER:
+            raise ValueError(f'Invalid called number: {number}')
+        bitmap |= 1 << (number - 1)
+    return bytes([ENCODING_VERSION]) + bitmap.to_bytes(CALL_BITMAP_SIZE, 'little') + bytes(called)
+
+def decode_calls(data: bytes) -> List[int]:
+    _check_version(data)
+    return list(data[1 + CALL_BITMAP_SIZE:])
+
+def called_bitmap(data: bytes) -> int:
+    """The bitmap of an encoded call history; bit n-1 is set once n has been called"""
+    _check_version(data)
+    return int.from_bytes(data[1:1 + CALL_BITMAP_SIZE], 'little')
+
+# --- Players and winners ---
+
+def encode_player(player: Dict[str, Any]) -> bytes:
+    return PLAYER_RECORD.pack(_fixed(player.get('userId'), 32),
+                              _fixed(player.get('displayName'), 24),
+                              _fixed(player.get('telegramUsername'), 24),
+                              int(player.get('telegramChatId') or 0))
+
+def decode_player(record: bytes) -> Dict[str, Any]:
+    return _player(*PLAYER_RECORD.unpack(record))
+
+def _player(user_id: bytes, display_name: bytes, username: bytes, chat_id: int) -> Dict[str, Any]:
+    return {
+        'userId': _text(user_id),
+        'displayName': _text(display_name),
+        'telegramChatId': chat_id or None,
+        'telegramUsername': _text(username)
+    }
+
+def encode_winner(winner: Dict[str, Any]) -> bytes:
+    return WINNER_RECORD.pack(_fixed(winner.get('playerId'), 32),
+                              _fixed(winner.get('cardId'), 32),
+                              PATTERN_INDEX[winner['pattern']],
+                              winner.get('callIndex', 0))
+
+def decode_winner(record: bytes) -> Dict[str, Any]:
+    return _winner(*WINNER_RECORD.unpack(record))
+
+def _winner(player_id: bytes, card_id: bytes, pattern_index: int, call_index: int) -> Dict[str, Any]:
+    pattern = PATTERNS[pattern_index]
+    return {
+        'playerId': _text(player_id),
+        'cardId': _text(card_id),
+        'pattern': pattern.id,
+        'patternName': pattern.name,
+        'winType': pattern.win_type,
+        'winPercentage': pattern.win_percentage,
+        'callIndex': call_index
+    }
+
+# --- Room snapshots ---
+
+def encode_room(room: Dict[str, Any]) -> bytes:
+    """Room snapshot: header, player records, winner records, then the call history
+
+    Header: version, status index, current call (0 = none), reserved,
+    player count, winner count.
+    """
+    players = room.get('players') or []
+    winners = room.get('winners') or []
+    status = room.get('status')
+    header = ROOM_HEADER.pack(ENCODING_VERSION,
+                              STATUSES.index(status) if status in STATUSES else 255,
+                              room.get('currentCall') or 0, 0, len(players), len(winners))
+    return b''.join([header]
+                    + [encode_player(player) for player in players]
+                    + [encode_winner(winner) for winner in winners]
+                    + [encode_calls(room.get('calledNumbers') or [])])
+
+def decode_room(data: bytes) -> Dict[str, Any]:
+    _check_version(data)
+    _, status, current_call, _, player_count, winner_count = ROOM_HEADER.unpack_from(data)
+    offset = ROOM_HEADER.size
+    end = offset + player_count * PLAYER_SIZE
+    players = [_player(*fields) for fields in PLAYER_RECORD.iter_unpack(data[offset:end])]
+    offset, end = end, end + winner_count * WINNER_SIZE
+    winners = [_winner(*fields) for fields in WINNER_RECORD.iter_unpack(data[offset:end])]
+    offset = end
+    called = decode_calls(data[offset:])
+    for winner in winners:
+        winner['number'] = called[winner['callIndex'] - 1] if winner['callIndex'] else None
+    return {
+        'status': STATUSES[status] if status < len(STATUSES) else None,
+        'currentCall': current_call or None,
+        'players': players,
+        'winners': winners,
+        'calledNumbers': called
+    }
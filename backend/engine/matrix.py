@@ -0,0 +1,100 @@
+from typing import Dict, Optional, Sequence, Tuple
+
+import numpy as np
+
+from engine.patterns import (
+    CELL_COUNT, COLUMN_RANGES, FREE_CELL, FREE_MASK, GRID_SIZE, PATTERNS, WinPattern
+)
+
+CELL_BITS = (np.uint32(1) << np.arange(CELL_COUNT, dtype=np.uint32)).astype(np.uint32)
+
+def _popcount(values: np.ndarray) -> np.ndarray:
+    """Set bits per uint32 element"""
+    if hasattr(np, 'bitwise_count'):
+        return np.bitwise_count(values)
+    values = values - ((values >> 1) & 0x55555555)
+    values = (values & 0x33333333) + ((values >> 2) & 0x33333333)
+    values = (values + (values >> 4)) & 0x0F0F0F0F
+    return (values * 0x01010101 & 0xFFFFFFFF) >> 24
+
+def generate_cards(count: int, seed: Optional[int] = None) -> np.ndarray:
+    """count random cards as a (count, 25) uint8 array in cell order; the free space is 0"""
+    rng = np.random.default_rng(seed)
+    cards = np.empty((count, CELL_COUNT), dtype=np.uint8)
+    for col, (_, low, _) in enumerate(COLUMN_RANGES):
+        # First 5 of a random permutation of the 15 column numbers, per card
+        picks = np.argsort(rng.random((count, 15)), axis=1)[:, :GRID_SIZE]
+        cards[:, col * GRID_SIZE:(col + 1) * GRID_SIZE] = picks + low
+    cards[:, FREE_CELL] = 0
+    return cards
+
+class CardMatrix:
+    """A room's cards as NumPy arrays: numbers (N x 25) and marked masks (N)
+
+    A call is one vectorized pass: compare the called number against the
+    five cells of its column, OR the resulting bits into the marked masks,
+    and test the touched cards against every pattern mask at once.
+    """
+
+    def __init__(self, patterns: Tuple[WinPattern, ...] = PATTERNS, capacity: int = 64):
+        self.patterns = patterns
+        self.pattern_masks = np.array([p.mask for p in patterns], dtype=np.uint32)
+        self.size = 0
+        self.numbers = np.zeros((capacity, CELL_COUNT), dtype=np.uint8)
+        self.marks = np.zeros(capacity, dtype=np.uint32)
+        self.won = np.zeros(capacity, dtype=bool)
+
+    def _reserve(self, count: int):
+        needed = self.size + count
+        capacity = len(self.marks)
+        if needed <= capacity:
+            return
+        while capacity < needed:
+            capacity *= 2
+        numbers = np.zeros((capacity, CELL_COUNT), dtype=np.uint8)
+        numbers[:self.size] = self.numbers[:self.size]
+        marks = np.zeros(capacity, dtype=np.uint32)
+        marks[:self.size] = self.marks[:self.size]
+        won = np.zeros(capacity, dtype=bool)
+        won[:self.size] = self.won[:self.size]
+        self.numbers, self.marks, self.won = numbers, marks, won
+
+    def add(self, numbers: Sequence[int]) -> int:
+        """Append one card; returns its row index"""
+        return self.add_many(np.asarray(numbers, dtype=np.uint8).reshape(1, CELL_COUNT)).start
+
+    def add_many(self, cards: np.ndarray) -> range:
+        """Append a (k, 25) block of cards; returns their row indexes"""
+        count = len(cards)
+        self._reserve(count)
+        start = self.size
+        self.numbers[start:start + count] = cards
+        self.marks[start:start + count] = FREE_MASK
+        self.size += count
+        return range(start, start + count)
+
+    def mark(self, number: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Mark a called number; returns (rows, pattern indexes) of cards that just won"""
+        col = (number - 1) // 15
+        cells = slice(col * GRID_SIZE, (col + 1) * GRID_SIZE)
+        hits = self.numbers[:self.size, cells] == number
+        bits = (hits * CELL_BITS[cells]).sum(axis=1, dtype=np.uint32)
+        touched = np.flatnonzero(bits)
+        self.marks[touched] |= bits[touched]
+
+        candidates = touched[~self.won[touched]]
+        marks = self.marks[candidates, None]
+        covered = (marks & self.pattern_masks) == self.pattern_masks
+        winning = covered.any(axis=1)
+        rows = candidates[winning]
+        self.won[rows] = True
+        return rows, covered[winning].argmax(axis=1)
+
+    def near_wins(self) -> Dict[str, int]:
+        """Cards still playing that are one number away from each pattern"""
+        playing = ~self.won[:self.size]
+        missing = self.pattern_masks & ~self.marks[:self.size, None][playing]
+        one_away = _popcount(missing) == 1
+        counts = {pattern.id: int(count) for pattern, count in zip(self.patterns, one_away.sum(axis=0))}
+        counts['cards'] = int(one_away.any(axis=1).sum())
+        return counts
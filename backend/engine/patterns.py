@@ -0,0 +1,66 @@
+from typing import Iterable, NamedTuple, Tuple
+
+# Cells are numbered column-major to match the frontend card layout
+# (card.B[0..4], card.I[0..4], ...): cell index = column * 5 + row.
+GRID_SIZE = 5
+CELL_COUNT = GRID_SIZE * GRID_SIZE
+FREE_CELL = 12
+FREE_MASK = 1 << FREE_CELL
+FULL_MASK = (1 << CELL_COUNT) - 1
+
+COLUMNS = 'BINGO'
+MAX_NUMBER = 75
+COLUMN_RANGES = tuple((letter, col * 15 + 1, col * 15 + 15) for col, letter in enumerate(COLUMNS))
+
+class WinPattern(NamedTuple):
+    id: str
+    name: str
+    win_type: str
+    mask: int
+    win_percentage: float
+
+def cell_index(col: int, row: int) -> int:
+    return col * GRID_SIZE + row
+
+def cells_mask(cells: Iterable[Tuple[int, int]]) -> int:
+    """Bit mask for (column, row) cells"""
+    mask = 0
+    for col, row in cells:
+        mask |= 1 << cell_index(col, row)
+    return mask
+
+def column_letter(number: int) -> str:
+    return COLUMNS[(number - 1) // 15]
+
+def _build_patterns() -> Tuple[WinPattern, ...]:
+    span = range(GRID_SIZE)
+    last = GRID_SIZE - 1
+    middle = GRID_SIZE // 2
+    patterns = []
+    # Same order and prize shares as the frontend checkWin
+    for col, letter in enumerate(COLUMNS):
+        patterns.append(WinPattern(f'column_{letter}', f'{letter} Column', 'line',
+                                   cells_mask((col, row) for row in span), 0.20))
+    for row in span:
+        patterns.append(WinPattern(f'row_{row + 1}', f'Row {row + 1}', 'line',
+                                   cells_mask((col, row) for col in span), 0.20))
+    patterns.append(WinPattern('diagonal_down', 'Diagonal (\\)', 'line',
+                               cells_mask((i, i) for i in span), 0.25))
+    patterns.append(WinPattern('diagonal_up', 'Diagonal (/)', 'line',
+                               cells_mask((i, last - i) for i in span), 0.25))
+    patterns.append(WinPattern('four_corners', 'Four Corners', 'corners',
+                               cells_mask([(0, 0), (0, last), (last, 0), (last, last)]), 0.30))
+    patterns.append(WinPattern('center_cross', 'Center Cross', 'center_cross',
+                               cells_mask([(middle, i) for i in span] + [(i, middle) for i in span]), 0.35))
+    patterns.append(WinPattern('blackout', 'Full House', 'fullhouse', FULL_MASK, 1.0))
+    return tuple(patterns)
+
+PATTERNS = _build_patterns()
+PATTERNS_BY_ID = {pattern.id: pattern for pattern in PATTERNS}
+
+def match_pattern(marked: int, patterns: Tuple[WinPattern, ...] = PATTERNS):
+    """First pattern fully covered by a marked mask, or None"""
+    for pattern in patterns:
+        if marked & pattern.mask == pattern.mask:
+            return pattern
+    return None
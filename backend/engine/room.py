@@ -0,0 +1,157 @@
+import random
+import secrets
+import uuid
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from engine.card import Card, generate_card, validate_card
+from engine.draw import draw_commitment, draw_sequence
+from engine.matrix import CardMatrix
+from engine.patterns import MAX_NUMBER, PATTERNS, WinPattern
+
+class BingoRoom:
+    """Authoritative state of one bingo game: dealt cards, calls and winners
+
+    Cards are rows of a CardMatrix: each has a 25-bit mask of marked
+    cells, and a call updates the marks, finds every new winner and
+    counts near-wins in one vectorized pass over the precomputed pattern
+    masks.
+
+    With a draw seed the call order is fixed up front (see engine.draw):
+    calling is advancing an index into the 75-byte sequence, and the
+    seed's commitment can be published before the game starts.
+    """
+
+    def __init__(self, room_id: str, patterns: Tuple[WinPattern, ...] = PATTERNS,
+                 seed: Optional[int] = None, stop_on_win: bool = True, pool_offset: int = 0,
+                 draw_seed: Optional[bytes] = None):
+        self.room_id = room_id
+        self.draw_seed = draw_seed
+        self.draw_sequence = draw_sequence(draw_seed) if draw_seed else None
+        self.draw_commitment = draw_commitment(draw_seed) if draw_seed else None
+        self.pool_offset = pool_offset
+        self.patterns = patterns
+        self.stop_on_win = stop_on_win
+        self.cards: List[Card] = []
+        self.called: List[int] = []
+        self.winners: List[Dict[str, Any]] = []
+        self.finished = False
+        self.matrix = CardMatrix(patterns)
+        self.near_wins: Dict[str, int] = {}
+        self._cards_by_id: Dict[str, Card] = {}
+        self._called_set = set()
+        self._deal_rng = random.Random(seed)
+        self._call_rng = secrets.SystemRandom()
+
+    def deal(self, player_id: str, numbers: Optional[Sequence[int]] = None,
+             card_id: Optional[str] = None) -> Card:
+        """Deal a card (random unless numbers are given) before the first call"""
+        if self.called:
+            raise ValueError('Cards can only be dealt before the first call')
+        if numbers is None:
+            numbers = generate_card(self._deal_rng)
+        elif not validate_card(numbers):
+            raise ValueError('Invalid card numbers')
+
+        card_id = card_id or uuid.uuid4().hex
+        if card_id in self._cards_by_id:
+            raise ValueError(f'Card {card_id} already dealt')
+        card = Card(card_id, player_id, numbers, self.matrix, self.matrix.add(numbers))
+        self.cards.append(card)
+        self._cards_by_id[card.card_id] = card
+        return card
+
+    def deal_many(self, player_id: str, cards, card_ids: Optional[Sequence[str]] = None) -> List[Card]:
+        """Deal a block of pre-validated cards (e.g. from a CardPool) before the first call"""
+        if self.called:
+            raise ValueError('Cards can only be dealt before the first call')
+        card_ids = list(card_ids) if card_ids is not None else [uuid.uuid4().hex for _ in range(len(cards))]
+        if any(card_id in self._cards_by_id for card_id in card_ids):
+            raise ValueError('Card already dealt')
+        rows = self.matrix.add_many(cards)
+        dealt = [Card(card_id, player_id, numbers, self.matrix, row)
+                 for card_id, numbers, row in zip(card_ids, cards.tolist(), rows)]
+        self.cards.extend(dealt)
+        for card in dealt:
+            self._cards_by_id[card.card_id] = card
+        return dealt
+
+    def get_card(self, card_id: str) -> Optional[Card]:
+        return self._cards_by_id.get(card_id)
+
+    def player_cards(self, player_id: str) -> List[Card]:
+        return [card for card in self.cards if card.player_id == player_id]
+
+    def remaining_numbers(self) -> List[int]:
+        return [n for n in range(1, MAX_NUMBER + 1) if n not in self._called_set]
+
+    def call(self, number: Optional[int] = None) -> Dict[str, Any]:
+        """Call the next number and return it with any new winners
+
+        Rooms with a draw sequence call its next entry (a given number must
+        match it); other rooms call the given number or a random uncalled one.
+        """
+        if self.finished:
+            raise ValueError('Game is already finished')
+        if self.draw_sequence is not None:
+            if len(self.called) >= MAX_NUMBER:
+                raise ValueError('All numbers have been called')
+            next_number = self.draw_sequence[len(self.called)]
+            if number is not None and number != next_number:
+                raise ValueError('Room uses a committed draw sequence')
+            number = next_number
+        elif number is None:
+            remaining = self.remaining_numbers()
+            if not remaining:
+                raise ValueError('All numbers have been called')
+            number = self._call_rng.choice(remaining)
+        elif not 1 <= number <= MAX_NUMBER:
+            raise ValueError(f'Number must be between 1 and {MAX_NUMBER}')
+        elif number in self._called_set:
+            raise ValueError(f'Number {number} was already called')
+
+        self.called.append(number)
+        self._called_set.add(number)
+
+        winners = []
+        rows, pattern_indexes = self.matrix.mark(number)
+        for row, pattern_index in zip(rows.tolist(), pattern_indexes.tolist()):
+            card = self.cards[row]
+            pattern = self.patterns[pattern_index]
+            card.win = pattern.id
+            winners.append(self._winner(card, pattern, number))
+
+        self.winners.extend(winners)
+        if (winners and self.stop_on_win) or len(self.called) == MAX_NUMBER:
+            self.finished = True
+        self.near_wins = {} if self.finished else self.matrix.near_wins()
+        return {'number': number, 'callIndex': len(self.called), 'winners': winners,
+                'nearWins': self.near_wins, 'finished': self.finished}
+
+    def _winner(self, card: Card, pattern: WinPattern, number: int) -> Dict[str, Any]:
+        return {
+            'cardId': card.card_id,
+            'playerId': card.player_id,
+            'pattern': pattern.id,
+            'patternName': pattern.name,
+            'winType': pattern.win_type,
+            'winPercentage': pattern.win_percentage,
+            'number': number,
+            'callIndex': len(self.called)
+        }
+
+    def replay(self, called: Sequence[int]):
+        """Re-apply a persisted call sequence (used when rebuilding a room)"""
+        for number in called:
+            self.call(number)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'roomId': self.room_id,
+            'cards': len(self.cards),
+            'calledNumbers': list(self.called),
+            'currentCall': self.called[-1] if self.called else None,
+            'winners': list(self.winners),
+            'nearWins': self.near_wins,
+            'drawCommitment': self.draw_commitment,
+            'finished': self.finished
+        }
@@ -0,0 +1,46 @@
+import zlib
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+def shard_for(player_id: str, shard_count: int) -> int:
+    """Stable shard of a player: CRC-32 of the UTF-8 player ID modulo the shard count"""
+    return zlib.crc32(player_id.encode('utf-8')) % shard_count
+
+def shard_room_id(tournament_id: str, shard: int) -> str:
+    return f"{tournament_id}-s{shard}"
+
+class TournamentArbiter:
+    """Decides the winners of a sharded tournament from shard-local results
+
+    Every shard plays the same committed call sequence. Shards report how
+    far they have called and the winners they found; the tournament is
+    won at the earliest call index with a winner in any shard, and all
+    winners at that index tie. A call index is only settled once every
+    shard has called at least that far, so a lagging shard can still claim
+    an earlier win than one already reported.
+    """
+
+    def __init__(self, shard_count: int):
+        self.shard_count = shard_count
+        self.progress = [0] * shard_count
+        self._claims: Dict[int, List[Dict[str, Any]]] = {}
+
+    def report(self, shard: int, call_index: int, winners: Sequence[Dict[str, Any]] = ()):
+        """Record that a shard has called through call_index, with its new winners"""
+        self.progress[shard] = max(self.progress[shard], call_index)
+        for winner in winners:
+            self._claims.setdefault(winner['callIndex'], []).append({**winner, 'shard': shard})
+
+    @property
+    def settled_index(self) -> int:
+        """Calls every shard has processed"""
+        return min(self.progress)
+
+    def resolve(self) -> Optional[Tuple[int, List[Dict[str, Any]]]]:
+        """(winning call index, tied winners) once settled, else None"""
+        if not self._claims:
+            return None
+        call_index = min(self._claims)
+        if call_index > self.settled_index:
+            return None
+        winners = sorted(self._claims[call_index], key=lambda w: (w['shard'], w['cardId'], w['pattern']))
+        return call_index, winners
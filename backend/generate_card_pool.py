@@ -0,0 +1,36 @@
+#!/usr/bin/env python3
+"""
+Card Pool Generator
+Pre-generates distinct B-I-N-G-O cards from a seeded PRNG into a packed
+binary file (21-byte records) that the backend memory-maps and deals
+from. The same seed always produces the same pool.
+
+Usage: python generate_card_pool.py --count 2000000 --seed 42 [--output data/card_pool.bin]
+"""
+
+import argparse
+import os
+import time
+
+from engine.card_pool import CardPool, HEADER_SIZE, RECORD_SIZE, generate_unique_records, write_pool
+
+def main():
+    parser = argparse.ArgumentParser(description='Generate a packed pool of unique bingo cards')
+    parser.add_argument('--count', type=int, default=1_000_000, help='Number of cards')
+    parser.add_argument('--seed', type=int, required=True, help='PRNG seed (record it for audits)')
+    parser.add_argument('--output', default='data/card_pool.bin', help='Pool file path')
+    args = parser.parse_args()
+
+    os.makedirs(os.path.dirname(args.output) or '.', exist_ok=True)
+    start = time.perf_counter()
+    records = generate_unique_records(args.count, args.seed)
+    write_pool(args.output, records, args.seed)
+    elapsed = time.perf_counter() - start
+
+    pool = CardPool(args.output)
+    size_mb = (HEADER_SIZE + pool.count * RECORD_SIZE) / 1024 / 1024
+    print(f"✅ Wrote {pool.count} unique cards ({size_mb:.1f} MB, seed {pool.seed}) to {args.output} in {elapsed:.1f}s")
+    print(f"Set CARD_POOL_PATH={os.path.abspath(args.output)} to deal from it")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Room Players Migration
+Copies the players array of gameRooms/{id} documents into the
+gameRooms/{id}/players/{uid} subcollection and sets the room's
+playerCount. Player documents are created with a BulkWriter; the count
+is then incremented by the documents actually created, so players who
+joined through the new path in the meantime are not counted twice.
+Rooms up to PLAYERS_ARRAY_LIMIT players keep their array, which the
+realtime hub and the frontend still read; larger rooms have it removed.
+Rooms already migrated are skipped, so running the script twice is safe.
+
+Usage: python migrate_room_players.py [--dry-run]
+"""
+
+import argparse
+import sys
+import threading
+from collections import Counter
+
+from firebase_admin import firestore
+from google.rpc import code_pb2
+
+from config.settings import get_config
+from database.firebase import firebase_manager
+from services.room_players import lists_players, room_players
+
+def migrate(db, dry_run=False):
+    """Copy players arrays into subcollections; returns (rooms, players moved, already present)"""
+    rooms = []
+    for doc in db.collection('gameRooms').stream():
+        data = doc.to_dict() or {}
+        players = data.get('players')
+        if isinstance(players, list) and not data.get('playersMigrated'):
+            rooms.append((doc.reference, players, lists_players(data)))
+    if dry_run:
+        for room_ref, players, _ in rooms:
+            print(f"Would move {len(players)} players of room {room_ref.id}")
+        return len(rooms), sum(len(players) for _, players, _ in rooms), 0
+
+    created = Counter()
+    already_present = Counter()
+    lock = threading.Lock()
+
+    def on_result(reference, result, writer):
+        with lock:
+            created[reference.parent.parent.id] += 1
+
+    def on_error(failure, writer):
+        if failure.code == code_pb2.ALREADY_EXISTS:
+            with lock:
+                already_present[failure.operation.reference.parent.parent.id] += 1
+            return False
+        # Retry transient errors with the writer's backoff
+        return failure.attempts < 10
+
+    writer = db.bulk_writer()
+    writer.on_write_result(on_result)
+    writer.on_write_error(on_error)
+    for room_ref, players, _ in rooms:
+        seen = set()
+        for player in players:
+            user_id = player.get('userId')
+            if not user_id or user_id in seen:
+                continue
+            seen.add(user_id)
+            writer.create(room_players.player_ref(db, room_ref.id, user_id), {
+                **player,
+                'joinedAt': firestore.SERVER_TIMESTAMP
+            })
+    writer.flush()
+
+    # Only drop an array once the player documents exist
+    for room_ref, _, listed in rooms:
+        update = {'playerCount': firestore.Increment(created[room_ref.id]), 'playersMigrated': True}
+        if not listed:
+            update['players'] = firestore.DELETE_FIELD
+        writer.update(room_ref, update)
+    writer.close()
+    return len(rooms), sum(created.values()), sum(already_present.values())
+
+def main():
+    parser = argparse.ArgumentParser(description='Move gameRooms players arrays into players subcollections')
+    parser.add_argument('--dry-run', action='store_true', help='List what would be migrated')
+    args = parser.parse_args()
+
+    if not firebase_manager.initialize(get_config()):
+        print("❌ Firebase is not configured")
+        sys.exit(1)
+
+    db = firebase_manager.get_db()
+    rooms, moved, already_present = migrate(db, dry_run=args.dry_run)
+    print(f"✅ Migrated {moved} players in {rooms} rooms ({already_present} already in a subcollection)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Wallet Ledger Migration
+Moves balances credited to users/{uid}.wallet_balance (the old Chapa
+deposit path) onto the wallet ledger as one opening entry per user and
+zeroes the old field in the same commit, so the ledger is the only
+place the money is counted. The entry ID is fixed, so running the
+script twice is safe.
+
+Usage: python migrate_wallet_balances.py [--dry-run]
+"""
+
+import argparse
+import sys
+
+from firebase_admin import firestore
+from google.api_core.exceptions import AlreadyExists, FailedPrecondition
+
+from config.settings import get_config
+from database.firebase import firebase_manager
+from services.ledger_service import ledger_service
+
+OPENING_ENTRY_ID = 'legacy_wallet_balance'
+
+def stage_clear(batch, db, doc):
+    """Zero the legacy field, guarded so a balance changed since the read is not lost"""
+    batch.update(db.collection('users').document(doc.id), {
+        'wallet_balance': 0,
+        'walletBalanceMigratedAt': firestore.SERVER_TIMESTAMP
+    }, option=db.write_option(last_update_time=doc.update_time))
+
+def migrate(db, dry_run=False):
+    """Append an opening ledger entry for every user with a legacy balance"""
+    migrated = 0
+    already_done = 0
+    changed = 0
+
+    for doc in db.collection('users').where('wallet_balance', '>', 0).stream():
+        amount = (doc.to_dict() or {}).get('wallet_balance', 0)
+        if dry_run:
+            print(f"Would migrate {amount} ETB for {doc.id}")
+            migrated += 1
+            continue
+
+        batch = db.batch()
+        ledger_service.stage_entry(batch, db, doc.id, 'deposit', amount,
+                                   entry_id=OPENING_ENTRY_ID, reference='users.wallet_balance')
+        stage_clear(batch, db, doc)
+        try:
+            batch.commit()
+            migrated += 1
+        except AlreadyExists:
+            # Opening entry written by an earlier run that left the field set
+            batch = db.batch()
+            stage_clear(batch, db, doc)
+            try:
+                batch.commit()
+                already_done += 1
+            except FailedPrecondition:
+                changed += 1
+        except FailedPrecondition:
+            # The user document changed after it was read; run the script again
+            changed += 1
+
+    return migrated, already_done, changed
+
+def main():
+    parser = argparse.ArgumentParser(description='Move users.wallet_balance onto the wallet ledger')
+    parser.add_argument('--dry-run', action='store_true', help='List what would be migrated')
+    args = parser.parse_args()
+
+    if not firebase_manager.initialize(get_config()):
+        print("❌ Firebase is not configured")
+        sys.exit(1)
+
+    db = firebase_manager.get_db()
+    migrated, already_done, changed = migrate(db, dry_run=args.dry_run)
+    print(f"✅ Migrated {migrated} balances ({already_done} already on the ledger)")
+    if changed:
+        print(f"⚠️  {changed} users changed during the migration; run it again to pick them up")
+
+if __name__ == "__main__":
+    main()
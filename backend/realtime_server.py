@@ -0,0 +1,40 @@
+#!/usr/bin/env python3
+"""
+Realtime Server
+Pushes called numbers, winners and player joins to clients over
+Server-Sent Events, with one Firestore listener per active room instead
+of one per client. Runs on aiohttp next to the Flask API.
+
+Usage: python realtime_server.py
+Client: new EventSource(`${REALTIME_URL}/api/realtime/rooms/${roomId}/events?token=${idToken}`)
+"""
+
+import sys
+
+from aiohttp import web
+from firebase_admin import auth as firebase_auth
+
+from config.settings import get_config
+from database.firebase import firebase_manager
+from services.realtime_hub import FirestoreRoomSource, RealtimeHub, create_app
+
+def main():
+    config = get_config()
+    if not firebase_manager.initialize(config):
+        print("❌ Firebase is not configured")
+        sys.exit(1)
+
+    hub = RealtimeHub(
+        FirestoreRoomSource(firebase_manager),
+        queue_size=config.REALTIME_QUEUE_SIZE,
+        max_overflows=config.REALTIME_MAX_OVERFLOWS
+    )
+    verify_token = firebase_auth.verify_id_token if config.REALTIME_REQUIRE_AUTH else None
+    app = create_app(hub, verify_token=verify_token, heartbeat=config.REALTIME_HEARTBEAT_SECONDS,
+                     allowed_origins=config.CORS_ORIGINS)
+
+    print(f"🚀 Realtime server listening on port {config.REALTIME_PORT}")
+    web.run_app(app, port=config.REALTIME_PORT, print=None)
+
+if __name__ == "__main__":
+    main()
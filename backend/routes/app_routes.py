@@ -1,11 +1,72 @@
 
-from flask import Blueprint, request, jsonify, Response
+import json
+from flask import Blueprint, request, jsonify, Response, g
+from config.settings import get_config
 from services.translation_service import translation_service
 from services.avatar_service import avatar_service
+from services.precompressed import PrecompressedPayload
 from database.firebase import firebase_manager
 
 app_bp = Blueprint('app', __name__, url_prefix='/api')
 
+CONTENT_TYPES = ('navigation', 'game', 'wallet', 'auth')
+# Items rendered per chunk of a streamed batch translation response
+STREAM_CHUNK = 256
+# Language preference set by POST /api/language
+LOCALE_COOKIE = 'lang'
+LOCALE_COOKIE_MAX_AGE = 365 * 24 * 3600
+
+def request_locale() -> str:
+    """Locale of the current request, resolved once: ?lang=, the lang cookie, then Accept-Language"""
+    if 'locale' not in g:
+        g.locale = translation_service.resolve_locale(request.args.get('lang'),
+                                                      request.cookies.get(LOCALE_COOKIE),
+                                                      request.headers.get('Accept-Language'))
+    return g.locale
+
+def build_static_payloads():
+    """Serialize and compress every translation, content and languages response once"""
+    payloads = {}
+    languages = translation_service.get_supported_languages()
+    for language in translation_service.supported_languages:
+        translations = translation_service.translations.get(language, {})
+        payloads[('translations', language)] = PrecompressedPayload({
+            "status": "success",
+            "language": language,
+            "translations": translations
+        })
+        for content_type in CONTENT_TYPES + ('all',):
+            payloads[('content', language, content_type)] = PrecompressedPayload({
+                "status": "success",
+                "language": language,
+                "type": content_type,
+                "content": translations if content_type == 'all' else translations.get(content_type, {})
+            })
+        # Keyed by the request's locale, which is part of the response
+        payloads[('languages', language)] = PrecompressedPayload({
+            "status": "success",
+            "languages": languages,
+            "current_language": language
+        })
+    return payloads
+
+static_payloads = build_static_payloads()
+
+def send_static(payload: PrecompressedPayload, max_age: int, vary: str = 'Accept-Encoding'):
+    """Serve a precompressed payload, answering a matching If-None-Match with 304"""
+    headers = {
+        'ETag': f'"{payload.etag}"',
+        'Cache-Control': f'public, max-age={max_age}' if max_age else 'no-cache',
+        'Vary': vary
+    }
+    if request.if_none_match.contains_weak(payload.etag):
+        return Response(status=304, headers=headers)
+    encoding = payload.select(request.accept_encodings)
+    if encoding:
+        headers['Content-Encoding'] = encoding
+        return Response(payload.encodings[encoding], headers=headers, mimetype='application/json')
+    return Response(payload.body, headers=headers, mimetype='application/json')
+
 # Update user email route (must be after app_bp is defined)
 @app_bp.route('/user/update-email', methods=['POST'])
 def update_user_email():
@@ -35,13 +96,7 @@ def get_translations(language):
                 "supported_languages": list(translation_service.supported_languages)
             }), 400
         
-        translations = translation_service.translations.get(language, {})
-        
-        return jsonify({
-            "status": "success",
-            "language": language,
-            "translations": translations
-        }), 200
+        return send_static(static_payloads[('translations', language)], get_config().TRANSLATIONS_CACHE_MAX_AGE)
         
     except Exception as e:
         return jsonify({
@@ -62,9 +117,14 @@ def get_translated_text(language):
             }), 400
         
         key = data['key']
-        params = data.get('params', {})
+        params = data.get('params') or {}
+        if not isinstance(params, dict):
+            return jsonify({
+                "status": "error",
+                "message": "params must be an object"
+            }), 400
         
-        text = translation_service.get_text(key, language, **params)
+        text = translation_service.render(key, language, params)
         
         return jsonify({
             "status": "success",
@@ -80,18 +140,92 @@ def get_translated_text(language):
             "error": str(e)
         }), 500
 
-@app_bp.route('/languages', methods=['GET'])
-def get_supported_languages():
-    """Get supported languages"""
+def parse_batch_item(item, default_language):
+    """A batch item (a key or {key, params, language}) -> (key, params, language)
+
+    An unsupported or malformed item language falls back to default_language,
+    so the language returned is always the one the text was rendered in.
+    """
+    if isinstance(item, str):
+        item = {'key': item}
+    if not isinstance(item, dict) or not isinstance(item.get('key'), str):
+        raise ValueError('Each item must be a key or an object with a "key"')
+    params = item.get('params') or {}
+    if not isinstance(params, dict):
+        raise ValueError(f'params of "{item["key"]}" must be an object')
+    return item['key'], params, translation_service.resolve_locale(item.get('language'), default_language)
+
+def render_batch_item(key, params, language):
+    """One batch result; an item that fails to render carries an error instead of failing the batch"""
     try:
-        languages = translation_service.get_supported_languages()
+        return {"key": key, "language": language, "text": translation_service.render(key, language, params)}
+    except Exception as e:
+        return {"key": key, "language": language, "error": str(e)}
+
+def stream_batch(items):
+    """The batch response as a chunked JSON body, rendered STREAM_CHUNK items at a time
+
+    The 200 headers are already sent, so nothing raised here may cut the
+    body short; per-item errors are reported inside the item.
+    """
+    yield '{"status":"success","count":%d,"texts":[' % len(items)
+    for start in range(0, len(items), STREAM_CHUNK):
+        chunk = ','.join(json.dumps(render_batch_item(*item), ensure_ascii=False, separators=(',', ':'))
+                         for item in items[start:start + STREAM_CHUNK])
+        yield (',' if start else '') + chunk
+    yield ']}'
+
+@app_bp.route('/translations/batch', methods=['POST'])
+def get_translated_texts():
+    """Render many translation keys in one request, in request order
+
+    Body: {"language": "am", "items": ["common.ok", {"key": "game.call_number",
+    "params": {"number": 7}, "language": "en"}]}. Large batches are streamed.
+    """
+    try:
+        data = request.get_json(silent=True)
+        items = data.get('items') if isinstance(data, dict) else None
+        if not isinstance(items, list):
+            return jsonify({
+                "status": "error",
+                "message": "items must be a list of translation keys"
+            }), 400
+        config = get_config()
+        if len(items) > config.TRANSLATION_BATCH_MAX_ITEMS:
+            return jsonify({
+                "status": "error",
+                "message": f"At most {config.TRANSLATION_BATCH_MAX_ITEMS} items per batch"
+            }), 400
         
+        language = translation_service.resolve_locale(data.get('language'), request_locale())
+        try:
+            items = [parse_batch_item(item, language) for item in items]
+        except ValueError as e:
+            return jsonify({"status": "error", "message": str(e)}), 400
+        
+        if len(items) > config.TRANSLATION_BATCH_STREAM_THRESHOLD:
+            return Response(stream_batch(items), mimetype='application/json')
         return jsonify({
             "status": "success",
-            "languages": languages,
-            "current_language": translation_service.current_language
+            "count": len(items),
+            "texts": [render_batch_item(*item) for item in items]
         }), 200
         
+    except Exception as e:
+        return jsonify({
+            "status": "error",
+            "message": "Failed to get translated texts",
+            "error": str(e)
+        }), 500
+
+@app_bp.route('/languages', methods=['GET'])
+def get_supported_languages():
+    """Get supported languages"""
+    try:
+        # The locale is negotiated per request, so clients revalidate with the ETag
+        return send_static(static_payloads[('languages', request_locale())], 0,
+                           vary='Accept-Encoding, Accept-Language, Cookie')
+        
     except Exception as e:
         return jsonify({
             "status": "error",
@@ -101,7 +235,7 @@ def get_supported_languages():
 
 @app_bp.route('/language', methods=['POST'])
 def set_language():
-    """Set current language"""
+    """Remember the client's language in a cookie (used when a request has no ?lang=)"""
     try:
         data = request.get_json()
         if not data or 'language' not in data:
@@ -111,14 +245,14 @@ def set_language():
             }), 400
         
         language = data['language']
-        success = translation_service.set_language(language)
-        
-        if success:
-            return jsonify({
+        if language in translation_service.supported_languages:
+            response = jsonify({
                 "status": "success",
                 "message": "Language updated successfully",
-                "current_language": translation_service.current_language
-            }), 200
+                "current_language": language
+            })
+            response.set_cookie(LOCALE_COOKIE, language, max_age=LOCALE_COOKIE_MAX_AGE, samesite='Lax')
+            return response, 200
         else:
             return jsonify({
                 "status": "error",
@@ -254,7 +388,7 @@ def get_app_config():
                 "firebase": firebase_manager.is_initialized()
             },
             "languages": translation_service.get_supported_languages(),
-            "current_language": translation_service.current_language,
+            "current_language": request_locale(),
             "avatar_styles": avatar_service.avatar_styles[:10],  # Show first 10
             "payment_methods": ["chapa"],
             "version": "2.0.0"
@@ -282,22 +416,16 @@ def get_localized_content(language):
         if language not in translation_service.supported_languages:
             language = 'en'  # Fallback to English
         
-        if content_type == 'navigation':
-            content = translation_service.translations.get(language, {}).get('navigation', {})
-        elif content_type == 'game':
-            content = translation_service.translations.get(language, {}).get('game', {})
-        elif content_type == 'wallet':
-            content = translation_service.translations.get(language, {}).get('wallet', {})
-        elif content_type == 'auth':
-            content = translation_service.translations.get(language, {}).get('auth', {})
-        else:
-            content = translation_service.translations.get(language, {})
+        payload = static_payloads.get(('content', language, content_type))
+        if payload:
+            return send_static(payload, get_config().TRANSLATIONS_CACHE_MAX_AGE)
         
+        # Unknown types get every section, echoing the requested type
         return jsonify({
             "status": "success",
             "language": language,
             "type": content_type,
-            "content": content
+            "content": translation_service.translations.get(language, {})
         }), 200
         
     except Exception as e:
@@ -0,0 +1,296 @@
+from flask import Blueprint, request, jsonify, g
+from functools import wraps
+from google.api_core.exceptions import AlreadyExists, FailedPrecondition
+from config.settings import get_config
+from engine import describe_number
+from engine.draw import DRAW_ALGORITHM, verify_draw
+from routes.payment_routes import require_auth
+from services.auto_caller import AutoCaller
+from services.game_engine_service import game_engine_service
+from services.settlement_service import settlement_service
+from services.tournament_service import tournament_service
+
+game_bp = Blueprint('game', __name__, url_prefix='/api/engine')
+
+MAX_CARDS_PER_REQUEST = 10
+
+# One auto-caller loop per process drives every auto-called room
+auto_caller = AutoCaller.from_config(game_engine_service.call_numbers, get_config())
+
+def require_admin(f):
+    """Admin-only decorator (use after require_auth)"""
+    @wraps(f)
+    def decorated(*args, **kwargs):
+        if not (g.user.get('admin') or g.user.get('uid') in get_config().ADMIN_UIDS):
+            return jsonify({'error': 'Admin access required'}), 403
+        return f(*args, **kwargs)
+    return decorated
+
+@game_bp.route('/rooms', methods=['POST'])
+@require_auth
+@require_admin
+def create_room():
+    """Create an engine-backed game room"""
+    try:
+        data = request.get_json(silent=True) or {}
+        room = game_engine_service.create_room(
+            g.user['uid'],
+            room_id=data.get('roomId'),
+            name=data.get('name'),
+            entry_fee=data.get('entryFee', 0),
+            max_players=data.get('maxPlayers', 50)
+        )
+        return jsonify({'status': 'success', 'room': room.to_dict()}), 201
+    except AlreadyExists:
+        return jsonify({'error': 'Room already exists'}), 409
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@game_bp.route('/rooms/<room_id>', methods=['GET'])
+@require_auth
+def get_room(room_id):
+    """Called numbers, winners and status of a room"""
+    try:
+        room = game_engine_service.get_room(room_id)
+        if room is None:
+            return jsonify({'error': 'Room not found'}), 404
+        return jsonify({'status': 'success', 'room': room.to_dict()}), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@game_bp.route('/rooms/<room_id>/cards', methods=['POST'])
+@require_auth
+def deal_cards(room_id):
+    """Deal cards to the current user"""
+    try:
+        data = request.get_json(silent=True) or {}
+        count = int(data.get('count', 1))
+        if not 1 <= count <= MAX_CARDS_PER_REQUEST:
+            return jsonify({'error': f'count must be between 1 and {MAX_CARDS_PER_REQUEST}'}), 400
+        cards = game_engine_service.deal_cards(room_id, g.user['uid'], count)
+        return jsonify({'status': 'success', 'cards': [card.to_dict() for card in cards]}), 201
+    except KeyError:
+        return jsonify({'error': 'Room not found'}), 404
+    except PermissionError as e:
+        return jsonify({'error': str(e)}), 403
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except FailedPrecondition:
+        return jsonify({'error': 'Room changed, please retry'}), 409
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@game_bp.route('/rooms/<room_id>/cards', methods=['GET'])
+@require_auth
+def get_my_cards(room_id):
+    """Cards the current user holds in a room, with their marks"""
+    try:
+        room = game_engine_service.get_room(room_id)
+        if room is None:
+            return jsonify({'error': 'Room not found'}), 404
+        cards = room.player_cards(g.user['uid'])
+        return jsonify({'status': 'success', 'cards': [card.to_dict() for card in cards]}), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@game_bp.route('/rooms/<room_id>/call', methods=['POST'])
+@require_auth
+@require_admin
+def call_number(room_id):
+    """Call the next number (or a given one) and return any winners"""
+    try:
+        data = request.get_json(silent=True) or {}
+        number = data.get('number')
+        result = game_engine_service.call_number(room_id, int(number) if number is not None else None)
+        result['call'] = describe_number(result['number'])
+        return jsonify({'status': 'success', **result}), 200
+    except KeyError:
+        return jsonify({'error': 'Room not found'}), 404
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except FailedPrecondition:
+        return jsonify({'error': 'Room changed, please retry'}), 409
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@game_bp.route('/rooms/<room_id>/winners', methods=['GET'])
+@require_auth
+def get_winners(room_id):
+    """Winners determined by the server for a room"""
+    try:
+        room = game_engine_service.get_room(room_id)
+        if room is None:
+            return jsonify({'error': 'Room not found'}), 404
+        return jsonify({'status': 'success', 'winners': room.winners, 'finished': room.finished}), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@game_bp.route('/rooms/<room_id>/draw', methods=['GET'])
+@require_auth
+def get_draw(room_id):
+    """Draw commitment; once the game is finished, the revealed seed and its verification"""
+    try:
+        room = game_engine_service.get_room(room_id)
+        if room is None:
+            return jsonify({'error': 'Room not found'}), 404
+        if not room.draw_commitment:
+            return jsonify({'error': 'Room has no committed draw sequence'}), 404
+        draw = {'algorithm': DRAW_ALGORITHM, 'commitment': room.draw_commitment, 'seed': None}
+        if room.finished:
+            draw['seed'] = room.draw_seed.hex()
+            draw['verified'] = verify_draw(draw['seed'], room.draw_commitment, room.called)
+        return jsonify({'status': 'success', 'draw': draw}), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@game_bp.route('/rooms/<room_id>/auto-call', methods=['POST'])
+@require_auth
+@require_admin
+def start_auto_call(room_id):
+    """Start calling numbers in a room on a fixed cadence"""
+    try:
+        if game_engine_service.get_room(room_id) is None:
+            return jsonify({'error': 'Room not found'}), 404
+        data = request.get_json(silent=True) or {}
+        interval_ms = data.get('intervalMs')
+        auto_caller.start_room(room_id, interval=int(interval_ms) / 1000 if interval_ms else None)
+        return jsonify({'status': 'success', 'roomId': room_id}), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@game_bp.route('/rooms/<room_id>/auto-call', methods=['DELETE'])
+@require_auth
+@require_admin
+def stop_auto_call(room_id):
+    """Stop auto-calling a room"""
+    auto_caller.stop_room(room_id)
+    return jsonify({'status': 'success', 'roomId': room_id}), 200
+
+@game_bp.route('/rooms/<room_id>/settle', methods=['POST'])
+@require_auth
+@require_admin
+def settle_room(room_id):
+    """Pay the winners of a completed room from its pot"""
+    try:
+        return jsonify({'status': 'success', 'settlement': settlement_service.settle_room(room_id)}), 200
+    except KeyError:
+        return jsonify({'error': 'Room not found'}), 404
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@game_bp.route('/rooms/<room_id>/cancel', methods=['POST'])
+@require_auth
+@require_admin
+def cancel_room(room_id):
+    """Cancel a room and refund every paid entry"""
+    try:
+        auto_caller.stop_room(room_id)
+        return jsonify({'status': 'success', 'settlement': settlement_service.cancel_room(room_id)}), 200
+    except KeyError:
+        return jsonify({'error': 'Room not found'}), 404
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@game_bp.route('/tournaments', methods=['POST'])
+@require_auth
+@require_admin
+def create_tournament():
+    """Create a tournament split into shard rooms"""
+    try:
+        data = request.get_json(silent=True) or {}
+        shard_count = data.get('shardCount')
+        tournament = tournament_service.create_tournament(
+            g.user['uid'],
+            name=data.get('name'),
+            shard_count=int(shard_count) if shard_count is not None else None,
+            entry_fee=data.get('entryFee', 0),
+            max_players_per_shard=data.get('maxPlayersPerShard', 5000)
+        )
+        return jsonify({'status': 'success', 'tournament': tournament}), 201
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@game_bp.route('/tournaments/<tournament_id>', methods=['GET'])
+@require_auth
+def get_tournament(tournament_id):
+    """Master call stream, winners and per-shard counts of a tournament"""
+    try:
+        return jsonify({'status': 'success', 'tournament': tournament_service.get_tournament(tournament_id)}), 200
+    except KeyError:
+        return jsonify({'error': 'Tournament not found'}), 404
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@game_bp.route('/tournaments/<tournament_id>/join', methods=['POST'])
+@require_auth
+def join_tournament(tournament_id):
+    """Join the current user to their shard of a tournament"""
+    try:
+        room_id, joined = tournament_service.join(tournament_id, {
+            'userId': g.user['uid'],
+            'displayName': g.user.get('name') or 'Player'
+        })
+        return jsonify({'status': 'success', 'roomId': room_id, 'joined': joined}), 201 if joined else 200
+    except KeyError:
+        return jsonify({'error': 'Tournament not found'}), 404
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@game_bp.route('/tournaments/<tournament_id>/cards', methods=['POST'])
+@require_auth
+def deal_tournament_cards(tournament_id):
+    """Deal cards to the current user in their shard room"""
+    try:
+        data = request.get_json(silent=True) or {}
+        count = int(data.get('count', 1))
+        if not 1 <= count <= MAX_CARDS_PER_REQUEST:
+            return jsonify({'error': f'count must be between 1 and {MAX_CARDS_PER_REQUEST}'}), 400
+        room_id, cards = tournament_service.deal_cards(tournament_id, g.user['uid'], count)
+        return jsonify({'status': 'success', 'roomId': room_id, 'cards': [card.to_dict() for card in cards]}), 201
+    except KeyError:
+        return jsonify({'error': 'Tournament not found'}), 404
+    except PermissionError as e:
+        return jsonify({'error': str(e)}), 403
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except FailedPrecondition:
+        return jsonify({'error': 'Room changed, please retry'}), 409
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@game_bp.route('/tournaments/<tournament_id>/call', methods=['POST'])
+@require_auth
+@require_admin
+def call_tournament_number(tournament_id):
+    """Call the next number in every shard and settle any winners"""
+    try:
+        result = tournament_service.call_number(tournament_id)
+        result['call'] = describe_number(result['number'])
+        return jsonify({'status': 'success', **result}), 200
+    except KeyError:
+        return jsonify({'error': 'Tournament not found'}), 404
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except FailedPrecondition:
+        return jsonify({'error': 'Tournament shards changed, please retry'}), 409
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@game_bp.route('/stats', methods=['GET'])
+@require_auth
+@require_admin
+def get_engine_stats():
+    """Auto-caller cadence and jitter, and card pool usage"""
+    card_pool = game_engine_service.card_pool
+    return jsonify({
+        'auto_caller': auto_caller.get_stats(),
+        'card_pool': card_pool.get_stats() if card_pool else None
+    }), 200
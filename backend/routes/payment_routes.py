@@ -1,7 +1,10 @@
 from flask import Blueprint, request, jsonify, g
 from functools import wraps
 from firebase_admin import auth as firebase_auth
+from google.api_core.exceptions import NotFound
 from database.firebase import firebase_manager
+from services.chapa_service import ChapaService
+from services.wallet_service import wallet_service
 
 payment_bp = Blueprint('payment', __name__, url_prefix='/api')
 
@@ -21,6 +24,20 @@ def require_auth(f):
         return f(*args, **kwargs)
     return decorated
 
+def credit_chapa_deposit(db, user_id, amount, tx_ref):
+    """Credit a verified Chapa deposit once; returns False if tx_ref was already applied"""
+    return wallet_service.credit_user_balance(user_id, amount, {
+        'user_id': user_id,
+        'type': 'deposit',
+        'amount': amount,
+        'currency': 'ETB',
+        'tx_ref': tx_ref,
+        'status': 'completed',
+        'created_at': firebase_manager.get_timestamp(),
+        'payment_method': 'chapa',
+        'description': 'Wallet deposit via Chapa'
+    }, idempotency_key=f"chapa_{tx_ref}", db=db)
+
 @payment_bp.route('/wallet/deposit', methods=['POST'])
 @require_auth
 def wallet_deposit():
@@ -63,6 +80,20 @@ def wallet_deposit():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@payment_bp.route('/wallet/balance', methods=['GET'])
+@require_auth
+def get_wallet_balance():
+    """Get the current wallet balance from the ledger"""
+    try:
+        user_id = g.user['uid']
+        db = firebase_manager.get_db()
+        if db is None:
+            return jsonify({'error': 'Firestore DB not initialized'}), 500
+        balance = wallet_service.get_balance(user_id, db)
+        return jsonify({'status': 'success', 'balance': balance or 0, 'currency': 'ETB'}), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
 @payment_bp.route('/payment/verify-and-update', methods=['POST'])
 @require_auth
 def verify_and_update_payment():
@@ -86,33 +117,12 @@ def verify_and_update_payment():
                 db = firebase_manager.get_db()
                 if db is None:
                     return jsonify({'error': 'Firestore DB not initialized'}), 500
-                user_ref = db.collection('users').document(user_id)
-                transaction_ref = db.collection('transactions').document()
-                user_doc = user_ref.get()
-                if user_doc and user_doc.exists:
-                    user_data = user_doc.to_dict() or {}
-                    current_balance = user_data.get('wallet_balance', 0)
-                    new_balance = current_balance + amount
-                    batch = db.batch()
-                    batch.update(user_ref, {
-                        'wallet_balance': new_balance,
-                        'last_updated': firebase_manager.get_timestamp()
-                    })
-                    batch.set(transaction_ref, {
-                        'user_id': user_id,
-                        'type': 'deposit',
-                        'amount': amount,
-                        'currency': 'ETB',
-                        'tx_ref': tx_ref,
-                        'status': 'completed',
-                        'created_at': firebase_manager.get_timestamp(),
-                        'payment_method': 'chapa',
-                        'description': 'Wallet deposit via Chapa'
-                    })
-                    batch.commit()
-                    return jsonify({'status': 'success', 'message': 'Wallet updated', 'new_balance': new_balance}), 200
-                else:
+                try:
+                    credited = credit_chapa_deposit(db, user_id, amount, tx_ref)
+                except NotFound:
                     return jsonify({'error': 'User not found'}), 404
+                message = 'Wallet updated' if credited else 'Payment already processed'
+                return jsonify({'status': 'success', 'message': message, 'amount': amount}), 200
             else:
                 return jsonify({'error': 'Invalid payment data'}), 400
         else:
@@ -146,36 +156,14 @@ def payment_callback():
                 db = firebase_manager.get_db()
                 if db is None:
                     return jsonify({'error': 'Firestore DB not initialized'}), 500
-                user_ref = db.collection('users').document(user_id)
-                transaction_ref = db.collection('transactions').document()
-                user_doc = user_ref.get()
-                if user_doc and user_doc.exists:
-                    user_data = user_doc.to_dict() or {}
-                    current_balance = user_data.get('wallet_balance', 0)
-                    new_balance = current_balance + amount
-                    batch = db.batch()
-                    batch.update(user_ref, {
-                        'wallet_balance': new_balance,
-                        'last_updated': firebase_manager.get_timestamp()
-                    })
-                    batch.set(transaction_ref, {
-                        'user_id': user_id,
-                        'type': 'deposit',
-                        'amount': amount,
-                        'currency': 'ETB',
-                        'tx_ref': tx_ref,
-                        'status': 'completed',
-                        'created_at': firebase_manager.get_timestamp(),
-                        'payment_method': 'chapa',
-                        'description': 'Wallet deposit via Chapa'
-                    })
-                    batch.commit()
-                    return jsonify({
-                        "status": "success",
-                        "message": "Payment processed successfully"
-                    }), 200
-                else:
+                try:
+                    credited = credit_chapa_deposit(db, user_id, amount, tx_ref)
+                except NotFound:
                     return jsonify({"error": "User not found"}), 404
+                return jsonify({
+                    "status": "success",
+                    "message": "Payment processed successfully" if credited else "Payment already processed"
+                }), 200
             else:
                 return jsonify({"error": "Invalid payment data"}), 400
         else:
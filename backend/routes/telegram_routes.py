@@ -3,6 +3,7 @@ from functools import wraps
 from firebase_admin import auth as firebase_auth, firestore
 from services.telegram_service import TelegramService
 from database.firebase import firebase_manager
+from services.user_resolver import user_resolver, stage_identity
 
 telegram_bp = Blueprint('telegram', __name__, url_prefix='/api/telegram')
 
@@ -66,14 +67,8 @@ def telegram_login():
         return jsonify({'error': 'Database unavailable'}), 500
     
     # Try to find user by telegramChatId
-    users = db.collection('users').where('telegramChatId', '==', telegram_id).stream()
-    user_doc = None
-    user_id = None
-    
-    for doc in users:
-        user_doc = doc
-        user_id = doc.id
-        break
+    user = user_resolver.resolve(telegram_id)
+    user_id = user['uid'] if user else None
     
     if not user_id:
         # Create a new user in Firebase Auth and Firestore
@@ -87,13 +82,17 @@ def telegram_login():
             user_record = firebase_auth.get_user(f"tg_{telegram_id}")
         
         user_id = user_record.uid
-        db.collection('users').document(user_id).set({
+        batch = db.batch()
+        batch.set(db.collection('users').document(user_id), {
             'displayName': user_record.display_name,
             'telegramChatId': telegram_id,
             'telegramUsername': username,
             'createdAt': firestore.SERVER_TIMESTAMP,
             'updatedAt': firestore.SERVER_TIMESTAMP
         }, merge=True)
+        stage_identity(batch, db, telegram_id, user_id, user_record.display_name, username)
+        batch.commit()
+        user_resolver.remember(telegram_id, user_id, user_record.display_name)
     
     # Create a Firebase custom token
     custom_token = firebase_auth.create_custom_token(user_id)
@@ -0,0 +1,211 @@
+import asyncio
+import heapq
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+
+# Upper bounds (ms) of the tick jitter histogram buckets
+JITTER_BUCKETS_MS = (1, 2, 5, 10, 25, 50, 100, 250, 1000)
+
+class AutoCaller:
+    """Drives the call cadence of every auto-called room from one asyncio loop
+
+    Rooms sit in a heap keyed by their next due time. The loop wakes once
+    per tick, pops every room that is due and hands them to call_batch as
+    one list, so calls due in the same tick share a single batched
+    Firestore commit. Commits run on a single executor thread, which keeps
+    them ordered and the loop free to keep ticking. Each room is
+    rescheduled from its due time, not from when it fired, so late ticks
+    do not accumulate drift. How late each tick wakes up is recorded in a
+    jitter histogram; a call is at most one tick plus that jitter late.
+
+    call_batch returns None for rooms that are gone or finished, which
+    are dropped, and {'failed': True} for rooms whose call failed. Those
+    are retried with exponential backoff (capped at the interval) and
+    only dropped after max_failures failures in a row.
+    """
+
+    def __init__(self, call_batch: Callable[[List[str]], Dict[str, Optional[Dict[str, Any]]]],
+                 interval: float = 8.0, tick: float = 0.05,
+                 on_result: Optional[Callable[[str, Dict[str, Any]], None]] = None,
+                 max_failures: int = 5, retry_base: float = 0.5):
+        self.call_batch = call_batch
+        self.interval = interval
+        self.tick = tick
+        self.on_result = on_result
+        self.max_failures = max_failures
+        self.retry_base = retry_base
+
+        self._heap = []
+        self._rooms: Dict[str, tuple] = {}
+        self._failures: Dict[str, int] = {}
+        self._sequence = 0
+        self._loop = None
+        self._thread = None
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='auto-caller-commit')
+        self._lock = threading.Lock()
+        self._jitter = [0] * (len(JITTER_BUCKETS_MS) + 1)
+        self._stats = {
+            'ticks': 0, 'calls': 0, 'batches': 0, 'failed_calls': 0, 'retries': 0, 'dropped_rooms': 0,
+            'max_jitter_ms': 0.0, 'max_call_delay_ms': 0.0, 'last_batch_size': 0, 'last_commit_ms': 0.0
+        }
+
+    @classmethod
+    def from_config(cls, call_batch, config, on_result=None) -> 'AutoCaller':
+        """Build an auto-caller from AUTO_CALLER_* settings"""
+        return cls(
+            call_batch,
+            interval=config.AUTO_CALLER_INTERVAL_MS / 1000,
+            tick=config.AUTO_CALLER_TICK_MS / 1000,
+            on_result=on_result,
+            max_failures=config.AUTO_CALLER_MAX_FAILURES
+        )
+
+    def start_room(self, room_id: str, interval: Optional[float] = None, delay: Optional[float] = None):
+        """Start (or re-time) auto-calling a room"""
+        if self._thread is None:
+            self._start()
+        interval = interval or self.interval
+        self._loop.call_soon_threadsafe(self._failures.pop, room_id, None)
+        self._loop.call_soon_threadsafe(self._schedule, room_id, interval,
+                                        self._loop.time() + (interval if delay is None else delay))
+
+    def stop_room(self, room_id: str):
+        """Stop auto-calling a room"""
+        if self._loop:
+            self._loop.call_soon_threadsafe(self._unschedule, room_id)
+
+    def _start(self):
+        with self._lock:
+            if self._thread is None:
+                # Started lazily so each forked gunicorn worker gets its own loop
+                self._loop = asyncio.new_event_loop()
+                self._thread = threading.Thread(target=self._run_loop, name='auto-caller', daemon=True)
+                self._thread.start()
+
+    def _run_loop(self):
+        asyncio.set_event_loop(self._loop)
+        self._loop.run_until_complete(self._run())
+
+    def _schedule(self, room_id: str, interval: float, due: float):
+        # Superseded heap entries are skipped when popped (lazy deletion)
+        self._sequence += 1
+        self._rooms[room_id] = (due, interval)
+        heapq.heappush(self._heap, (due, self._sequence, room_id))
+
+    def _unschedule(self, room_id: str):
+        self._rooms.pop(room_id, None)
+        self._failures.pop(room_id, None)
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        next_tick = loop.time()
+        while True:
+            next_tick += self.tick
+            await asyncio.sleep(max(0.0, next_tick - loop.time()))
+            now = loop.time()
+            self._record_jitter((now - next_tick) * 1000)
+            if now - next_tick > self.tick:
+                # Fell more than a tick behind; resync instead of bursting
+                next_tick = now
+
+            due_rooms = []
+            while self._heap and self._heap[0][0] <= now:
+                due, _, room_id = heapq.heappop(self._heap)
+                entry = self._rooms.get(room_id)
+                if entry is None or entry[0] != due:
+                    continue
+                call_delay_ms = (now - due) * 1000
+                if call_delay_ms > self._stats['max_call_delay_ms']:
+                    self._stats['max_call_delay_ms'] = round(call_delay_ms, 2)
+                due_rooms.append(room_id)
+                self._schedule(room_id, entry[1], due + entry[1])
+
+            with self._lock:
+                self._stats['ticks'] += 1
+            if due_rooms:
+                future = loop.run_in_executor(self._executor, self._commit, due_rooms)
+                future.add_done_callback(self._batch_done)
+
+    def _commit(self, room_ids: List[str]):
+        start = time.perf_counter()
+        try:
+            results = self.call_batch(room_ids)
+        except Exception as e:
+            print(f"Auto-caller batch of {len(room_ids)} rooms failed: {e}")
+            results = {room_id: {'failed': True, 'error': str(e)} for room_id in room_ids}
+        with self._lock:
+            self._stats['batches'] += 1
+            self._stats['last_batch_size'] = len(room_ids)
+            self._stats['last_commit_ms'] = round((time.perf_counter() - start) * 1000, 2)
+        return results
+
+    def _batch_done(self, future):
+        """Runs on the loop: drop rooms that are gone or finished, retry failed calls"""
+        results = future.result()
+        called = 0
+        retried = 0
+        dropped = 0
+        for room_id, result in results.items():
+            if result is not None and result.get('failed'):
+                if self._retry(room_id):
+                    retried += 1
+                else:
+                    dropped += 1
+                continue
+            if result is None or result.get('finished'):
+                self._unschedule(room_id)
+                if result is None:
+                    continue
+            self._failures.pop(room_id, None)
+            called += 1
+            if self.on_result:
+                try:
+                    self.on_result(room_id, result)
+                except Exception as e:
+                    print(f"Auto-caller result handler failed for {room_id}: {e}")
+        with self._lock:
+            self._stats['calls'] += called
+            self._stats['failed_calls'] += retried + dropped
+            self._stats['retries'] += retried
+            self._stats['dropped_rooms'] += dropped
+
+    def _retry(self, room_id: str) -> bool:
+        """Bring a failed room's next call forward with backoff; False once it is dropped"""
+        entry = self._rooms.get(room_id)
+        if entry is None:
+            # Stopped while the call was in flight
+            return True
+        failures = self._failures.get(room_id, 0) + 1
+        if failures >= self.max_failures:
+            print(f"Auto-caller dropping room {room_id} after {failures} failed calls")
+            self._unschedule(room_id)
+            return False
+        self._failures[room_id] = failures
+        due = self._loop.time() + min(entry[1], self.retry_base * (2 ** (failures - 1)))
+        if due < entry[0]:
+            self._schedule(room_id, entry[1], due)
+        return True
+
+    def _record_jitter(self, jitter_ms: float):
+        for index, bound in enumerate(JITTER_BUCKETS_MS):
+            if jitter_ms < bound:
+                break
+        else:
+            index = len(JITTER_BUCKETS_MS)
+        with self._lock:
+            self._jitter[index] += 1
+            self._stats['max_jitter_ms'] = max(self._stats['max_jitter_ms'], round(jitter_ms, 2))
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Active rooms, call counters and the tick wake-up jitter histogram"""
+        with self._lock:
+            labels = [f"<{bound}ms" for bound in JITTER_BUCKETS_MS] + [f">={JITTER_BUCKETS_MS[-1]}ms"]
+            return {
+                'active_rooms': len(self._rooms),
+                'interval_ms': int(self.interval * 1000),
+                'tick_ms': int(self.tick * 1000),
+                'jitter_histogram': dict(zip(labels, self._jitter)),
+                **self._stats
+            }
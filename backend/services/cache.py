@@ -0,0 +1,83 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+
+_MISSING = object()
+
+class TTLCache:
+    """Thread-safe LRU cache whose entries also expire after a fixed TTL"""
+
+    def __init__(self, max_size: int = 10000, ttl: float = 300):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {'hits': 0, 'misses': 0, 'evictions': 0, 'expirations': 0}
+
+    def _lookup(self, key: Hashable, now: float) -> Any:
+        """Return the live value for key or _MISSING (caller holds the lock)"""
+        entry = self._data.get(key)
+        if entry is None:
+            return _MISSING
+        value, expires_at = entry
+        if expires_at <= now:
+            del self._data[key]
+            self._stats['expirations'] += 1
+            return _MISSING
+        return value
+
+    def _store(self, key: Hashable, value: Any, now: float, ttl: Optional[float]):
+        self._data[key] = (value, now + (self.ttl if ttl is None else ttl))
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_size:
+            self._data.popitem(last=False)
+            self._stats['evictions'] += 1
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Get a cached value, refreshing its LRU position"""
+        with self._lock:
+            value = self._lookup(key, time.monotonic())
+            if value is _MISSING:
+                self._stats['misses'] += 1
+                return default
+            self._data.move_to_end(key)
+            self._stats['hits'] += 1
+            return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None):
+        """Store a value, evicting the least recently used entry when full"""
+        with self._lock:
+            self._store(key, value, time.monotonic(), ttl)
+
+    def add(self, key: Hashable, value: Any = True, ttl: Optional[float] = None) -> bool:
+        """Store a value only if the key is absent; returns True if it was added"""
+        with self._lock:
+            now = time.monotonic()
+            if self._lookup(key, now) is not _MISSING:
+                return False
+            self._store(key, value, now, ttl)
+            return True
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        """Remove a key and return its value"""
+        with self._lock:
+            entry = self._data.pop(key, None)
+            return entry[0] if entry is not None else default
+
+    def clear(self):
+        """Remove all entries"""
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Hit/miss counters and current size"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats['size'] = len(self._data)
+        lookups = stats['hits'] + stats['misses']
+        stats['hit_ratio'] = round(stats['hits'] / lookups, 3) if lookups else 0.0
+        return stats
@@ -2,7 +2,8 @@ import requests
 import uuid
 import time
 from typing import Dict, Any, Optional
-from firebase_admin import firestore
+
+from services.wallet_service import wallet_service
 
 class ChapaService:
     """Chapa payment service"""
@@ -103,27 +104,17 @@ class ChapaService:
                 transaction_data = transaction.to_dict()
                 user_id = transaction_data.get('userId')
                 
+                if transaction_data.get('status') == 'completed':
+                    print(f"Payment already processed for tx_ref: {tx_ref}")
+                    return True
+                
                 if user_id:
-                    # Update wallet balance
-                    wallet_ref = db.collection('wallets').document(user_id)
-                    wallet_doc = wallet_ref.get()
-                    
-                    if wallet_doc.exists:
-                        current_balance = wallet_doc.to_dict().get('balance', 0)
-                        new_balance = current_balance + float(amount)
-                        wallet_ref.update({
-                            'balance': new_balance,
-                            'updatedAt': firestore.SERVER_TIMESTAMP
-                        })
-                        
-                        # Update transaction status
-                        transaction.reference.update({
-                            'status': 'completed',
-                            'updatedAt': firestore.SERVER_TIMESTAMP
-                        })
-                        
+                    # Credit the wallet and complete the transaction in one guarded commit
+                    if wallet_service.complete_pending_credit(transaction, float(amount), db=db):
                         print(f"Payment processed successfully for user {user_id}: {amount} ETB")
-                        return True
+                    else:
+                        print(f"Payment already processed for tx_ref: {tx_ref}")
+                    return True
             
             print(f"No transaction found for tx_ref: {tx_ref}")
             return False
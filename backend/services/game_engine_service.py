@@ -0,0 +1,347 @@
+import random
+import threading
+from typing import Any, Dict, List, Optional
+
+from firebase_admin import firestore
+from google.api_core.exceptions import FailedPrecondition
+
+from config.settings import get_config
+from database.firebase import firebase_manager
+from engine import BingoRoom, Card
+from engine.card_pool import CardPool
+from engine.draw import DRAW_ALGORITHM, new_seed
+from engine.encoding import decode_cards, encode_cards
+from services.room_players import lists_players, room_players
+
+# Backend-only: holds draw seeds until they are revealed at game end
+SECRETS_COLLECTION = 'gameRoomSecrets'
+
+class GameEngineService:
+    """Runs engine rooms and persists them to gameRooms/{id}
+
+    Rooms live in memory once loaded. Cards are stored in
+    gameRooms/{id}/cards/{cardId}. Every deal and call bumps the room's
+    engineVersion in a transaction that first checks it against the
+    version this process last saw, so if another process dealt or called
+    first the stale copy is dropped and rebuilt from Firestore instead of
+    diverging. Only engine writes touch engineVersion; joins and other
+    writes to the room document leave the cached room valid.
+
+    With a card pool configured, each room deals consecutive pool cards
+    from a random offset recorded on the room, so cards within a room are
+    distinct and the pool seed plus offset reproduce every deal.
+
+    Only players with a gameRooms/{id}/players/{uid} document (marked
+    entryPaid when the room has an entry fee) are dealt cards, only while
+    the room is waiting, and at most max_cards_per_player each.
+
+    Each room's draw order is fixed at creation from a secret seed kept in
+    gameRoomSecrets; only its SHA-256 commitment is on the room document
+    until the game finishes and the seed is revealed.
+    """
+
+    # Firestore allows 500 writes per batch
+    MAX_BATCH_WRITES = 500
+
+    def __init__(self, firebase_manager, card_pool: Optional[CardPool] = None, players=room_players,
+                 max_cards_per_player: int = 10):
+        self.firebase_manager = firebase_manager
+        self.card_pool = card_pool
+        self.players = players
+        self.max_cards_per_player = max_cards_per_player
+        self._rooms: Dict[str, BingoRoom] = {}
+        self._versions: Dict[str, int] = {}
+        self._room_locks: Dict[str, threading.Lock] = {}
+        self._lock = threading.Lock()
+
+    def _get_db(self):
+        db = self.firebase_manager.get_db()
+        if not db:
+            raise RuntimeError('Firestore DB not initialized')
+        return db
+
+    def _room_ref(self, db, room_id: str):
+        return db.collection('gameRooms').document(room_id)
+
+    def _room_lock(self, room_id: str) -> threading.Lock:
+        with self._lock:
+            return self._room_locks.setdefault(room_id, threading.Lock())
+
+    def create_room(self, created_by: str, room_id: Optional[str] = None, name: Optional[str] = None,
+                    entry_fee: float = 0, max_players: int = 50, draw_seed: Optional[bytes] = None,
+                    fields: Optional[Dict[str, Any]] = None) -> BingoRoom:
+        """Create an engine-backed game room document
+
+        Rooms given the same draw_seed call the same sequence (tournament
+        shards); fields are stored on the room document as well.
+        """
+        db = self._get_db()
+        room_ref = self._room_ref(db, room_id) if room_id else db.collection('gameRooms').document()
+        pool_offset = random.randrange(self.card_pool.count) if self.card_pool else 0
+        room = BingoRoom(room_ref.id, pool_offset=pool_offset, draw_seed=draw_seed or new_seed())
+
+        batch = db.batch()
+        batch.create(room_ref, {
+            'name': name or 'Bingo Game',
+            'status': 'waiting',
+            'playerCount': 0,
+            **({'players': []} if lists_players({'maxPlayers': max_players}) else {}),
+            'createdBy': created_by,
+            'createdAt': firestore.SERVER_TIMESTAMP,
+            'entryFee': entry_fee,
+            'maxPlayers': max_players,
+            'engine': True,
+            'calledNumbers': [],
+            'currentCall': None,
+            'winners': [],
+            'cardCount': 0,
+            'engineVersion': 0,
+            'cardPool': {'seed': self.card_pool.seed, 'offset': pool_offset} if self.card_pool else None,
+            'drawCommitment': room.draw_commitment,
+            'drawAlgorithm': DRAW_ALGORITHM,
+            'drawSeed': None,
+            **(fields or {})
+        })
+        batch.create(db.collection(SECRETS_COLLECTION).document(room_ref.id), {
+            'drawSeed': room.draw_seed,
+            'drawSequence': room.draw_sequence,
+            'createdAt': firestore.SERVER_TIMESTAMP
+        })
+        batch.commit()
+        with self._lock:
+            self._rooms[room.room_id] = room
+            self._versions[room.room_id] = 0
+        return room
+
+    def get_room(self, room_id: str) -> Optional[BingoRoom]:
+        """Room from memory, rebuilt from Firestore on a miss; None if it is not an engine room"""
+        with self._lock:
+            room = self._rooms.get(room_id)
+        if room:
+            return room
+        return self._load_room(room_id)
+
+    def _load_room(self, room_id: str) -> Optional[BingoRoom]:
+        db = self._get_db()
+        room_ref = self._room_ref(db, room_id)
+        snapshot = room_ref.get()
+        data = (snapshot.to_dict() or {}) if snapshot.exists else {}
+        if not data.get('engine'):
+            return None
+
+        draw_seed = None
+        if data.get('drawCommitment'):
+            secret = db.collection(SECRETS_COLLECTION).document(room_id).get()
+            draw_seed = (secret.to_dict() or {}).get('drawSeed') if secret.exists else None
+            if not draw_seed:
+                raise RuntimeError(f'Draw seed missing for room {room_id}')
+        room = BingoRoom(room_id, pool_offset=(data.get('cardPool') or {}).get('offset', 0),
+                         draw_seed=draw_seed)
+        for card_doc in room_ref.collection('cards').order_by('dealtAt').stream():
+            card_data = card_doc.to_dict() or {}
+            numbers = card_data.get('numbers')
+            if card_data.get('card'):
+                numbers = decode_cards(card_data['card'])[0].tolist()
+            room.deal(card_data.get('playerId'), numbers, card_id=card_doc.id)
+        room.replay(data.get('calledNumbers', []))
+        with self._lock:
+            self._rooms[room_id] = room
+            self._versions[room_id] = data.get('engineVersion') or 0
+        return room
+
+    def _evict(self, room_id: str):
+        with self._lock:
+            self._rooms.pop(room_id, None)
+            self._versions.pop(room_id, None)
+
+    def _check_version(self, room_id: str, snapshot) -> Dict[str, Any]:
+        """Room data from a transactional read; drops the cached room and raises FailedPrecondition if another process moved it on"""
+        data = (snapshot.to_dict() or {}) if snapshot.exists else {}
+        if (data.get('engineVersion') or 0) != self._versions.get(room_id):
+            self._evict(room_id)
+            raise FailedPrecondition(f'Room {room_id} was changed by another process')
+        return data
+
+    def _check_deal(self, room: BingoRoom, data: Dict[str, Any], player, player_id: str, count: int):
+        """Raises PermissionError unless the player joined (and paid), ValueError if the deal is not allowed"""
+        if data.get('status') != 'waiting':
+            raise ValueError('Cards can only be dealt before the game starts')
+        if not player.exists:
+            raise PermissionError('Join the room before buying cards')
+        if (data.get('entryFee') or 0) > 0 and not (player.to_dict() or {}).get('entryPaid'):
+            raise PermissionError('Entry fee has not been paid')
+        held = len(room.player_cards(player_id))
+        if held + count > self.max_cards_per_player:
+            raise ValueError(f'At most {self.max_cards_per_player} cards per player ({held} held)')
+
+    def deal_cards(self, room_id: str, player_id: str, count: int = 1) -> List[Card]:
+        """Deal cards to a player and store them under the room
+
+        Raises PermissionError if the player has not joined or paid, and
+        ValueError if the room has started or the card cap is reached.
+        """
+        with self._room_lock(room_id):
+            room = self.get_room(room_id)
+            if room is None:
+                raise KeyError(room_id)
+            db = self._get_db()
+            room_ref = self._room_ref(db, room_id)
+            player_ref = self.players.player_ref(db, room_id, player_id)
+            version = self._versions.get(room_id)
+            dealt = []
+
+            @firestore.transactional
+            def commit(transaction):
+                data = self._check_version(room_id, room_ref.get(transaction=transaction))
+                # On a retry the room already holds this deal
+                self._check_deal(room, data, player_ref.get(transaction=transaction), player_id,
+                                 0 if dealt else count)
+                if not dealt:
+                    # Deal once; a retried transaction writes the same cards
+                    dealt.append(self._deal(room, player_id, count))
+                cards, pool_indexes = dealt[0]
+                # Bumping engineVersion makes other processes reload before their next call
+                transaction.update(room_ref, {'cardCount': firestore.Increment(count),
+                                              'engineVersion': version + 1})
+                for position, card in enumerate(cards):
+                    transaction.create(room_ref.collection('cards').document(card.card_id), {
+                        'playerId': player_id,
+                        'card': encode_cards([card.numbers]),
+                        'poolIndex': int(pool_indexes[position]) if pool_indexes is not None else None,
+                        'dealtAt': firestore.SERVER_TIMESTAMP
+                    })
+                return cards
+
+            try:
+                cards = commit(db.transaction())
+            except Exception:
+                if dealt:
+                    # The in-memory room already holds the cards; rebuild it from what was stored
+                    self._evict(room_id)
+                raise
+            with self._lock:
+                self._versions[room_id] = version + 1
+            return cards
+
+    def _deal(self, room: BingoRoom, player_id: str, count: int):
+        """Deal cards in memory; returns the cards and their pool indexes (None without a pool)"""
+        if not self.card_pool:
+            return [room.deal(player_id) for _ in range(count)], None
+        pool_indexes, block = self.card_pool.take(room.pool_offset + len(room.cards), count)
+        # Pool indexes are distinct within a room, so they double as card IDs
+        cards = room.deal_many(player_id, block,
+                               card_ids=[f"pool_{index}" for index in pool_indexes.tolist()])
+        return cards, pool_indexes
+
+    def _call_update(self, room: BingoRoom, result: Dict[str, Any]) -> Dict[str, Any]:
+        update = {
+            'calledNumbers': list(room.called),
+            'currentCall': result['number'],
+            'lastCallTime': firestore.SERVER_TIMESTAMP,
+            'status': 'completed' if room.finished else 'playing'
+        }
+        if result['winners']:
+            update['winners'] = room.winners
+            update['winnerId'] = result['winners'][0]['playerId']
+            update['winPattern'] = result['winners'][0]['patternName']
+        if room.finished and room.draw_seed:
+            # Reveal the seed so anyone can check it against drawCommitment
+            update['drawSeed'] = room.draw_seed.hex()
+        return update
+
+    def call_number(self, room_id: str, number: Optional[int] = None) -> Dict[str, Any]:
+        """Call the next number and persist it with any winners
+
+        Raises FailedPrecondition if another process changed the room
+        first; the room is reloaded on the next access.
+        """
+        with self._room_lock(room_id):
+            room = self.get_room(room_id)
+            if room is None:
+                raise KeyError(room_id)
+            db = self._get_db()
+            room_ref = self._room_ref(db, room_id)
+            version = self._versions.get(room_id)
+            result = room.call(number)
+            update = {**self._call_update(room, result), 'engineVersion': version + 1}
+
+            @firestore.transactional
+            def commit(transaction):
+                self._check_version(room_id, room_ref.get(transaction=transaction))
+                transaction.update(room_ref, update)
+
+            try:
+                commit(db.transaction())
+            except Exception:
+                self._evict(room_id)
+                raise
+            with self._lock:
+                self._versions[room_id] = version + 1
+            return result
+
+    def call_numbers(self, room_ids: List[str]) -> Dict[str, Optional[Dict[str, Any]]]:
+        """Call the next number in many rooms with one transaction per 500 rooms
+
+        Returns each room's call result, or None if the room is missing or
+        finished. A room that could not be loaded or called, or that another
+        process moved on, gets {'failed': True, 'error': ...} and is reloaded
+        from Firestore on the next access; one failing room never fails the
+        others. A transaction that cannot commit fails all of its rooms.
+        """
+        db = self._get_db()
+        results: Dict[str, Optional[Dict[str, Any]]] = {}
+        staged = []
+        for room_id in room_ids:
+            with self._room_lock(room_id):
+                try:
+                    room = self.get_room(room_id)
+                    if room is None or room.finished:
+                        results[room_id] = None
+                        continue
+                    result = room.call()
+                    update = self._call_update(room, result)
+                except Exception as e:
+                    print(f"Call failed for room {room_id}: {e}")
+                    self._evict(room_id)
+                    results[room_id] = {'failed': True, 'error': str(e)}
+                    continue
+                staged.append((room_id, update, self._versions.get(room_id)))
+                results[room_id] = result
+
+        for start in range(0, len(staged), self.MAX_BATCH_WRITES):
+            chunk = staged[start:start + self.MAX_BATCH_WRITES]
+
+            @firestore.transactional
+            def commit(transaction):
+                snapshots = {snapshot.id: snapshot for snapshot in
+                             transaction.get_all([self._room_ref(db, room_id) for room_id, _, _ in chunk])}
+                stale = []
+                for room_id, update, version in chunk:
+                    snapshot = snapshots.get(room_id)
+                    data = (snapshot.to_dict() or {}) if snapshot and snapshot.exists else {}
+                    if (data.get('engineVersion') or 0) != version:
+                        stale.append(room_id)
+                        continue
+                    transaction.update(self._room_ref(db, room_id), {**update, 'engineVersion': version + 1})
+                return stale
+
+            try:
+                stale = set(commit(db.transaction()))
+            except Exception as e:
+                print(f"Call transaction failed for {len(chunk)} rooms: {e}")
+                for room_id, _, _ in chunk:
+                    self._evict(room_id)
+                    results[room_id] = {'failed': True, 'error': str(e)}
+                continue
+            for room_id in stale:
+                self._evict(room_id)
+                results[room_id] = {'failed': True, 'error': f'Room {room_id} was changed by another process'}
+            with self._lock:
+                for room_id, _, version in chunk:
+                    if room_id not in stale:
+                        self._versions[room_id] = version + 1
+        return results
+
+# Global game engine service instance
+game_engine_service = GameEngineService(firebase_manager, CardPool.from_config(get_config()),
+                                        max_cards_per_player=get_config().ENGINE_MAX_CARDS_PER_PLAYER)
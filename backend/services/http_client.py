@@ -0,0 +1,134 @@
+import random
+import threading
+import time
+from typing import Any, Dict, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+class PooledHttpClient:
+    """Keep-alive HTTP client with connection pooling, timeouts and bounded retries"""
+
+    # Upstream errors worth retrying; 429 is left to the caller so it can honour retry_after
+    RETRY_STATUS_CODES = (500, 502, 503, 504)
+
+    def __init__(self, pool_connections: int = 4, pool_maxsize: int = 20,
+                 connect_timeout: float = 3.05, read_timeout: float = 10.0,
+                 max_retries: int = 2, backoff_base: float = 0.25, backoff_cap: float = 2.0):
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+
+        # Retries are handled here (with jitter) rather than by urllib3
+        self.adapter = HTTPAdapter(
+            pool_connections=pool_connections,
+            pool_maxsize=pool_maxsize,
+            max_retries=0
+        )
+        self.session = requests.Session()
+        self.session.mount('https://', self.adapter)
+        self.session.mount('http://', self.adapter)
+
+        self._lock = threading.Lock()
+        self._stats = {
+            'requests': 0,
+            'retries': 0,
+            'failures': 0,
+            'total_latency_ms': 0.0
+        }
+
+    @classmethod
+    def from_config(cls, config, prefix: str) -> 'PooledHttpClient':
+        """Build a client from `<prefix>_HTTP_*` configuration values"""
+        return cls(
+            pool_maxsize=getattr(config, f'{prefix}_HTTP_POOL_SIZE', 20),
+            connect_timeout=getattr(config, f'{prefix}_HTTP_CONNECT_TIMEOUT', 3.05),
+            read_timeout=getattr(config, f'{prefix}_HTTP_READ_TIMEOUT', 10.0),
+            max_retries=getattr(config, f'{prefix}_HTTP_MAX_RETRIES', 2)
+        )
+
+    def post(self, url: str, json: Optional[Dict[str, Any]] = None,
+             timeout: Optional[float] = None) -> requests.Response:
+        """POST with per-call timeout; retries connection failures and 5xx responses"""
+        return self.request('POST', url, json=json, timeout=timeout)
+
+    def get(self, url: str, timeout: Optional[float] = None, **kwargs) -> requests.Response:
+        """GET with per-call timeout; retries connection failures and 5xx responses"""
+        return self.request('GET', url, timeout=timeout, **kwargs)
+
+    def request(self, method: str, url: str, timeout: Optional[float] = None, **kwargs) -> requests.Response:
+        """Send a request over the pooled session"""
+        timeouts = (self.connect_timeout, timeout or self.read_timeout)
+        attempt = 0
+        while True:
+            started = time.monotonic()
+            try:
+                response = self.session.request(method, url, timeout=timeouts, **kwargs)
+            except requests.exceptions.ConnectionError:
+                # Covers ConnectTimeout; nothing reached the server so retrying is safe
+                self._record(started, failed=attempt >= self.max_retries)
+                if attempt >= self.max_retries:
+                    raise
+            except requests.exceptions.RequestException:
+                # Read timeouts are not retried: the request may already have been applied
+                self._record(started, failed=True)
+                raise
+            else:
+                retryable = response.status_code in self.RETRY_STATUS_CODES
+                self._record(started, failed=retryable and attempt >= self.max_retries)
+                if not retryable or attempt >= self.max_retries:
+                    return response
+                response.close()
+
+            self._sleep_before_retry(attempt)
+            attempt += 1
+
+    def _sleep_before_retry(self, attempt: int):
+        """Exponential backoff with full jitter"""
+        with self._lock:
+            self._stats['retries'] += 1
+        delay = min(self.backoff_cap, self.backoff_base * (2 ** attempt))
+        time.sleep(random.uniform(0, delay))
+
+    def _record(self, started: float, failed: bool = False):
+        elapsed_ms = (time.monotonic() - started) * 1000
+        with self._lock:
+            self._stats['requests'] += 1
+            self._stats['total_latency_ms'] += elapsed_ms
+            if failed:
+                self._stats['failures'] += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Request counters plus per-host connection pool statistics"""
+        with self._lock:
+            stats = dict(self._stats)
+        total_latency_ms = stats.pop('total_latency_ms')
+        stats['avg_latency_ms'] = round(total_latency_ms / stats['requests'], 2) if stats['requests'] else 0.0
+
+        pools = []
+        pool_manager = self.adapter.poolmanager
+        for key in list(pool_manager.pools.keys()):
+            pool = pool_manager.pools.get(key)
+            if pool is None:
+                continue
+            # The pool queue is pre-filled with None placeholders for unopened slots
+            idle = [conn for conn in list(pool.pool.queue) if conn is not None] if pool.pool else []
+            pools.append({
+                'host': pool.host,
+                'connections_opened': pool.num_connections,
+                'requests_sent': pool.num_requests,
+                'idle_connections': len(idle),
+                'max_size': pool.pool.maxsize if pool.pool else 0
+            })
+        stats['pools'] = pools
+
+        opened = sum(p['connections_opened'] for p in pools)
+        sent = sum(p['requests_sent'] for p in pools)
+        stats['connection_reuse_ratio'] = round(1 - opened / sent, 3) if sent else 0.0
+        return stats
+
+    def close(self):
+        """Close all pooled connections"""
+        self.session.close()
@@ -0,0 +1,147 @@
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from firebase_admin import firestore
+
+from database.firebase import firebase_manager
+
+ENTRY_TYPES = ('deposit', 'entry_fee', 'payout', 'refund')
+
+class LedgerService:
+    """Append-only wallet ledger with periodic balance snapshots
+
+    Every balance change is an immutable entry in wallets/{uid}/ledger.
+    Appending creates a new document, so frequent players never contend on
+    a single hot wallet document. wallets/{uid}.balance is the snapshot: a
+    compaction folds uncompacted entries into it inside a transaction. The
+    current balance is the snapshot plus the sum of the short uncompacted
+    tail.
+    """
+
+    # Firestore allows 500 writes per transaction; leave room for the snapshot
+    COMPACT_BATCH_SIZE = 400
+
+    def __init__(self, firebase_manager, compact_interval: float = 10, compact_threshold: int = 50):
+        self.firebase_manager = firebase_manager
+        self.compact_interval = compact_interval
+        self.compact_threshold = compact_threshold
+        self._dirty = set()
+        self._lock = threading.Lock()
+        self._compactor = None
+
+    def _get_db(self, db=None):
+        db = db or self.firebase_manager.get_db()
+        if not db:
+            raise RuntimeError('Firestore DB not initialized')
+        return db
+
+    def _ledger(self, db, user_id: str):
+        return db.collection('wallets').document(user_id).collection('ledger')
+
+    def stage_entry(self, batch, db, user_id: str, entry_type: str, amount: float,
+                    entry_id: Optional[str] = None, reference: Optional[str] = None,
+                    metadata: Optional[Dict[str, Any]] = None):
+        """Add a ledger entry to a batch; amount is signed (debits are negative)
+
+        With an entry_id the entry is written with create(), so committing the
+        same entry twice fails instead of double-counting it.
+        """
+        if entry_type not in ENTRY_TYPES:
+            raise ValueError(f"Unknown ledger entry type: {entry_type}")
+        ledger = self._ledger(db, user_id)
+        entry_ref = ledger.document(entry_id) if entry_id else ledger.document()
+        entry = {
+            'userId': user_id,
+            'type': entry_type,
+            'amount': amount,
+            'currency': 'ETB',
+            'reference': reference,
+            'metadata': metadata or {},
+            'compacted': False,
+            'createdAt': firestore.SERVER_TIMESTAMP
+        }
+        if entry_id:
+            batch.create(entry_ref, entry)
+        else:
+            batch.set(entry_ref, entry)
+        return entry_ref
+
+    def get_balance(self, user_id: str, db=None) -> Optional[float]:
+        """Snapshot balance plus the uncompacted tail; None if the wallet has no history"""
+        db = self._get_db(db)
+        wallet_ref = db.collection('wallets').document(user_id)
+        tail_query = self._ledger(db, user_id).where('compacted', '==', False)
+
+        # Read both in one transaction so a concurrent compaction is never half-seen
+        @firestore.transactional
+        def read(transaction):
+            return wallet_ref.get(transaction=transaction), list(transaction.get(tail_query))
+
+        snapshot, tail = read(db.transaction(read_only=True))
+        if not snapshot.exists and not tail:
+            return None
+
+        balance = (snapshot.to_dict() or {}).get('balance', 0) if snapshot.exists else 0
+        balance += sum((entry.to_dict() or {}).get('amount', 0) for entry in tail)
+        if len(tail) >= self.compact_threshold:
+            self.mark_dirty(user_id)
+        return round(balance, 2)
+
+    def compact(self, user_id: str, db=None) -> int:
+        """Fold uncompacted entries into the wallet snapshot; returns entries folded"""
+        db = self._get_db(db)
+        wallet_ref = db.collection('wallets').document(user_id)
+        tail_query = self._ledger(db, user_id).where('compacted', '==', False).limit(self.COMPACT_BATCH_SIZE)
+
+        @firestore.transactional
+        def fold(transaction):
+            snapshot = wallet_ref.get(transaction=transaction)
+            entries = list(transaction.get(tail_query))
+            if not entries:
+                return 0
+            current = (snapshot.to_dict() or {}).get('balance', 0) if snapshot.exists else 0
+            total = sum((entry.to_dict() or {}).get('amount', 0) for entry in entries)
+            transaction.set(wallet_ref, {
+                'userId': user_id,
+                'balance': round(current + total, 2),
+                'currency': 'ETB',
+                'ledgerEntries': firestore.Increment(len(entries)),
+                'snapshotAt': firestore.SERVER_TIMESTAMP,
+                'updatedAt': firestore.SERVER_TIMESTAMP
+            }, merge=True)
+            for entry in entries:
+                transaction.update(entry.reference, {'compacted': True})
+            return len(entries)
+
+        folded = 0
+        while True:
+            count = fold(db.transaction())
+            folded += count
+            if count < self.COMPACT_BATCH_SIZE:
+                return folded
+
+    def mark_dirty(self, user_id: str):
+        """Queue a wallet for the next periodic compaction"""
+        with self._lock:
+            self._dirty.add(user_id)
+            if self._compactor is None:
+                # Started lazily so each forked gunicorn worker gets its own thread
+                self._compactor = threading.Thread(target=self._run_compactor, name='ledger-compactor', daemon=True)
+                self._compactor.start()
+
+    def _run_compactor(self):
+        while True:
+            time.sleep(self.compact_interval)
+            with self._lock:
+                dirty, self._dirty = self._dirty, set()
+            for user_id in dirty:
+                try:
+                    self.compact(user_id)
+                except Exception as e:
+                    print(f"Ledger compaction failed for {user_id}: {e}")
+                    with self._lock:
+                        self._dirty.add(user_id)
+
+# Global ledger service instance
+ledger_service = LedgerService(firebase_manager)
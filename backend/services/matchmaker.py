@@ -0,0 +1,255 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+from firebase_admin import firestore
+
+from services.room_players import RoomPlayerStore, lists_players, room_player_count
+
+class _JoinTicket:
+    """A player waiting for a room assignment to be committed"""
+
+    def __init__(self, player: Dict[str, Any]):
+        self.player = player
+        self.game_id = None
+        self.done = threading.Event()
+
+    def resolve(self, game_id: Optional[str]):
+        self.game_id = game_id
+        self.done.set()
+
+class Matchmaker:
+    """Assigns /start players to waiting rooms from an in-memory view
+
+    Waiting rooms and their fill counts are kept in memory and refreshed
+    from Firestore periodically. Joins are collected for a short interval
+    and written as player documents plus one playerCount increment per
+    room per batch. Each update runs in a
+    transaction that re-checks capacity, so rooms never overshoot
+    maxPlayers even with several processes; players that do not fit move
+    on to the next room. A new room is opened only once every known
+    waiting room is full.
+    """
+
+    def __init__(self, firebase_manager, max_players: int = 10, batch_interval: float = 0.1,
+                 refresh_interval: float = 30, join_timeout: float = 5):
+        self.firebase_manager = firebase_manager
+        self.room_players = RoomPlayerStore(firebase_manager)
+        self.max_players = max_players
+        self.batch_interval = batch_interval
+        self.refresh_interval = refresh_interval
+        self.join_timeout = join_timeout
+
+        self._rooms: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._pending: Dict[str, List[_JoinTicket]] = {}
+        self._flushing = set()
+        self._refreshed_at = 0.0
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread = None
+        self._stats = {'joins': 0, 'batches': 0, 'rooms_opened': 0, 'overflow': 0, 'failed': 0}
+
+    @classmethod
+    def from_config(cls, firebase_manager, config) -> 'Matchmaker':
+        """Build a matchmaker from MATCHMAKER_* settings"""
+        return cls(
+            firebase_manager,
+            max_players=config.MATCHMAKER_MAX_PLAYERS,
+            batch_interval=config.MATCHMAKER_BATCH_INTERVAL_MS / 1000
+        )
+
+    def join(self, user_id: str, display_name: str, chat_id: Any, telegram_username: str) -> Optional[str]:
+        """Place a player in a waiting room; returns the game ID, or None on failure"""
+        if self._thread is None:
+            self._start()
+        if time.monotonic() - self._refreshed_at > self.refresh_interval:
+            self.refresh()
+
+        ticket = _JoinTicket({
+            'userId': user_id,
+            'displayName': display_name,
+            'telegramChatId': chat_id,
+            'telegramUsername': telegram_username
+        })
+        with self._lock:
+            self._stats['joins'] += 1
+            existing = self._find_member_room(user_id)
+            if existing:
+                return existing
+            self._assign(ticket)
+        self._wakeup.set()
+
+        if not ticket.done.wait(self.join_timeout):
+            return None
+        return ticket.game_id
+
+    def _find_member_room(self, user_id: str) -> Optional[str]:
+        for game_id, room in self._rooms.items():
+            if user_id in room['members']:
+                return game_id
+        return None
+
+    def _assign(self, ticket: _JoinTicket):
+        """Reserve a seat in the first room with space (caller holds the lock)"""
+        for game_id, room in self._rooms.items():
+            if room['count'] < room['maxPlayers']:
+                break
+        else:
+            db = self.firebase_manager.get_db()
+            game_id = db.collection('gameRooms').document().id
+            room = {
+                'count': 0,
+                'maxPlayers': self.max_players,
+                'members': set(),
+                'new': True,
+                'name': f"{ticket.player['displayName']}'s Game"
+            }
+            self._rooms[game_id] = room
+            self._stats['rooms_opened'] += 1
+
+        room['count'] += 1
+        room['members'].add(ticket.player['userId'])
+        self._pending.setdefault(game_id, []).append(ticket)
+
+    def refresh(self):
+        """Reload waiting rooms and their fill counts from Firestore"""
+        db = self.firebase_manager.get_db()
+        if not db:
+            return
+        rooms = OrderedDict()
+        for doc in db.collection('gameRooms').where('status', '==', 'waiting').limit(50).stream():
+            data = doc.to_dict() or {}
+            count = room_player_count(data)
+            max_players = data.get('maxPlayers', self.max_players)
+            if count < max_players:
+                rooms[doc.id] = {
+                    'count': count,
+                    'maxPlayers': max_players,
+                    # Large rooms do not list their players inline; the
+                    # transaction in _add_to_room catches members of those
+                    'members': {p.get('userId') for p in data.get('players') or []},
+                    'new': False,
+                    'name': data.get('name')
+                }
+        with self._lock:
+            # Rooms with seats reserved but not yet written keep their local view
+            for game_id, room in self._rooms.items():
+                if game_id in self._pending or game_id in self._flushing or room['new']:
+                    rooms[game_id] = room
+                    rooms.move_to_end(game_id, last=False)
+            self._rooms = rooms
+            self._refreshed_at = time.monotonic()
+
+    def _start(self):
+        with self._lock:
+            if self._thread is None:
+                # Started lazily so each forked gunicorn worker gets its own thread
+                self._thread = threading.Thread(target=self._run, name='matchmaker', daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            self._wakeup.wait()
+            # Collect joins that arrive within the batch interval
+            time.sleep(self.batch_interval)
+            self._wakeup.clear()
+            self._flush()
+
+    def _flush(self):
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            rooms = {game_id: self._rooms.get(game_id) for game_id in pending}
+            # Joins that arrive while this batch is written must update, not re-create
+            creates = {game_id for game_id, room in rooms.items() if room['new']}
+            for game_id in creates:
+                rooms[game_id]['new'] = False
+            self._flushing = set(pending)
+
+        db = self.firebase_manager.get_db()
+        overflow = []
+        for game_id, tickets in pending.items():
+            room = rooms[game_id]
+            try:
+                if game_id in creates:
+                    self._create_room(db, game_id, room, tickets)
+                    accepted = tickets
+                else:
+                    accepted = self._add_to_room(db, game_id, tickets)
+            except Exception as e:
+                print(f"Matchmaker failed to write room {game_id}: {e}")
+                with self._lock:
+                    self._stats['failed'] += len(tickets)
+                    self._rooms.pop(game_id, None)
+                for ticket in tickets:
+                    ticket.resolve(None)
+                continue
+
+            with self._lock:
+                self._stats['batches'] += 1
+                rejected = [ticket for ticket in tickets if ticket not in accepted]
+                if rejected:
+                    # Another process filled the room first; it is full from our point of view too
+                    room['count'] = room['maxPlayers']
+                    for ticket in rejected:
+                        room['members'].discard(ticket.player['userId'])
+                    self._stats['overflow'] += len(rejected)
+                    overflow.extend(rejected)
+                if room['count'] >= room['maxPlayers']:
+                    self._rooms.pop(game_id, None)
+            for ticket in accepted:
+                ticket.resolve(game_id)
+
+        with self._lock:
+            self._flushing = set()
+        if overflow:
+            with self._lock:
+                for ticket in overflow:
+                    self._assign(ticket)
+            self._wakeup.set()
+
+    def _create_room(self, db, game_id: str, room: Dict[str, Any], tickets: List[_JoinTicket]):
+        batch = db.batch()
+        batch.create(db.collection('gameRooms').document(game_id), {
+            'name': room['name'],
+            'status': 'waiting',
+            'playerCount': len(tickets),
+            **({'players': [ticket.player for ticket in tickets]} if lists_players(room) else {}),
+            'createdAt': firestore.SERVER_TIMESTAMP,
+            'entryFee': 0,
+            'maxPlayers': room['maxPlayers']
+        })
+        self.room_players.stage_joins(batch, db, game_id, [ticket.player for ticket in tickets],
+                                      increment=False, listed=False)
+        batch.commit()
+
+    def _add_to_room(self, db, game_id: str, tickets: List[_JoinTicket]) -> List[_JoinTicket]:
+        """Add as many tickets as still fit, re-checking capacity in a transaction"""
+        game_ref = db.collection('gameRooms').document(game_id)
+        player_refs = [self.room_players.player_ref(db, game_id, t.player['userId']) for t in tickets]
+
+        @firestore.transactional
+        def add(transaction):
+            snapshot = game_ref.get(transaction=transaction)
+            data = (snapshot.to_dict() or {}) if snapshot.exists else {}
+            if data.get('status') != 'waiting':
+                return []
+            joined = {p.get('userId') for p in data.get('players') or []}
+            joined.update(doc.id for doc in transaction.get_all(player_refs) if doc.exists)
+            already_in = [t for t in tickets if t.player['userId'] in joined]
+            seats = data.get('maxPlayers', self.max_players) - room_player_count(data)
+            accepted = [t for t in tickets if t.player['userId'] not in joined][:max(seats, 0)]
+            self.room_players.stage_joins(transaction, db, game_id, [t.player for t in accepted],
+                                          listed=lists_players(data), room_data=data)
+            return already_in + accepted
+
+        return add(db.transaction())
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Waiting rooms known to this process and batching counters"""
+        with self._lock:
+            return {
+                'waiting_rooms': len(self._rooms),
+                'pending_joins': sum(len(tickets) for tickets in self._pending.values()),
+                **self._stats
+            }
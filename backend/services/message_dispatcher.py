@@ -0,0 +1,280 @@
+import heapq
+import itertools
+import threading
+import time
+from collections import deque
+from typing import Any, Dict, Optional
+
+class TokenBucket:
+    """Token bucket rate limiter (not thread-safe; callers hold the dispatcher lock)"""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+
+    def _refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def reserve(self, now: float) -> float:
+        """Take a token if one is available; otherwise return seconds until one is"""
+        if now < self.blocked_until:
+            return self.blocked_until - now
+        self._refill(now)
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+    def block(self, now: float, seconds: float):
+        """Stop handing out tokens for `seconds` (used for Telegram retry_after)"""
+        self.blocked_until = max(self.blocked_until, now + seconds)
+        self.tokens = 0
+        self.updated = now
+
+    def is_idle(self, now: float) -> bool:
+        """True when the bucket is full again and can be discarded"""
+        self._refill(now)
+        return now >= self.blocked_until and self.tokens >= self.capacity
+
+class MessageDispatcher:
+    """Background, rate-limited sender for outbound Telegram messages
+
+    Messages are queued per chat so each chat keeps its order. Chats are
+    served by priority lane, a global token bucket keeps the bot under
+    Telegram's overall limit and a per-chat bucket keeps each chat under
+    its own limit. 429 responses park the chat for `retry_after` seconds.
+    """
+
+    PRIORITY_PAYMENT = 0
+    PRIORITY_DEFAULT = 1
+    PRIORITY_LOW = 2
+
+    def __init__(self, telegram_service, global_rate: float = 30, per_chat_rate: float = 1,
+                 per_chat_burst: float = 3, workers: int = 4, max_queue_size: int = 10000,
+                 max_attempts: int = 5):
+        self.telegram_service = telegram_service
+        self.per_chat_rate = per_chat_rate
+        self.per_chat_burst = per_chat_burst
+        self.worker_count = workers
+        self.max_queue_size = max_queue_size
+        self.max_attempts = max_attempts
+
+        self._global_bucket = TokenBucket(global_rate, global_rate)
+        self._chat_buckets: Dict[str, TokenBucket] = {}
+        self._pending: Dict[str, deque] = {}
+        self._ready = []      # (priority, seq, chat_key) for chats that can be served now
+        self._deferred = []   # (ready_at, seq, chat_key) for chats waiting on a limit
+        self._scheduled = set()
+        self._seq = itertools.count()
+        self._size = 0
+
+        self._cond = threading.Condition()
+        self._threads = []
+        self._running = False
+        self._stats = {
+            'enqueued': 0,
+            'sent': 0,
+            'failed': 0,
+            'dropped': 0,
+            'rate_limited': 0,
+            'deferred': 0
+        }
+
+    @classmethod
+    def from_config(cls, telegram_service, config) -> 'MessageDispatcher':
+        """Build a dispatcher from TELEGRAM_* rate limit settings"""
+        return cls(
+            telegram_service,
+            global_rate=config.TELEGRAM_GLOBAL_RATE,
+            per_chat_rate=config.TELEGRAM_PER_CHAT_RATE,
+            workers=config.TELEGRAM_DISPATCH_WORKERS,
+            max_queue_size=config.TELEGRAM_DISPATCH_QUEUE_SIZE
+        )
+
+    def start(self):
+        """Start the sender threads"""
+        with self._cond:
+            if self._running:
+                return
+            self._running = True
+            for i in range(self.worker_count):
+                thread = threading.Thread(target=self._run, name=f'telegram-dispatch-{i}', daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def stop(self, timeout: float = 5.0):
+        """Stop the sender threads; queued messages are kept"""
+        with self._cond:
+            self._running = False
+            self._cond.notify_all()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+
+    def enqueue(self, chat_id, text: str, priority: int = PRIORITY_DEFAULT,
+                parse_mode: str = 'HTML') -> bool:
+        """Queue a message for delivery; returns False if it was dropped"""
+        if not self._running:
+            # Started lazily so each forked gunicorn worker gets its own threads
+            self.start()
+
+        chat_key = str(chat_id)
+        with self._cond:
+            # Payment confirmations are never shed under load
+            if self._size >= self.max_queue_size and priority != self.PRIORITY_PAYMENT:
+                self._stats['dropped'] += 1
+                print(f"Telegram dispatch queue full, dropping message to chat {chat_key}")
+                return False
+
+            message = {
+                'chat_id': chat_id,
+                'text': text,
+                'parse_mode': parse_mode,
+                'priority': priority,
+                'attempts': 0,
+                'seq': next(self._seq)
+            }
+            queue = self._pending.setdefault(chat_key, deque())
+            queue.append(message)
+            self._size += 1
+            self._stats['enqueued'] += 1
+
+            if chat_key not in self._scheduled:
+                self._schedule_ready(chat_key)
+            self._cond.notify()
+        return True
+
+    def _schedule_ready(self, chat_key: str):
+        head = self._pending[chat_key][0]
+        heapq.heappush(self._ready, (head['priority'], head['seq'], chat_key))
+        self._scheduled.add(chat_key)
+
+    def _schedule_later(self, chat_key: str, delay: float):
+        heapq.heappush(self._deferred, (time.monotonic() + delay, next(self._seq), chat_key))
+        self._scheduled.add(chat_key)
+        self._stats['deferred'] += 1
+
+    def _next_chat(self) -> Optional[str]:
+        """Block until a chat is ready to be served (caller holds the lock)"""
+        while self._running:
+            now = time.monotonic()
+            while self._deferred and self._deferred[0][0] <= now:
+                _, _, chat_key = heapq.heappop(self._deferred)
+                self._scheduled.discard(chat_key)
+                if self._pending.get(chat_key):
+                    self._schedule_ready(chat_key)
+
+            if self._ready:
+                _, _, chat_key = heapq.heappop(self._ready)
+                return chat_key
+
+            timeout = self._deferred[0][0] - now if self._deferred else None
+            self._cond.wait(timeout)
+        return None
+
+    def _run(self):
+        while True:
+            with self._cond:
+                chat_key = self._next_chat()
+                if chat_key is None:
+                    return
+                # The chat stays in _scheduled while in flight so no other worker takes it
+                now = time.monotonic()
+                bucket = self._chat_buckets.get(chat_key)
+                if bucket is None:
+                    bucket = TokenBucket(self.per_chat_rate, self.per_chat_burst)
+                    self._chat_buckets[chat_key] = bucket
+                wait = bucket.reserve(now)
+                if wait > 0:
+                    self._scheduled.discard(chat_key)
+                    self._schedule_later(chat_key, wait)
+                    continue
+                message = self._pending[chat_key][0]
+
+            self._acquire_global()
+            result = self._send(message)
+
+            with self._cond:
+                self._complete(chat_key, message, result)
+
+    def _acquire_global(self):
+        while True:
+            with self._cond:
+                wait = self._global_bucket.reserve(time.monotonic())
+            if wait <= 0:
+                return
+            time.sleep(wait)
+
+    def _send(self, message: Dict[str, Any]) -> Dict[str, Any]:
+        try:
+            return self.telegram_service.send_message_result(
+                message['chat_id'], message['text'], message['parse_mode']
+            )
+        except Exception as e:
+            # Unknown failure: the message may have gone out, so don't resend it
+            print(f"Failed to send Telegram message: {e}")
+            return {'ok': False, 'transient': False, 'description': str(e)}
+
+    def _complete(self, chat_key: str, message: Dict[str, Any], result: Dict[str, Any]):
+        """Record a send result and reschedule the chat (caller holds the lock)"""
+        now = time.monotonic()
+        self._scheduled.discard(chat_key)
+        message['attempts'] += 1
+        retry_after = (result.get('parameters') or {}).get('retry_after')
+        delay = 0.0
+
+        if result.get('ok'):
+            self._stats['sent'] += 1
+            self._pop_head(chat_key)
+        elif retry_after or result.get('error_code') == 429:
+            self._stats['rate_limited'] += 1
+            delay = float(retry_after or 1)
+            self._chat_buckets[chat_key].block(now, delay)
+        elif result.get('transient') and message['attempts'] < self.max_attempts:
+            delay = min(30.0, 0.5 * (2 ** message['attempts']))
+        else:
+            self._stats['failed'] += 1
+            print(f"Giving up on Telegram message to chat {chat_key}: {result.get('description', result)}")
+            self._pop_head(chat_key)
+
+        if self._pending.get(chat_key):
+            if delay:
+                self._schedule_later(chat_key, delay)
+            else:
+                self._schedule_ready(chat_key)
+            self._cond.notify()
+        else:
+            self._pending.pop(chat_key, None)
+            self._prune_buckets(now)
+
+    def _pop_head(self, chat_key: str):
+        self._pending[chat_key].popleft()
+        self._size -= 1
+
+    def _prune_buckets(self, now: float):
+        if len(self._chat_buckets) <= 4 * self.max_queue_size:
+            return
+        for chat_key in list(self._chat_buckets):
+            if chat_key not in self._pending and self._chat_buckets[chat_key].is_idle(now):
+                del self._chat_buckets[chat_key]
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Queue depth and delivery counters"""
+        with self._cond:
+            lanes = {'payment': 0, 'default': 0, 'low': 0}
+            names = {self.PRIORITY_PAYMENT: 'payment', self.PRIORITY_DEFAULT: 'default', self.PRIORITY_LOW: 'low'}
+            for queue in self._pending.values():
+                for message in queue:
+                    lanes[names.get(message['priority'], 'low')] += 1
+            return {
+                'running': self._running,
+                'queued': self._size,
+                'queued_by_priority': lanes,
+                'chats_pending': len(self._pending),
+                'chats_rate_limited': len(self._deferred),
+                **self._stats
+            }
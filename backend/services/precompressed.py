@@ -0,0 +1,35 @@
+import gzip
+import hashlib
+import json
+from typing import Any, Optional
+
+try:
+    import brotli
+except ImportError:  # Brotli is optional; gzip is always available
+    brotli = None
+
+class PrecompressedPayload:
+    """A JSON payload serialized and compressed once, with a content-hash ETag
+
+    Holds the identity body plus gzip and (if the brotli package is
+    installed) brotli encodings, so serving it is a dictionary lookup.
+    """
+
+    __slots__ = ('body', 'encodings', 'etag')
+
+    def __init__(self, payload: Any):
+        self.body = json.dumps(payload, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+        self.etag = hashlib.sha256(self.body).hexdigest()[:32]
+        self.encodings = {'gzip': gzip.compress(self.body, compresslevel=9, mtime=0)}
+        if brotli is not None:
+            self.encodings['br'] = brotli.compress(self.body, quality=11)
+
+    def select(self, accept_encodings) -> Optional[str]:
+        """Best encoding the client accepts (smallest first), or None for identity
+
+        accept_encodings is Werkzeug's request.accept_encodings.
+        """
+        for encoding in sorted(self.encodings, key=lambda name: len(self.encodings[name])):
+            if accept_encodings[encoding]:
+                return encoding
+        return None
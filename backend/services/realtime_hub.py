@@ -0,0 +1,251 @@
+import asyncio
+import json
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from aiohttp import web
+
+class Subscriber:
+    """One SSE connection: a bounded queue of encoded frames
+
+    When a slow client lets its queue fill up, the backlog is replaced by
+    a single snapshot of the current room state instead of blocking the
+    room's fan-out. A client that keeps overflowing is disconnected.
+    """
+
+    def __init__(self, room_id: str, max_queue: int, max_overflows: int):
+        self.room_id = room_id
+        self.queue: asyncio.Queue = asyncio.Queue(max_queue)
+        self.max_overflows = max_overflows
+        self.overflows = 0
+        self.closed = False
+
+    def push(self, frames: List[bytes], snapshot: Callable[[], bytes]) -> bool:
+        """Queue frames; returns False if the subscriber overflowed"""
+        try:
+            for frame in frames:
+                self.queue.put_nowait(frame)
+            return True
+        except asyncio.QueueFull:
+            self.overflows += 1
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            if self.overflows > self.max_overflows:
+                self.close()
+            else:
+                self.queue.put_nowait(snapshot())
+            return False
+
+    def close(self):
+        self.closed = True
+        while not self.queue.empty():
+            self.queue.get_nowait()
+        # Wakes the connection handler so it can finish
+        self.queue.put_nowait(b'')
+
+class _RoomChannel:
+    def __init__(self, room_id: str):
+        self.room_id = room_id
+        self.state: Optional[Dict[str, Any]] = None
+        self.subscribers = set()
+        self.unsubscribe = None
+        self.event_id = 0
+
+def compact_room(data: Dict[str, Any]) -> Dict[str, Any]:
+    """The room fields clients render, without timestamps or private fields"""
+    players = data.get('players') or []
+    return {
+        'status': data.get('status'),
+        'currentCall': data.get('currentCall'),
+        'calledNumbers': list(data.get('calledNumbers') or []),
+        'players': [{'userId': p.get('userId'), 'displayName': p.get('displayName')} for p in players],
+        'playerCount': data.get('playerCount', len(players)),
+        'winners': list(data.get('winners') or [])
+    }
+
+STATUS_EVENTS = {'playing': 'game_start', 'completed': 'game_end'}
+
+def room_events(old: Optional[Dict[str, Any]], new: Dict[str, Any]) -> List[Tuple[str, Any]]:
+    """Deltas between two compact room states, named like the frontend WebSocket message types"""
+    if old is None:
+        return [('snapshot', new)]
+    events = []
+    old_called, new_called = old['calledNumbers'], new['calledNumbers']
+    if new_called[:len(old_called)] != old_called:
+        # History was rewritten (e.g. a reset); deltas cannot express that
+        return [('snapshot', new)]
+    for index in range(len(old_called), len(new_called)):
+        events.append(('number_call', {'number': new_called[index], 'callIndex': index + 1}))
+
+    old_players = {p['userId'] for p in old['players']}
+    new_players = {p['userId'] for p in new['players']}
+    for player in new['players']:
+        if player['userId'] not in old_players:
+            events.append(('player_join', player))
+    for user_id in old_players - new_players:
+        events.append(('player_leave', {'userId': user_id}))
+    if new['playerCount'] != old['playerCount'] and old_players == new_players:
+        events.append(('player_count', {'playerCount': new['playerCount']}))
+
+    for winner in new['winners'][len(old['winners']):]:
+        events.append(('pattern_complete', winner))
+    if new['status'] != old['status']:
+        events.append((STATUS_EVENTS.get(new['status'], 'status'), {'status': new['status']}))
+    return events
+
+def format_sse(event_id: int, event: str, payload: Any) -> bytes:
+    data = json.dumps(payload, separators=(',', ':'), default=str)
+    return f"id: {event_id}\nevent: {event}\ndata: {data}\n\n".encode()
+
+class FirestoreRoomSource:
+    """Room state from one Firestore snapshot listener per room"""
+
+    def __init__(self, firebase_manager):
+        self.firebase_manager = firebase_manager
+
+    def subscribe(self, room_id: str, on_state: Callable[[Optional[Dict[str, Any]]], None]):
+        """Listen to gameRooms/{room_id}; returns an unsubscribe callable"""
+        def on_snapshot(snapshots, changes, read_time):
+            for snapshot in snapshots:
+                on_state(snapshot.to_dict() if snapshot.exists else None)
+
+        watch = self.firebase_manager.get_db().collection('gameRooms').document(room_id).on_snapshot(on_snapshot)
+        return watch.unsubscribe
+
+class RealtimeHub:
+    """Fans room updates out to SSE connections with one source subscription per room
+
+    The first connection to a room subscribes to its source; later ones
+    share it, and the last one to leave unsubscribes. Each update is
+    diffed against the previous state, encoded once, and pushed to every
+    connection's bounded queue. Runs on a single asyncio loop; sources may
+    deliver updates from any thread.
+    """
+
+    def __init__(self, source, queue_size: int = 64, max_overflows: int = 3):
+        self.source = source
+        self.queue_size = queue_size
+        self.max_overflows = max_overflows
+        self._channels: Dict[str, _RoomChannel] = {}
+        self._loop = None
+        self._stats = {'connections_opened': 0, 'events': 0, 'frames_sent': 0,
+                       'resyncs': 0, 'disconnected_slow': 0}
+
+    def subscribe(self, room_id: str) -> Subscriber:
+        """Register a connection (call on the hub's loop)"""
+        self._loop = self._loop or asyncio.get_running_loop()
+        subscriber = Subscriber(room_id, self.queue_size, self.max_overflows)
+        channel = self._channels.get(room_id)
+        if channel is None:
+            channel = self._channels[room_id] = _RoomChannel(room_id)
+            channel.unsubscribe = self.source.subscribe(
+                room_id, lambda data: self._loop.call_soon_threadsafe(self._on_state, room_id, data))
+        elif channel.state is not None:
+            subscriber.push([self._snapshot(channel)], lambda: self._snapshot(channel))
+        channel.subscribers.add(subscriber)
+        self._stats['connections_opened'] += 1
+        return subscriber
+
+    def unsubscribe(self, subscriber: Subscriber):
+        channel = self._channels.get(subscriber.room_id)
+        if channel is None:
+            return
+        channel.subscribers.discard(subscriber)
+        if not channel.subscribers:
+            del self._channels[subscriber.room_id]
+            if channel.unsubscribe:
+                try:
+                    channel.unsubscribe()
+                except Exception as e:
+                    print(f"Realtime unsubscribe failed for {subscriber.room_id}: {e}")
+
+    def _snapshot(self, channel: _RoomChannel) -> bytes:
+        return format_sse(channel.event_id, 'snapshot', channel.state)
+
+    def _on_state(self, room_id: str, data: Optional[Dict[str, Any]]):
+        channel = self._channels.get(room_id)
+        if channel is None:
+            return
+        if data is None:
+            events = [('room_deleted', {})]
+        else:
+            new_state = compact_room(data)
+            events = room_events(channel.state, new_state)
+            channel.state = new_state
+        if not events:
+            return
+
+        frames = []
+        for event, payload in events:
+            channel.event_id += 1
+            frames.append(format_sse(channel.event_id, event, payload))
+        self._stats['events'] += len(events)
+        for subscriber in list(channel.subscribers):
+            if subscriber.push(frames, lambda: self._snapshot(channel)):
+                self._stats['frames_sent'] += len(frames)
+            elif subscriber.closed:
+                self._stats['disconnected_slow'] += 1
+                self.unsubscribe(subscriber)
+            else:
+                self._stats['resyncs'] += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            'rooms': len(self._channels),
+            'connections': sum(len(channel.subscribers) for channel in self._channels.values()),
+            **self._stats
+        }
+
+def create_app(hub: RealtimeHub, verify_token: Optional[Callable[[str], Any]] = None,
+               heartbeat: float = 15, allowed_origins: Optional[List[str]] = None) -> web.Application:
+    """aiohttp app serving GET /api/realtime/rooms/{room_id}/events as Server-Sent Events
+
+    EventSource cannot send headers, so the Firebase ID token is passed as
+    ?token=...; verify_token runs on the executor and should raise if the
+    token is invalid. Without verify_token the stream is public.
+    """
+    async def room_events_handler(request: web.Request):
+        if verify_token:
+            token = request.query.get('token', '')
+            try:
+                await asyncio.get_running_loop().run_in_executor(None, verify_token, token)
+            except Exception:
+                return web.json_response({'error': 'Invalid or expired token'}, status=401)
+
+        origin = request.headers.get('Origin')
+        headers = {
+            'Content-Type': 'text/event-stream',
+            'Cache-Control': 'no-cache',
+            'X-Accel-Buffering': 'no'
+        }
+        if origin and (allowed_origins is None or origin in allowed_origins):
+            headers['Access-Control-Allow-Origin'] = origin
+        response = web.StreamResponse(headers=headers)
+        await response.prepare(request)
+
+        subscriber = hub.subscribe(request.match_info['room_id'])
+        try:
+            while not subscriber.closed:
+                try:
+                    frame = await asyncio.wait_for(subscriber.queue.get(), heartbeat)
+                except asyncio.TimeoutError:
+                    frame = b': ping\n\n'
+                if frame:
+                    await response.write(frame)
+        except ConnectionResetError:
+            pass
+        finally:
+            hub.unsubscribe(subscriber)
+        return response
+
+    async def stats_handler(request: web.Request):
+        return web.json_response({'realtime': hub.get_stats(), 'timestamp': time.time()})
+
+    async def health_handler(request: web.Request):
+        return web.json_response({'status': 'healthy'})
+
+    app = web.Application()
+    app.router.add_get('/api/realtime/rooms/{room_id}/events', room_events_handler)
+    app.router.add_get('/api/realtime/stats', stats_handler)
+    app.router.add_get('/health', health_handler)
+    return app
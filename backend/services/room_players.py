@@ -0,0 +1,124 @@
+from typing import Any, Dict, List, Optional
+
+from firebase_admin import firestore
+from google.api_core.exceptions import AlreadyExists
+
+from database.firebase import firebase_manager
+
+PLAYERS_COLLECTION = 'players'
+
+# Rooms up to this size also keep the players array on the room document
+PLAYERS_ARRAY_LIMIT = 100
+
+class RoomPlayerStore:
+    """Players of a game room as gameRooms/{id}/players/{uid} documents
+
+    A join creates the player's own document and increments the room's
+    denormalised playerCount in the same commit. create() makes a
+    repeated join fail as a whole, so the counter is never incremented
+    twice.
+
+    Rooms created before the counter have no playerCount, and an
+    Increment on a missing field starts from zero. Their first join
+    seeds the count from the players array instead: transactions pass
+    the room data they read to stage_joins, and batched joins run
+    seed_player_count first.
+
+    Rooms small enough to list their players inline (see lists_players)
+    also get the player added to the room's players array, which the
+    realtime hub and the frontend read. Large rooms such as tournament
+    shards skip it, so their room document does not grow with every
+    player.
+    """
+
+    def __init__(self, firebase_manager):
+        self.firebase_manager = firebase_manager
+
+    def _get_db(self, db=None):
+        db = db or self.firebase_manager.get_db()
+        if not db:
+            raise RuntimeError('Firestore DB not initialized')
+        return db
+
+    def player_ref(self, db, game_id: str, user_id: str):
+        return db.collection('gameRooms').document(game_id).collection(PLAYERS_COLLECTION).document(user_id)
+
+    def stage_joins(self, writer, db, game_id: str, players: List[Dict[str, Any]], increment: bool = True,
+                    listed: bool = True, room_data: Optional[Dict[str, Any]] = None):
+        """Add player documents (and the counter and players array updates) to a batch or transaction
+
+        room_data is the room as read in the same transaction; without a
+        playerCount the counter is set from the players array rather than
+        incremented.
+        """
+        for player in players:
+            writer.create(self.player_ref(db, game_id, player['userId']), {
+                **player,
+                'joinedAt': firestore.SERVER_TIMESTAMP
+            })
+        room_update = {}
+        if increment and players:
+            if room_data is not None and 'playerCount' not in room_data:
+                room_update['playerCount'] = room_player_count(room_data) + len(players)
+            else:
+                room_update['playerCount'] = firestore.Increment(len(players))
+        if listed and players:
+            room_update['players'] = firestore.ArrayUnion(list(players))
+        if room_update:
+            writer.update(db.collection('gameRooms').document(game_id), room_update)
+
+    def seed_player_count(self, db, game_id: str, room_data: Optional[Dict[str, Any]] = None):
+        """Give a room created before the counter a playerCount from its players array
+
+        Run before a batched join. room_data, if given, skips the
+        transaction for rooms that already have the counter.
+        """
+        if room_data is not None and 'playerCount' in room_data:
+            return
+        room_ref = db.collection('gameRooms').document(game_id)
+
+        @firestore.transactional
+        def seed(transaction):
+            snapshot = room_ref.get(transaction=transaction)
+            data = (snapshot.to_dict() or {}) if snapshot.exists else {}
+            if snapshot.exists and 'playerCount' not in data:
+                transaction.update(room_ref, {'playerCount': room_player_count(data)})
+
+        seed(db.transaction())
+
+    def join(self, game_id: str, player: Dict[str, Any], db=None, listed: bool = True,
+             room_data: Optional[Dict[str, Any]] = None) -> bool:
+        """Add a player to a room; returns False if they had already joined"""
+        db = self._get_db(db)
+        self.seed_player_count(db, game_id, room_data)
+        batch = db.batch()
+        self.stage_joins(batch, db, game_id, [player], listed=listed)
+        try:
+            batch.commit()
+        except AlreadyExists:
+            return False
+        return True
+
+    def is_member(self, game_id: str, user_id: str, db=None) -> bool:
+        return self.player_ref(self._get_db(db), game_id, user_id).get().exists
+
+    def list_players(self, game_id: str, limit: Optional[int] = None, db=None) -> List[Dict[str, Any]]:
+        """Players in join order"""
+        db = self._get_db(db)
+        query = db.collection('gameRooms').document(game_id).collection(PLAYERS_COLLECTION).order_by('joinedAt')
+        if limit:
+            query = query.limit(limit)
+        return [doc.to_dict() for doc in query.stream()]
+
+def lists_players(room_data: Dict[str, Any]) -> bool:
+    """Whether a room keeps its players array alongside the subcollection"""
+    return (room_data.get('maxPlayers') or 0) <= PLAYERS_ARRAY_LIMIT
+
+def room_player_count(room_data: Dict[str, Any]) -> int:
+    """playerCount, falling back to the players array of rooms created before the counter"""
+    if 'playerCount' in room_data:
+        return room_data['playerCount']
+    return len(room_data.get('players') or [])
+
+# Global room player store instance
+room_players = RoomPlayerStore(firebase_manager)
@@ -0,0 +1,192 @@
+import math
+import threading
+from collections import Counter
+from typing import Any, Dict, List, Tuple
+
+from firebase_admin import firestore
+from google.api_core.exceptions import FailedPrecondition
+from google.cloud.firestore_v1.bulk_writer import BulkWriterOptions
+from google.rpc import code_pb2
+
+from config.settings import get_config
+from database.firebase import firebase_manager
+from services.ledger_service import ledger_service
+
+def to_cents(amount: float) -> int:
+    return int(round(amount * 100))
+
+def split_pot(prize_cents: int, winners: List[Dict[str, Any]]) -> Dict[str, int]:
+    """Payout per player in cents
+
+    Each winning card is entitled to its pattern's winPercentage of the
+    prize. If the entitlements add up to more than the prize (several
+    winners on the same call) they are scaled down pro rata. Amounts are
+    rounded down, so the total never exceeds the prize; what is left stays
+    with the house.
+    """
+    shares = Counter()
+    for winner in winners:
+        shares[winner['playerId']] += winner.get('winPercentage', 1.0)
+    total_share = sum(shares.values())
+    if not total_share:
+        return {}
+    scale = min(1.0, 1.0 / total_share)
+    return {player_id: math.floor(prize_cents * share * scale) for player_id, share in shares.items()}
+
+class SettlementService:
+    """Pays out finished rooms and refunds cancelled ones through the wallet ledger
+
+    The pot is the sum of paid entries recorded on the room's player
+    documents. Settling pays the winners who are paid entrants from the
+    pot less the house cut; if the room has a pot but none of its winners
+    paid to enter, it is held for review (settlement 'review') instead of
+    paid out. Cancelling refunds every paid entry. Ledger entries are keyed
+    payout_{roomId} / refund_{roomId} and written with create() through a
+    BulkWriter, so a settlement that is retried only writes the entries
+    still missing. settlements/{roomId} records the outcome.
+    """
+
+    # BatchWrite accepts up to 500 writes; the client's default batch of 20
+    # would take 250 round trips for a 5k-player room instead of 10
+    BULK_BATCH_SIZE = 500
+
+    def __init__(self, firebase_manager, ledger, house_cut: float = 0.10, ops_per_second: int = 500):
+        self.firebase_manager = firebase_manager
+        self.ledger = ledger
+        self.house_cut = house_cut
+        self.ops_per_second = ops_per_second
+
+    @classmethod
+    def from_config(cls, firebase_manager, ledger, config) -> 'SettlementService':
+        """Build the service from SETTLEMENT_* settings"""
+        return cls(firebase_manager, ledger,
+                   house_cut=config.SETTLEMENT_HOUSE_CUT,
+                   ops_per_second=config.SETTLEMENT_OPS_PER_SECOND)
+
+    def _get_db(self):
+        db = self.firebase_manager.get_db()
+        if not db:
+            raise RuntimeError('Firestore DB not initialized')
+        return db
+
+    def _paid_entries(self, db, room_ref, room_data: Dict[str, Any]) -> Dict[str, int]:
+        """Entry fee paid per player in cents, from the players subcollection and any legacy array"""
+        players = list(room_data.get('players') or [])
+        players.extend(doc.to_dict() or {} for doc in room_ref.collection('players').stream())
+        paid = {}
+        for player in players:
+            if player.get('entryPaid') and player.get('userId'):
+                paid[player['userId']] = to_cents(player.get('entryAmount') or 0)
+        return paid
+
+    def _write_entries(self, db, room_id: str, entry_type: str, amounts: Dict[str, int]) -> Tuple[int, int]:
+        """Create one ledger entry per player; returns (written, already present)"""
+        counts = Counter()
+        lock = threading.Lock()
+
+        def on_result(reference, result, writer):
+            with lock:
+                counts['written'] += 1
+
+        def on_error(failure, writer):
+            if failure.code == code_pb2.ALREADY_EXISTS:
+                with lock:
+                    counts['already_present'] += 1
+                return False
+            return failure.attempts < 10
+
+        writer = db.bulk_writer(options=BulkWriterOptions(initial_ops_per_second=self.ops_per_second,
+                                                          max_ops_per_second=self.ops_per_second))
+        writer.batch_size = self.BULK_BATCH_SIZE
+        writer.on_write_result(on_result)
+        writer.on_write_error(on_error)
+        for user_id, cents in amounts.items():
+            if cents > 0:
+                self.ledger.stage_entry(writer, db, user_id, entry_type, cents / 100,
+                                        entry_id=f"{entry_type}_{room_id}", reference=room_id,
+                                        metadata={'gameId': room_id})
+        writer.close()
+        failed = sum(1 for cents in amounts.values() if cents > 0) - counts['written'] - counts['already_present']
+        if failed:
+            raise RuntimeError(f'{failed} {entry_type} entries for room {room_id} were not written; retry the settlement')
+        return counts['written'], counts['already_present']
+
+    def _record(self, db, room_id: str, summary: Dict[str, Any]):
+        db.collection('settlements').document(room_id).set({
+            **summary,
+            'settledAt': firestore.SERVER_TIMESTAMP
+        })
+        return summary
+
+    def settle_room(self, room_id: str) -> Dict[str, Any]:
+        """Pay the paid-entrant winners of a completed room; safe to call again"""
+        db = self._get_db()
+        room_ref = db.collection('gameRooms').document(room_id)
+        snapshot = room_ref.get()
+        if not snapshot.exists:
+            raise KeyError(room_id)
+        data = snapshot.to_dict() or {}
+        if data.get('status') != 'completed':
+            raise ValueError('Only completed rooms can be settled')
+        winners = data.get('winners') or []
+        if not winners:
+            raise ValueError('Room has no winners')
+
+        paid = self._paid_entries(db, room_ref, data)
+        pot = sum(paid.values())
+        unpaid = sorted({winner['playerId'] for winner in winners if winner['playerId'] not in paid})
+        winners = [winner for winner in winners if winner['playerId'] in paid]
+        if pot and not winners:
+            print(f"Room {room_id} has no paid winner ({', '.join(unpaid)}); holding it for review")
+            room_ref.update({'settlement': 'review'})
+            return self._record(db, room_id, {
+                'type': 'review',
+                'pot': pot / 100,
+                'unpaidWinners': unpaid
+            })
+
+        house = int(round(pot * self.house_cut))
+        payouts = split_pot(pot - house, winners)
+        written, already_present = self._write_entries(db, room_id, 'payout', payouts)
+        room_ref.update({'settlement': 'paid', 'prizePool': (pot - house) / 100})
+        return self._record(db, room_id, {
+            'type': 'payout',
+            'pot': pot / 100,
+            'house': (pot - sum(payouts.values())) / 100,
+            'payouts': {user_id: cents / 100 for user_id, cents in payouts.items()},
+            'unpaidWinners': unpaid,
+            'entriesWritten': written,
+            'entriesAlreadyPresent': already_present
+        })
+
+    def cancel_room(self, room_id: str) -> Dict[str, Any]:
+        """Cancel a room that has not finished and refund every paid entry; safe to call again"""
+        db = self._get_db()
+        room_ref = db.collection('gameRooms').document(room_id)
+        snapshot = room_ref.get()
+        if not snapshot.exists:
+            raise KeyError(room_id)
+        data = snapshot.to_dict() or {}
+        if data.get('status') == 'completed':
+            raise ValueError('Completed rooms are settled, not refunded')
+        if data.get('status') != 'cancelled':
+            try:
+                # Guarded so a room that finishes meanwhile is not also refunded
+                room_ref.update({'status': 'cancelled', 'cancelledAt': firestore.SERVER_TIMESTAMP},
+                                option=db.write_option(last_update_time=snapshot.update_time))
+            except FailedPrecondition:
+                raise ValueError('Room changed while cancelling, please retry')
+
+        refunds = self._paid_entries(db, room_ref, data)
+        written, already_present = self._write_entries(db, room_id, 'refund', refunds)
+        room_ref.update({'settlement': 'refunded'})
+        return self._record(db, room_id, {
+            'type': 'refund',
+            'pot': sum(refunds.values()) / 100,
+            'refunds': {user_id: cents / 100 for user_id, cents in refunds.items()},
+            'entriesWritten': written,
+            'entriesAlreadyPresent': already_present
+        })
+
+# Global settlement service instance
+settlement_service = SettlementService.from_config(firebase_manager, ledger_service, get_config())
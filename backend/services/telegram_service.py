@@ -1,9 +1,15 @@
-import requests
 import time
 from typing import Dict, Any, Optional
+import requests
 from firebase_admin import firestore, auth as firebase_auth
 
-from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
+from services.http_client import PooledHttpClient
+from services.user_resolver import user_resolver, normalize_chat_id, stage_identity
+from services.wallet_service import wallet_service
+from services.room_players import lists_players
+from services.translation_service import translation_service
+
+from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup, KeyboardButton, ReplyKeyboardMarkup
 from telegram.ext import (Application, CommandHandler, ContextTypes, MessageHandler, filters, CallbackQueryHandler)
 import logging
 import os
@@ -15,14 +21,25 @@ class TelegramService:
     def __init__(self, config):
         self.bot_token = config.TELEGRAM_BOT_TOKEN
         self.payment_provider_token = config.TELEGRAM_PAYMENT_PROVIDER_TOKEN
+        self.api_base_url = f"https://api.telegram.org/bot{self.bot_token}"
+        # Shared keep-alive pool so each reply reuses an open TLS connection
+        self.http = PooledHttpClient.from_config(config, 'TELEGRAM')
+    
+    def get_http_stats(self) -> Dict[str, Any]:
+        """Get connection pool statistics for outbound Telegram calls"""
+        return self.http.get_stats()
     
     def send_message(self, chat_id: str, text: str, parse_mode: str = 'HTML') -> bool:
         """Send a message to a Telegram chat"""
+        return bool(self.send_message_result(chat_id, text, parse_mode).get('ok'))
+    
+    def send_message_result(self, chat_id: str, text: str, parse_mode: str = 'HTML') -> Dict[str, Any]:
+        """Send a message and return the Telegram API response (including retry_after on 429)"""
         if not self.bot_token:
             print("TELEGRAM_BOT_TOKEN not set in environment.")
-            return False
+            return {'ok': False, 'description': 'TELEGRAM_BOT_TOKEN not set'}
             
-        url = f"https://api.telegram.org/bot{self.bot_token}/sendMessage"
+        url = f"{self.api_base_url}/sendMessage"
         payload = {
             'chat_id': chat_id,
             'text': text,
@@ -30,11 +47,22 @@ class TelegramService:
         }
         
         try:
-            response = requests.post(url, json=payload)
-            return response.status_code == 200
+            response = self.http.post(url, json=payload)
+            try:
+                result = response.json()
+            except ValueError:
+                result = {'ok': response.status_code == 200, 'error_code': response.status_code}
+            # Server-side errors and 429 are worth another attempt later; other 4xx are not
+            result['transient'] = response.status_code >= 500 or response.status_code == 429
+            return result
+        except requests.exceptions.ConnectionError as e:
+            # Covers ConnectTimeout: the message never reached Telegram, so resending is safe
+            print(f"Failed to send Telegram message: {e}")
+            return {'ok': False, 'transient': True, 'description': str(e)}
         except Exception as e:
+            # Read timeouts and anything else: Telegram may already have delivered it
             print(f"Failed to send Telegram message: {e}")
-            return False
+            return {'ok': False, 'transient': False, 'description': str(e)}
     
     def create_payment_invoice(self, chat_id: str, title: str, description: str, 
                              amount: float, currency: str = 'ETB', payload: str = '') -> Optional[Dict[str, Any]]:
@@ -43,7 +71,7 @@ class TelegramService:
             print("Telegram bot token or payment provider token not set")
             return None
             
-        url = f"https://api.telegram.org/bot{self.bot_token}/sendInvoice"
+        url = f"{self.api_base_url}/sendInvoice"
         
         # Convert amount to cents (Telegram requires amounts in cents)
         amount_cents = int(amount * 100)
@@ -66,7 +94,7 @@ class TelegramService:
         }
         
         try:
-            response = requests.post(url, json=payload_data)
+            response = self.http.post(url, json=payload_data)
             result = response.json()
             
             if result.get('ok'):
@@ -84,7 +112,7 @@ class TelegramService:
         if not self.bot_token:
             return False
             
-        url = f"https://api.telegram.org/bot{self.bot_token}/answerPreCheckoutQuery"
+        url = f"{self.api_base_url}/answerPreCheckoutQuery"
         payload = {
             'pre_checkout_query_id': query_id,
             'ok': ok
@@ -94,7 +122,7 @@ class TelegramService:
             payload['error_message'] = error_message
         
         try:
-            response = requests.post(url, json=payload)
+            response = self.http.post(url, json=payload)
             return response.status_code == 200
         except Exception as e:
             print(f"Error answering pre-checkout query: {e}")
@@ -105,7 +133,7 @@ class TelegramService:
         if not self.bot_token:
             return False
             
-        url = f"https://api.telegram.org/bot{self.bot_token}/answerShippingQuery"
+        url = f"{self.api_base_url}/answerShippingQuery"
         payload = {
             'shipping_query_id': query_id,
             'ok': ok
@@ -115,7 +143,7 @@ class TelegramService:
             payload['error_message'] = error_message
         
         try:
-            response = requests.post(url, json=payload)
+            response = self.http.post(url, json=payload)
             return response.status_code == 200
         except Exception as e:
             print(f"Error answering shipping query: {e}")
@@ -142,30 +170,15 @@ class TelegramService:
                 'createdAt': firestore.SERVER_TIMESTAMP
             }
             
-            # Add to transactions collection
-            db.collection('transactions').add(transaction_data)
-            
-            # Update wallet balance
-            wallet_ref = db.collection('wallets').document(user_id)
-            wallet_doc = wallet_ref.get()
-            
-            if wallet_doc.exists:
-                current_balance = wallet_doc.to_dict().get('balance', 0)
-                new_balance = current_balance + amount
-                wallet_ref.update({
-                    'balance': new_balance,
-                    'updatedAt': firestore.SERVER_TIMESTAMP
-                })
-            else:
-                # Create wallet if it doesn't exist
-                wallet_ref.set({
-                    'userId': user_id,
-                    'balance': amount,
-                    'currency': 'ETB',
-                    'status': 'active',
-                    'createdAt': firestore.SERVER_TIMESTAMP,
-                    'updatedAt': firestore.SERVER_TIMESTAMP
-                })
+            # Credit the wallet and record the transaction in one commit;
+            # the charge ID makes a redelivered payment a no-op
+            credited = wallet_service.credit_wallet(
+                user_id, amount, transaction_data,
+                idempotency_key=f"tg_{telegram_payment_charge_id}", db=db
+            )
+            if not credited:
+                print(f"Telegram deposit {telegram_payment_charge_id} already processed")
+                return True
             
             print(f"Processed Telegram deposit: {amount} ETB for user {user_id}")
             return True
@@ -196,48 +209,65 @@ class TelegramService:
                 'createdAt': firestore.SERVER_TIMESTAMP
             }
             
-            # Add to transactions collection
-            db.collection('transactions').add(transaction_data)
+            idempotency_key = f"tg_{telegram_payment_charge_id}"
+            game_doc = db.collection('gameRooms').document(game_id).get()
+            if not game_doc.exists:
+                # Keep the money on the user's wallet rather than dropping it
+                print(f"Game {game_id} not found; crediting entry payment to {user_id}'s wallet")
+                wallet_service.credit_wallet(user_id, amount, transaction_data,
+                                             idempotency_key=idempotency_key, db=db)
+                return False
             
-            # Add user to game
-            game_ref = db.collection('gameRooms').document(game_id)
-            game_doc = game_ref.get()
+            user_doc = db.collection('users').document(user_id).get()
+            user_data = user_doc.to_dict() if user_doc.exists else {}
+            player_info = {
+                'userId': user_id,
+                'displayName': user_data.get('displayName', 'Player'),
+                'telegramChatId': user_data.get('telegramChatId', ''),
+                'telegramUsername': user_data.get('telegramUsername', ''),
+                'entryPaid': True,
+                'entryAmount': amount
+            }
             
-            if game_doc.exists:
-                game_data = game_doc.to_dict()
-                user_doc = db.collection('users').document(user_id).get()
-                user_data = user_doc.to_dict() if user_doc.exists else {}
-                
-                player_info = {
-                    'userId': user_id,
-                    'displayName': user_data.get('displayName', 'Player'),
-                    'telegramChatId': user_data.get('telegramChatId', ''),
-                    'telegramUsername': user_data.get('telegramUsername', ''),
-                    'entryPaid': True,
-                    'entryAmount': amount
-                }
-                
-                # Add player to game
-                game_ref.update({
-                    'players': firestore.ArrayUnion([player_info])
-                })
-                
+            # Ledger entries, transaction record and join in one commit;
+            # the charge ID makes a redelivered payment a no-op
+            game_data = game_doc.to_dict() or {}
+            if wallet_service.pay_entry(user_id, game_id, amount, transaction_data, player_info,
+                                        idempotency_key, listed=lists_players(game_data),
+                                        room_data=game_data, db=db):
                 print(f"Processed Telegram game entry: {amount} ETB for user {user_id} in game {game_id}")
                 return True
-            else:
-                print(f"Game {game_id} not found")
-                return False
+            
+            if db.collection('transactions').document(idempotency_key).get().exists:
+                print(f"Telegram game entry {telegram_payment_charge_id} already processed")
+                return True
+            
+            # Already in the room under an earlier entry: keep this payment on the wallet
+            print(f"User {user_id} already joined game {game_id}; crediting entry payment to wallet")
+            wallet_service.credit_wallet(user_id, amount, transaction_data,
+                                         idempotency_key=idempotency_key, db=db)
+            return True
                 
         except Exception as e:
             print(f"Error processing Telegram game entry: {e}")
             return False 
 
+# (translation key, callback data) for each /start menu button
+MAIN_MENU = (
+    ('profile_btn', 'profile'),
+    ('wallet_btn', 'wallet'),
+    ('achievements_btn', 'achievements'),
+    ('language_btn', 'language'),
+    ('support_btn', 'support'),
+)
+
 # Advanced Telegram Bot with multi-language, animated onboarding, wallet, profile, etc.
 class AdvancedTelegramBot:
     def __init__(self, token, firebase_manager, supported_languages=None):
         self.token = token
         self.firebase_manager = firebase_manager
         self.supported_languages = supported_languages or {'en': 'English', 'am': 'Amharic'}
+        self.menus = self._build_menus()
         self.application = Application.builder().token(token).build()
         self._setup_handlers()
         self.logger = logging.getLogger('AdvancedTelegramBot')
@@ -259,18 +289,11 @@ class AdvancedTelegramBot:
     async def start(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         user = update.effective_user
         lang = self.get_user_language(user.id)
-        welcome_text = self.get_text('welcome', lang).format(name=user.first_name)
-        keyboard = [
-            [InlineKeyboardButton(self.get_text('profile_btn', lang), callback_data='profile')],
-            [InlineKeyboardButton(self.get_text('wallet_btn', lang), callback_data='wallet')],
-            [InlineKeyboardButton(self.get_text('achievements_btn', lang), callback_data='achievements')],
-            [InlineKeyboardButton(self.get_text('language_btn', lang), callback_data='language')],
-            [InlineKeyboardButton(self.get_text('support_btn', lang), callback_data='support')],
-        ]
+        welcome_text = self.get_text('welcome', lang, name=user.first_name)
         await update.message.reply_animation(
             animation='https://media.giphy.com/media/v1.Y2lkPTc5MGI3NjExb2Z2b2J6d3F2d3F2d3F2d3F2d3F2d3F2d3F2d3F2d3F2d3F2d3F2/giphy.gif',
             caption=welcome_text,
-            reply_markup=InlineKeyboardMarkup(keyboard)
+            reply_markup=self.get_menu('main', lang)
         )
 
     async def help(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -280,33 +303,19 @@ class AdvancedTelegramBot:
     async def register(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         user = update.effective_user
         lang = self.get_user_language(user.id)
-        
-        # Create keyboard with contact request button
-        keyboard = [
-            [InlineKeyboardButton(
-                self.get_text('share_phone', lang), 
-                callback_data='request_contact'
-            )]
-        ]
-        
         await update.message.reply_text(
             self.get_text('register_instruction', lang),
-            reply_markup=InlineKeyboardMarkup(keyboard)
+            reply_markup=self.get_menu('register', lang)
         )
 
     async def profile(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         user = update.effective_user
         lang = self.get_user_language(user.id)
-        db = self.firebase_manager.get_db()
-        user_doc = None
-        if db:
-            users = db.collection('users').where('telegramChatId', '==', user.id).stream()
-            for doc in users:
-                user_doc = doc
-                break
+        user_doc = self._get_user_doc(user.id)
         if user_doc:
             data = user_doc.to_dict()
-            profile_text = self.get_text('profile', lang).format(
+            profile_text = self.get_text(
+                'profile', lang,
                 name=data.get('displayName', user.first_name),
                 level=data.get('level', 1),
                 games=data.get('gamesPlayed', 0),
@@ -321,15 +330,13 @@ class AdvancedTelegramBot:
         user = update.effective_user
         lang = self.get_user_language(user.id)
         db = self.firebase_manager.get_db()
-        wallet_doc = None
-        if db:
-            wallets = db.collection('wallets').where('telegramChatId', '==', user.id).stream()
-            for doc in wallets:
-                wallet_doc = doc
-                break
-        if wallet_doc:
-            balance = wallet_doc.to_dict().get('balance', 0)
-            await update.message.reply_text(self.get_text('balance', lang).format(balance=balance))
+        balance = None
+        resolved = user_resolver.resolve(user.id) if db else None
+        if resolved:
+            # Wallets are keyed by the Firebase uid
+            balance = wallet_service.get_balance(resolved['uid'], db)
+        if balance is not None:
+            await update.message.reply_text(self.get_text('balance', lang, balance=balance))
         else:
             await update.message.reply_text(self.get_text('wallet_not_found', lang))
 
@@ -339,13 +346,7 @@ class AdvancedTelegramBot:
     async def achievements(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         user = update.effective_user
         lang = self.get_user_language(user.id)
-        db = self.firebase_manager.get_db()
-        user_doc = None
-        if db:
-            users = db.collection('users').where('telegramChatId', '==', user.id).stream()
-            for doc in users:
-                user_doc = doc
-                break
+        user_doc = self._get_user_doc(user.id)
         if user_doc:
             achievements = user_doc.to_dict().get('achievements', [])
             if achievements:
@@ -358,11 +359,9 @@ class AdvancedTelegramBot:
 
     async def language(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         lang = self.get_user_language(update.effective_user.id)
-        keyboard = [[InlineKeyboardButton(name, callback_data=f'lang_{code}')]
-                    for code, name in self.supported_languages.items()]
         await update.message.reply_text(
             self.get_text('choose_language', lang),
-            reply_markup=InlineKeyboardMarkup(keyboard)
+            reply_markup=self.get_menu('language', lang)
         )
 
     async def support(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -385,14 +384,11 @@ class AdvancedTelegramBot:
         elif data == 'support':
             await self.support(update, context)
         elif data == 'request_contact':
-            # Send contact request
-            keyboard = [[InlineKeyboardButton(
-                self.get_text('share_phone', self.get_user_language(query.from_user.id)), 
-                request_contact=True
-            )]]
-            await query.edit_message_text(
-                self.get_text('share_phone_prompt', self.get_user_language(query.from_user.id)),
-                reply_markup=InlineKeyboardMarkup(keyboard)
+            # Contact requests only work on a reply keyboard, which needs a new message
+            lang = self.get_user_language(query.from_user.id)
+            await query.message.reply_text(
+                self.get_text('share_phone_prompt', lang),
+                reply_markup=self.get_menu('share_phone', lang)
             )
         elif data.startswith('lang_'):
             lang_code = data.split('_', 1)[1]
@@ -414,15 +410,11 @@ class AdvancedTelegramBot:
             db = self.firebase_manager.get_db()
             if db:
                 # Check if user exists
-                users = db.collection('users').where('telegramChatId', '==', user.id).stream()
-                user_doc = None
-                for doc in users:
-                    user_doc = doc
-                    break
+                resolved = user_resolver.resolve(user.id)
                 
-                if user_doc:
+                if resolved:
                     # Update existing user with phone number
-                    db.collection('users').document(user_doc.id).update({
+                    db.collection('users').document(resolved['uid']).update({
                         'phoneNumber': contact.phone_number,
                         'phoneRegistered': True,
                         'phoneRegisteredAt': firestore.SERVER_TIMESTAMP
@@ -430,10 +422,12 @@ class AdvancedTelegramBot:
                 else:
                     # Create new user with phone number
                     new_user = db.collection('users').document()
-                    new_user.set({
-                        'telegramChatId': user.id,
+                    display_name = f"{user.first_name} {user.last_name or ''}".strip()
+                    batch = db.batch()
+                    batch.set(new_user, {
+                        'telegramChatId': normalize_chat_id(user.id),
                         'telegramUsername': user.username,
-                        'displayName': f"{user.first_name} {user.last_name or ''}".strip(),
+                        'displayName': display_name,
                         'phoneNumber': contact.phone_number,
                         'phoneRegistered': True,
                         'phoneRegisteredAt': firestore.SERVER_TIMESTAMP,
@@ -469,6 +463,9 @@ class AdvancedTelegramBot:
                             }
                         }
                     })
+                    stage_identity(batch, db, user.id, new_user.id, display_name, user.username)
+                    batch.commit()
+                    user_resolver.remember(user.id, new_user.id, display_name)
                 
                 await update.message.reply_text(self.get_text('phone_registered_success', lang))
             else:
@@ -476,6 +473,17 @@ class AdvancedTelegramBot:
         else:
             await update.message.reply_text(self.get_text('invalid_contact', lang))
 
+    def _get_user_doc(self, telegram_user_id):
+        """Fetch the Firestore user document for a Telegram user"""
+        db = self.firebase_manager.get_db()
+        if not db:
+            return None
+        resolved = user_resolver.resolve(telegram_user_id)
+        if not resolved:
+            return None
+        doc = db.collection('users').document(resolved['uid']).get()
+        return doc if doc.exists else None
+
     def get_user_language(self, user_id):
         # TODO: Store/retrieve user language from DB or cache
         return 'en'
@@ -484,57 +492,33 @@ class AdvancedTelegramBot:
         # TODO: Store user language in DB or cache
         pass
 
-    def get_text(self, key, lang):
-        texts = {
-            'welcome': {
-                'en': '👋 Welcome, {name}!\nThis is the Bingo Game Bot. Use the menu below to get started.',
-                'am': '👋 እንኳን ደህና መጡ {name}! ይህ የቢንጎ ጨዋታ ቦት ነው። ለመጀመር ዝርዝሩን ይጠቀሙ።'
-            },
-            'profile_btn': {'en': '👤 Profile', 'am': '👤 መገለጫ'},
-            'wallet_btn': {'en': '💰 Wallet', 'am': '💰 ቦሌት'},
-            'achievements_btn': {'en': '🏆 Achievements', 'am': '🏆 ሽልማቶች'},
-            'language_btn': {'en': '🌐 Language', 'am': '🌐 ቋንቋ'},
-            'support_btn': {'en': '🆘 Support', 'am': '🆘 ድጋፍ'},
-            'help': {
-                'en': 'Use the menu or type /profile, /wallet, /achievements, /language, /support, /register.',
-                'am': 'ዝርዝሩን ይጠቀሙ ወይም /profile, /wallet, /achievements, /language, /support, /register ይተይቡ።'
-            },
-            'register_instruction': {
-                'en': '📱 To register your phone number, please share your contact information. This helps us verify your account and provide better service.',
-                'am': '📱 የስልክ ቁጥርዎን ለመመዝገብ እባክዎን የእርስዎን አድራሻ ያጋሩ። ይህ መለያዎን ለመረጋገጥ እና የተሻለ አገልግሎት ለመስጠት ያገለግለናል።'
-            },
-            'share_phone': {
-                'en': '📱 Share Phone Number',
-                'am': '📱 የስልክ ቁጥር ያጋሩ'
-            },
-            'share_phone_prompt': {
-                'en': '📱 Please tap the button below to share your phone number:',
-                'am': '📱 የስልክ ቁጥርዎን ለመጋራት እባክዎን ከታች ያለውን ቁልፍ ይጫኑ:'
-            },
-            'phone_registered_success': {
-                'en': '✅ Phone number registered successfully! You can now use all bot features.',
-                'am': '✅ የስልክ ቁጥር በተሳካት ሁኔታ ተመዝግቧል! አሁን ሁሉንም የቦት ባህሪያት መጠቀም ይችላሉ።'
-            },
-            'invalid_contact': {
-                'en': '❌ Invalid contact. Please share your own phone number.',
-                'am': '❌ የማያገለግል አድራሻ። እባክዎን የራስዎን የስልክ ቁጥር ያጋሩ።'
-            },
-            'database_error': {
-                'en': '❌ Database error. Please try again later.',
-                'am': '❌ የዳታቤዝ ስህተት። እባክዎን በኋላ ዳግም ይሞክሩ።'
-            },
-            'profile': {
-                'en': '👤 Name: {name}\nLevel: {level}\nGames: {games}\nWins: {wins}\nAchievements: {achievements}',
-                'am': '👤 ስም: {name}\nደረጃ: {level}\nጨዋታዎች: {games}\nአሸናፊዎች: {wins}\nሽልማቶች: {achievements}'
-            },
-            'profile_not_found': {'en': 'Profile not found. Please register on the web app.', 'am': 'መገለጫ አልተገኘም። እባክዎን በድህረ ገጹ ይመዝገቡ።'},
-            'balance': {'en': '💰 Your wallet balance: {balance} ETB', 'am': '💰 የእርስዎ ቦሌት ሂሳብ: {balance} ብር'},
-            'wallet_not_found': {'en': 'No wallet found. Please register on the web app.', 'am': 'ቦሌት አልተገኘም። እባክዎን በድህረ ገጹ ይመዝገቡ።'},
-            'achievements': {'en': '🏆 Your Achievements:', 'am': '🏆 የእርስዎ ሽልማቶች:'},
-            'no_achievements': {'en': 'No achievements yet.', 'am': 'ምንም ሽልማት የለም።'},
-            'choose_language': {'en': 'Choose your language:', 'am': 'ቋንቋዎን ይምረጡ።'},
-            'language_set': {'en': 'Language updated!', 'am': 'ቋንቋ ተቀይሯል!'},
-            'support': {'en': 'For support, contact @YourSupportUsername.', 'am': 'ለድጋፍ እባክዎን @YourSupportUsername ያነጋግሩ።'},
-            'unknown_command': {'en': 'Unknown command. Use the menu or /help.', 'am': 'ያልታወቀ ትእዛዝ። ዝርዝሩን ይጠቀሙ ወይም /help ይተይቡ።'}
-        }
-        return texts.get(key, {}).get(lang, texts.get(key, {}).get('en', '')) 
\ No newline at end of file
+    def get_text(self, key, lang, **kwargs):
+        """Bot string from the shared 'bot' section of the translation catalogs"""
+        return translation_service.get_text(f'bot.{key}', lang, **kwargs)
+
+    def get_menu(self, name, lang):
+        """Prebuilt keyboard for a language (English if the language has none)"""
+        menus = self.menus.get(lang) or self.menus['en']
+        return menus[name]
+
+    def _build_menus(self):
+        """Build every keyboard once per language
+
+        Keyboard markups are immutable, so one instance is safely shared
+        by every handler call.
+        """
+        language_menu = InlineKeyboardMarkup([[InlineKeyboardButton(name, callback_data=f'lang_{code}')]
+                                              for code, name in self.supported_languages.items()])
+        menus = {}
+        for lang in {'en', *self.supported_languages}:
+            menus[lang] = {
+                'main': InlineKeyboardMarkup([[InlineKeyboardButton(self.get_text(key, lang), callback_data=data)]
+                                              for key, data in MAIN_MENU]),
+                'register': InlineKeyboardMarkup([[InlineKeyboardButton(
+                    self.get_text('share_phone', lang), callback_data='request_contact')]]),
+                'share_phone': ReplyKeyboardMarkup([[KeyboardButton(
+                    self.get_text('share_phone', lang), request_contact=True)]],
+                    one_time_keyboard=True, resize_keyboard=True),
+                'language': language_menu,
+            }
+        return menus 
\ No newline at end of file
@@ -0,0 +1,286 @@
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+from firebase_admin import firestore
+from google.api_core.exceptions import FailedPrecondition
+
+from config.settings import get_config
+from database.firebase import firebase_manager
+from engine import Card
+from engine.draw import DRAW_ALGORITHM, draw_commitment, new_seed
+from engine.patterns import MAX_NUMBER
+from engine.tournament import TournamentArbiter, shard_for, shard_room_id
+from services.game_engine_service import SECRETS_COLLECTION, game_engine_service
+from services.room_players import lists_players, room_player_count, room_players
+
+TOURNAMENTS_COLLECTION = 'tournaments'
+# tournaments/{id}/entrants/{uid} -> the shard a player was placed in
+ENTRANTS_COLLECTION = 'entrants'
+
+class TournamentService:
+    """Tournaments split into shard rooms that share one committed call stream
+
+    A tournament is tournaments/{id} plus shardCount engine rooms
+    gameRooms/{id}-s{n}. Players are hashed to a shard, so joins, card
+    deals and claims write that shard's room document and players
+    subcollection instead of a single room document. A shard holds at
+    most maxPlayersPerShard players; a join to a full shard spills to the
+    next one with a free seat, and the shard each player landed in is
+    recorded under tournaments/{id}/entrants. Every shard room is
+    created with the tournament's draw seed, so calling advances all of
+    them through the same sequence (one batched commit per 500 shards).
+    The tournament document holds the master call stream and the winners
+    picked by a TournamentArbiter.
+
+    Calls are idempotent: the next call index comes from the tournament
+    document and shards already at it are skipped, so a call that failed
+    part-way (or raced another process) is completed by the next one.
+    """
+
+    # Rounds of catch-up calls for shards whose writes were rejected
+    MAX_SYNC_ROUNDS = 3
+
+    def __init__(self, firebase_manager, engine, players, default_shards: int = 16, max_shards: int = 500):
+        self.firebase_manager = firebase_manager
+        self.engine = engine
+        self.players = players
+        self.default_shards = default_shards
+        self.max_shards = max_shards
+        self._shard_counts: Dict[str, int] = {}
+        self._locks: Dict[str, threading.Lock] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, firebase_manager, engine, players, config) -> 'TournamentService':
+        """Build the service from TOURNAMENT_* settings"""
+        return cls(firebase_manager, engine, players,
+                   default_shards=config.TOURNAMENT_SHARD_COUNT,
+                   max_shards=config.TOURNAMENT_MAX_SHARDS)
+
+    def _get_db(self):
+        db = self.firebase_manager.get_db()
+        if not db:
+            raise RuntimeError('Firestore DB not initialized')
+        return db
+
+    def _tournament_lock(self, tournament_id: str) -> threading.Lock:
+        with self._lock:
+            return self._locks.setdefault(tournament_id, threading.Lock())
+
+    def _tournament(self, db, tournament_id: str) -> Dict[str, Any]:
+        snapshot = db.collection(TOURNAMENTS_COLLECTION).document(tournament_id).get()
+        if not snapshot.exists:
+            raise KeyError(tournament_id)
+        data = snapshot.to_dict() or {}
+        with self._lock:
+            self._shard_counts[tournament_id] = data['shardCount']
+        return data
+
+    def _shard_count(self, db, tournament_id: str) -> int:
+        with self._lock:
+            shard_count = self._shard_counts.get(tournament_id)
+        return shard_count or self._tournament(db, tournament_id)['shardCount']
+
+    def create_tournament(self, created_by: str, name: Optional[str] = None, shard_count: Optional[int] = None,
+                          entry_fee: float = 0, max_players_per_shard: int = 5000) -> Dict[str, Any]:
+        """Create the tournament document and its shard rooms"""
+        shard_count = shard_count or self.default_shards
+        if not 1 <= shard_count <= self.max_shards:
+            raise ValueError(f'shardCount must be between 1 and {self.max_shards}')
+        db = self._get_db()
+        tournament_ref = db.collection(TOURNAMENTS_COLLECTION).document()
+        seed = new_seed()
+        name = name or 'Bingo Tournament'
+
+        batch = db.batch()
+        batch.create(tournament_ref, {
+            'name': name,
+            'status': 'waiting',
+            'shardCount': shard_count,
+            'createdBy': created_by,
+            'createdAt': firestore.SERVER_TIMESTAMP,
+            'entryFee': entry_fee,
+            'maxPlayersPerShard': max_players_per_shard,
+            'calledNumbers': [],
+            'currentCall': None,
+            'winners': [],
+            'winningCallIndex': None,
+            'drawCommitment': draw_commitment(seed),
+            'drawAlgorithm': DRAW_ALGORITHM,
+            'drawSeed': None
+        })
+        batch.create(db.collection(SECRETS_COLLECTION).document(tournament_ref.id), {
+            'drawSeed': seed,
+            'createdAt': firestore.SERVER_TIMESTAMP
+        })
+        batch.commit()
+
+        for shard in range(shard_count):
+            self.engine.create_room(created_by, room_id=shard_room_id(tournament_ref.id, shard),
+                                    name=f"{name} #{shard + 1}", entry_fee=entry_fee,
+                                    max_players=max_players_per_shard, draw_seed=seed,
+                                    fields={'tournamentId': tournament_ref.id, 'shard': shard})
+        with self._lock:
+            self._shard_counts[tournament_ref.id] = shard_count
+        return {'tournamentId': tournament_ref.id, 'shardCount': shard_count,
+                'drawCommitment': draw_commitment(seed)}
+
+    def _entrant_ref(self, db, tournament_id: str, player_id: str):
+        return (db.collection(TOURNAMENTS_COLLECTION).document(tournament_id)
+                .collection(ENTRANTS_COLLECTION).document(player_id))
+
+    def join(self, tournament_id: str, player: Dict[str, Any]) -> Tuple[str, bool]:
+        """Add a player to their shard, or the next one with a free seat
+
+        Returns (shard room ID, False if already joined). Raises ValueError
+        if every shard is full. The shard's playerCount is checked in the
+        join transaction, so concurrent joins cannot overfill it.
+        """
+        db = self._get_db()
+        data = self._tournament(db, tournament_id)
+        if data.get('status') != 'waiting':
+            raise ValueError('Tournament has already started')
+        shard_count = data['shardCount']
+        capacity = data.get('maxPlayersPerShard')
+        listed = lists_players({'maxPlayers': capacity})
+        user_id = player['userId']
+        home = shard_for(user_id, shard_count)
+        entrant_ref = self._entrant_ref(db, tournament_id, user_id)
+        home_player_ref = self.players.player_ref(db, shard_room_id(tournament_id, home), user_id)
+
+        @firestore.transactional
+        def add(transaction):
+            entrant, home_player = (entrant_ref.get(transaction=transaction),
+                                    home_player_ref.get(transaction=transaction))
+            if entrant.exists:
+                return shard_room_id(tournament_id, entrant.to_dict()['shard']), False
+            if home_player.exists:
+                # Joined before entrants were recorded
+                return shard_room_id(tournament_id, home), False
+            for offset in range(shard_count):
+                shard = (home + offset) % shard_count
+                room_id = shard_room_id(tournament_id, shard)
+                snapshot = db.collection('gameRooms').document(room_id).get(transaction=transaction)
+                room_data = snapshot.to_dict() or {}
+                if capacity and room_player_count(room_data) >= capacity:
+                    continue
+                transaction.create(entrant_ref, {'shard': shard, 'joinedAt': firestore.SERVER_TIMESTAMP})
+                self.players.stage_joins(transaction, db, room_id, [player], listed=listed, room_data=room_data)
+                return room_id, True
+            raise ValueError('Tournament is full')
+
+        return add(db.transaction())
+
+    def deal_cards(self, tournament_id: str, player_id: str, count: int = 1) -> Tuple[str, List[Card]]:
+        """Deal cards in the player's shard room
+
+        Raises PermissionError if the player has not joined the tournament;
+        the shard room applies the engine's paid-entry, status and card cap
+        checks.
+        """
+        db = self._get_db()
+        entrant = self._entrant_ref(db, tournament_id, player_id).get()
+        if entrant.exists:
+            room_id = shard_room_id(tournament_id, entrant.to_dict()['shard'])
+        else:
+            # Joined before entrants were recorded, if at all
+            room_id = shard_room_id(tournament_id, shard_for(player_id, self._shard_count(db, tournament_id)))
+            if not self.players.player_ref(db, room_id, player_id).get().exists:
+                raise PermissionError('Join the tournament before buying cards')
+        return room_id, self.engine.deal_cards(room_id, player_id, count)
+
+    def _advance_shards(self, room_ids: List[str], target: int):
+        """Call every shard room up to target calls; returns the rooms"""
+        for _ in range(self.MAX_SYNC_ROUNDS):
+            rooms = [self.engine.get_room(room_id) for room_id in room_ids]
+            if any(room is None for room in rooms):
+                raise KeyError('Tournament shard room missing')
+            behind = [room.room_id for room in rooms if len(room.called) < target and not room.finished]
+            if not behind:
+                return rooms
+            self.engine.call_numbers(behind)
+        return [self.engine.get_room(room_id) for room_id in room_ids]
+
+    def call_number(self, tournament_id: str) -> Dict[str, Any]:
+        """Advance every shard by one call and let the arbiter settle any winners
+
+        Raises FailedPrecondition if some shard could not be brought up to
+        the call; the tournament document is left unchanged and the next
+        call finishes the job.
+        """
+        with self._tournament_lock(tournament_id):
+            db = self._get_db()
+            data = self._tournament(db, tournament_id)
+            if data.get('status') == 'completed':
+                raise ValueError('Tournament is already finished')
+            shard_count = data['shardCount']
+            target = len(data.get('calledNumbers') or []) + 1
+            room_ids = [shard_room_id(tournament_id, shard) for shard in range(shard_count)]
+            rooms = self._advance_shards(room_ids, target)
+
+            arbiter = TournamentArbiter(shard_count)
+            for shard, room in enumerate(rooms):
+                # A shard that finished on a win has nothing later to claim
+                arbiter.report(shard, target if room.finished else len(room.called), room.winners)
+            if arbiter.settled_index < target:
+                raise FailedPrecondition(f'Tournament shards are behind call {target}')
+
+            resolution = arbiter.resolve()
+            called = list(rooms[0].draw_sequence[:target])
+            finished = resolution is not None or target == MAX_NUMBER
+            update = {
+                'calledNumbers': called,
+                'currentCall': called[-1],
+                'lastCallTime': firestore.SERVER_TIMESTAMP,
+                'status': 'completed' if finished else 'playing'
+            }
+            winners = []
+            if resolution:
+                update['winningCallIndex'], winners = resolution
+                update['winners'] = winners
+            if finished:
+                update['drawSeed'] = rooms[0].draw_seed.hex()
+            db.collection(TOURNAMENTS_COLLECTION).document(tournament_id).update(update)
+            if finished:
+                self._close_shards(db, [room for room in rooms if not room.finished])
+            return {'number': called[-1], 'callIndex': target, 'winners': winners, 'finished': finished}
+
+    def _close_shards(self, db, rooms):
+        """Mark shards without a winner completed once the tournament is decided"""
+        for start in range(0, len(rooms), self.engine.MAX_BATCH_WRITES):
+            batch = db.batch()
+            for room in rooms[start:start + self.engine.MAX_BATCH_WRITES]:
+                room.finished = True
+                batch.update(db.collection('gameRooms').document(room.room_id), {'status': 'completed'})
+            batch.commit()
+
+    def get_tournament(self, tournament_id: str) -> Dict[str, Any]:
+        """Tournament document with per-shard player and card counts"""
+        db = self._get_db()
+        data = self._tournament(db, tournament_id)
+        refs = [db.collection('gameRooms').document(shard_room_id(tournament_id, shard))
+                for shard in range(data['shardCount'])]
+        shards = []
+        for snapshot in db.get_all(refs):
+            shard_data = (snapshot.to_dict() or {}) if snapshot.exists else {}
+            shards.append({'roomId': snapshot.id, 'shard': shard_data.get('shard'),
+                           'playerCount': shard_data.get('playerCount', 0),
+                           'cardCount': shard_data.get('cardCount', 0)})
+        shards.sort(key=lambda shard: shard['shard'] if shard['shard'] is not None else -1)
+        return {
+            'tournamentId': tournament_id,
+            'name': data.get('name'),
+            'status': data.get('status'),
+            'shardCount': data['shardCount'],
+            'playerCount': sum(shard['playerCount'] for shard in shards),
+            'calledNumbers': data.get('calledNumbers', []),
+            'currentCall': data.get('currentCall'),
+            'winners': data.get('winners', []),
+            'winningCallIndex': data.get('winningCallIndex'),
+            'drawCommitment': data.get('drawCommitment'),
+            'drawSeed': data.get('drawSeed'),
+            'shards': shards
+        }
+
+# Global tournament service instance
+tournament_service = TournamentService.from_config(firebase_manager, game_engine_service, room_players, get_config())
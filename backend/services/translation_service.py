@@ -1,13 +1,143 @@
 import json
 import os
-from typing import Dict, Optional
+from functools import lru_cache
+from string import Formatter
+from typing import Any, Dict, Optional, Tuple
+
+class CompiledTemplate:
+    """A translation string with its placeholders parsed once
+
+    Plain {name} fields are rewritten into a %-style template, so
+    rendering is one C-level substitution and strings without fields are
+    returned as they are. Templates that need str.format itself
+    (positional, attribute or index fields, format specs, conversions)
+    keep using it.
+    """
+
+    __slots__ = ('text', 'template', 'static')
+
+    def __init__(self, text: str):
+        self.text = text
+        self.template = None
+        self.static = None
+        try:
+            parts = list(Formatter().parse(text))
+        except ValueError:
+            # Unbalanced braces: str.format raises too
+            return
+        if all(name is None for _, name, _, _ in parts):
+            self.static = ''.join(literal for literal, _, _, _ in parts)
+        elif all(name is None or (name.isidentifier() and not spec and not conversion)
+                 for _, name, spec, conversion in parts):
+            self.template = ''.join(literal.replace('%', '%%') + (f'%({name})s' if name is not None else '')
+                                    for literal, name, _, _ in parts)
+
+    def render(self, kwargs: Dict[str, Any]) -> str:
+        if self.static is not None:
+            return self.static
+        try:
+            if self.template is not None:
+                return self.template % kwargs
+            return self.text.format_map(kwargs)
+        except (KeyError, IndexError, AttributeError, TypeError, ValueError):
+            # Missing or unusable params leave the template as it is
+            return self.text
+
+class TranslationPlan:
+    """Where the 't:' translation keys of a templated payload are
+
+    Compiled once from a payload; applying it copies only the dicts and
+    lists on the way to a translated value and shares every other subtree
+    with the input. The payload's rendering is cached per language, so a
+    static payload costs one dictionary lookup after the first call.
+    """
+
+    def __init__(self, source: Dict):
+        self.source = source
+        self.tree = self._compile(source)
+        self.rendered: Dict[str, Dict] = {}
+
+    @classmethod
+    def _compile(cls, data):
+        """{step: key or sub-tree} for dicts, and for lists of dicts/'t:' strings like translate_dict"""
+        tree = {}
+        items = data.items() if isinstance(data, dict) else enumerate(data)
+        for step, value in items:
+            if isinstance(value, str) and value.startswith('t:'):
+                tree[step] = value[2:]
+            elif isinstance(value, dict) or (isinstance(value, list) and isinstance(data, dict)):
+                subtree = cls._compile(value)
+                if subtree:
+                    tree[step] = subtree
+        return tree
+
+    def apply(self, data, translate):
+        return self._apply(self.tree, data, translate)
+
+    def _apply(self, tree, data, translate):
+        result = dict(data) if isinstance(data, dict) else list(data)
+        for step, child in tree.items():
+            try:
+                value = data[step]
+            except (KeyError, IndexError, TypeError):
+                continue
+            if isinstance(child, str):
+                if isinstance(value, str) and value.startswith('t:'):
+                    result[step] = translate(value[2:])
+            elif isinstance(value, (dict, list)):
+                result[step] = self._apply(child, value, translate)
+        return result
+
+def flatten(tree: Dict[str, Any], prefix: str = '') -> Dict[str, str]:
+    """Nested catalog -> {'section.key': text} for every string leaf"""
+    flat = {}
+    for key, value in tree.items():
+        if isinstance(value, dict):
+            flat.update(flatten(value, f"{prefix}{key}."))
+        elif isinstance(value, str):
+            flat[prefix + key] = value
+    return flat
+
+@lru_cache(maxsize=1024)
+def negotiate_language(accept_language: str, supported: Tuple[str, ...]) -> Optional[str]:
+    """Best supported language for an Accept-Language header, or None
+
+    Entries are ranked by q-value (ties keep header order) and matched on
+    their primary subtag, so "am-ET" selects "am". Cached per header value.
+    """
+    ranked = []
+    for position, entry in enumerate(accept_language.split(',')):
+        tag, _, params = entry.strip().partition(';')
+        quality = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                continue
+        if tag and quality > 0:
+            ranked.append((-quality, position, tag.split('-')[0].lower()))
+    for _, _, language in sorted(ranked):
+        if language in supported:
+            return language
+    return None
 
 class TranslationService:
-    """Service for handling translations"""
+    """Service for handling translations
+
+    Catalogs are compiled at load into one flat key -> CompiledTemplate
+    table per language with the English fallback merged in, so a lookup is
+    a single dictionary get.
+
+    The service holds no per-user state: callers pass the locale resolved
+    for their request (see resolve_locale) and omitting it means English.
+    """
     
     def __init__(self):
         self.translations = {}
-        self.current_language = 'en'
+        self.catalogs: Dict[str, Dict[str, CompiledTemplate]] = {}
+        self._plans: Dict[str, TranslationPlan] = {}
+        self.default_language = 'en'
         self.supported_languages = ['en', 'am']
         self.load_translations()
     
@@ -27,47 +157,43 @@ class TranslationService:
             except Exception as e:
                 print(f"Error loading translation file {file_path}: {e}")
                 self.translations[lang] = {}
+        self.compile_catalogs()
     
-    def set_language(self, language: str):
-        """Set the current language"""
-        if language in self.supported_languages:
-            self.current_language = language
-            return True
-        return False
+    def compile_catalogs(self):
+        """Build the flat per-language template tables from the loaded translations"""
+        english = {key: CompiledTemplate(text) for key, text in flatten(self.translations.get('en', {})).items()}
+        catalogs = {'en': english}
+        for lang in self.supported_languages:
+            if lang != 'en':
+                catalogs[lang] = {**english, **{key: CompiledTemplate(text)
+                                                for key, text in flatten(self.translations.get(lang, {})).items()}}
+        self.catalogs = catalogs
+        # Cached renderings hold the old texts
+        self._plans = {}
+    
+    def resolve_locale(self, requested: Optional[str] = None, preference: Optional[str] = None,
+                       accept_language: Optional[str] = None) -> str:
+        """Locale for one request: explicit request, then user preference, then Accept-Language"""
+        for language in (requested, preference):
+            if language in self.supported_languages:
+                return language
+        if accept_language:
+            language = negotiate_language(accept_language, tuple(self.supported_languages))
+            if language:
+                return language
+        return self.default_language
     
     def get_text(self, key: str, language: Optional[str] = None, **kwargs) -> str:
-        """Get translated text"""
-        if language is None:
-            language = self.current_language
-        
-        if language not in self.translations:
-            language = 'en'  # Fallback to English
-        
-        # Navigate through nested keys using dot notation
-        keys = key.split('.')
-        text = self.translations.get(language, {})
-        
-        for k in keys:
-            if isinstance(text, dict) and k in text:
-                text = text[k]
-            else:
-                # Fallback to English if key not found
-                text = self.translations.get('en', {})
-                for k in keys:
-                    if isinstance(text, dict) and k in text:
-                        text = text[k]
-                    else:
-                        return key  # Return key if not found in any language
-                break
-        
-        if isinstance(text, str):
-            # Format with provided kwargs
-            try:
-                return text.format(**kwargs)
-            except KeyError:
-                return text
-        
-        return key
+        """Get translated text (English if the language lacks the key, the key itself if neither has it)"""
+        return self.render(key, language, kwargs)
+
+    def render(self, key: str, language: Optional[str], params: Dict[str, Any]) -> str:
+        """get_text with the params as a dict, so any param name (even "key") is allowed"""
+        catalog = self.catalogs.get(language or self.default_language) or self.catalogs.get('en', {})
+        template = catalog.get(key)
+        if template is None:
+            return key
+        return template.render(params)
     
     def get_supported_languages(self) -> Dict[str, str]:
         """Get supported languages with their display names"""
@@ -76,29 +202,55 @@ class TranslationService:
             'am': 'አማርኛ'
         }
     
-    def translate_dict(self, data: Dict, language: Optional[str] = None) -> Dict:
-        """Translate all translatable values in a dictionary"""
+    def translate_dict(self, data: Dict, language: Optional[str] = None, cache_key: Optional[str] = None) -> Dict:
+        """Translate all translatable values ('t:section.key' strings) in a dictionary
+
+        With a cache_key, the payload is compiled into a TranslationPlan on
+        first use, and passing that very payload again returns its cached
+        per-language rendering, which callers must not mutate. Any other
+        payload under the key is translated by a full traversal: checking
+        that it has the plan's shape costs as much as the traversal itself.
+        """
         if language is None:
-            language = self.current_language
+            language = self.default_language
+        if cache_key is None:
+            return self._translate_tree(data, language)
         
+        plan = self._plans.get(cache_key)
+        if plan is None:
+            plan = self._plans.setdefault(cache_key, TranslationPlan(data))
+        if data is not plan.source:
+            return self._translate_tree(data, language)
+        rendered = plan.rendered.get(language)
+        if rendered is None:
+            rendered = plan.rendered[language] = plan.apply(data, self._translator(language))
+        return rendered
+    
+    def _translator(self, language: str):
+        """key -> text without placeholders, bound to one language's catalog"""
+        catalog = self.catalogs.get(language) or self.catalogs.get('en', {})
+        def translate(key: str) -> str:
+            template = catalog.get(key)
+            return key if template is None else template.render({})
+        return translate
+    
+    def _translate_tree(self, data: Dict, language: str) -> Dict:
         result = {}
         for key, value in data.items():
             if isinstance(value, str) and value.startswith('t:'):
                 # This is a translation key
-                translation_key = value[2:]  # Remove 't:' prefix
-                result[key] = self.get_text(translation_key, language)
+                result[key] = self.get_text(value[2:], language)
             elif isinstance(value, dict):
-                result[key] = self.translate_dict(value, language)
+                result[key] = self._translate_tree(value, language)
             elif isinstance(value, list):
                 result[key] = [
-                    self.translate_dict(item, language) if isinstance(item, dict)
+                    self._translate_tree(item, language) if isinstance(item, dict)
                     else self.get_text(item[2:], language) if isinstance(item, str) and item.startswith('t:')
                     else item
                     for item in value
                 ]
             else:
                 result[key] = value
-        
         return result
 
 # Global translation service instance
@@ -0,0 +1,98 @@
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Optional
+
+from google.api_core.exceptions import AlreadyExists
+
+from services.cache import TTLCache
+
+class FirestoreDedupBackend:
+    """Shared dedup store for multi-worker deployments
+
+    Each claim is a single `create()` of processedUpdates/{update_id}, which
+    Firestore rejects if the document already exists. Configure a TTL policy
+    on the `expiresAt` field so old claims are purged automatically.
+    """
+
+    COLLECTION = 'processedUpdates'
+
+    def __init__(self, firebase_manager, ttl: float):
+        self.firebase_manager = firebase_manager
+        self.ttl = ttl
+
+    def claim(self, key: str) -> bool:
+        db = self.firebase_manager.get_db()
+        if not db:
+            # Without a database the in-process store is all we have
+            return True
+        try:
+            db.collection(self.COLLECTION).document(key).create({
+                'claimedAt': datetime.now(timezone.utc),
+                'expiresAt': datetime.now(timezone.utc) + timedelta(seconds=self.ttl)
+            })
+            return True
+        except AlreadyExists:
+            return False
+
+    def release(self, key: str):
+        db = self.firebase_manager.get_db()
+        if db:
+            db.collection(self.COLLECTION).document(key).delete()
+
+class UpdateDeduplicator:
+    """Bounded, TTL-evicting record of Telegram update_ids already accepted"""
+
+    def __init__(self, ttl: float = 86400, max_size: int = 100000,
+                 shared_backend: Optional[FirestoreDedupBackend] = None):
+        self.seen = TTLCache(max_size=max_size, ttl=ttl)
+        self.shared_backend = shared_backend
+        self.duplicates = 0
+
+    @classmethod
+    def from_config(cls, config, firebase_manager) -> 'UpdateDeduplicator':
+        """Build a deduplicator from TELEGRAM_DEDUP_* settings"""
+        shared_backend = None
+        if config.TELEGRAM_DEDUP_BACKEND == 'firestore':
+            shared_backend = FirestoreDedupBackend(firebase_manager, config.TELEGRAM_DEDUP_TTL)
+        return cls(
+            ttl=config.TELEGRAM_DEDUP_TTL,
+            max_size=config.TELEGRAM_DEDUP_MAX_SIZE,
+            shared_backend=shared_backend
+        )
+
+    def claim(self, update_id: Any) -> bool:
+        """Record an update_id; returns False if it was already seen"""
+        key = str(update_id)
+        if not self.seen.add(key):
+            self.duplicates += 1
+            return False
+        if self.shared_backend:
+            try:
+                claimed = self.shared_backend.claim(key)
+            except Exception as e:
+                # Fail open: processing twice is better than dropping an update
+                print(f"Shared dedup store unavailable: {e}")
+                claimed = True
+            if not claimed:
+                self.duplicates += 1
+                return False
+        return True
+
+    def release(self, update_id: Any):
+        """Forget an update_id so a redelivery is processed (e.g. after a failure)"""
+        key = str(update_id)
+        self.seen.pop(key)
+        if self.shared_backend:
+            try:
+                self.shared_backend.release(key)
+            except Exception as e:
+                print(f"Failed to release update {key} in shared dedup store: {e}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Duplicate count and in-process store size"""
+        stats = self.seen.get_stats()
+        return {
+            'backend': 'firestore' if self.shared_backend else 'memory',
+            'tracked': stats['size'],
+            'evictions': stats['evictions'],
+            'duplicates': self.duplicates
+        }
@@ -0,0 +1,145 @@
+import queue
+import threading
+import time
+import zlib
+from typing import Any, Callable, Dict, Optional
+
+UPDATE_TYPES = (
+    'message', 'edited_message', 'callback_query', 'pre_checkout_query',
+    'shipping_query', 'my_chat_member', 'chat_member'
+)
+
+def validate_update(update: Any) -> Optional[str]:
+    """Return an error string if the payload is not a usable Telegram update"""
+    if not isinstance(update, dict):
+        return 'Update must be a JSON object'
+    if not isinstance(update.get('update_id'), int):
+        return 'Missing update_id'
+    if not any(isinstance(update.get(kind), dict) for kind in UPDATE_TYPES):
+        return 'Unsupported update type'
+    return None
+
+def get_update_chat_key(update: Dict[str, Any]) -> str:
+    """Key used to keep one chat's updates in order"""
+    for kind in ('message', 'edited_message', 'my_chat_member', 'chat_member'):
+        chat = (update.get(kind) or {}).get('chat') or {}
+        if 'id' in chat:
+            return str(chat['id'])
+    callback = update.get('callback_query') or {}
+    chat = (callback.get('message') or {}).get('chat') or {}
+    if 'id' in chat:
+        return str(chat['id'])
+    for kind in ('callback_query', 'pre_checkout_query', 'shipping_query'):
+        sender = (update.get(kind) or {}).get('from') or {}
+        if 'id' in sender:
+            return str(sender['id'])
+    return str(update.get('update_id'))
+
+class UpdateWorkerPool:
+    """Bounded worker pool that processes webhook updates after they are acknowledged
+
+    Each chat is pinned to one worker (by hash), so a chat's updates are
+    handled in arrival order while different chats run in parallel.
+    """
+
+    def __init__(self, handler: Callable[[Dict[str, Any]], Any], workers: int = 8,
+                 queue_size: int = 1000):
+        self.handler = handler
+        self.worker_count = workers
+        self.queue_size = queue_size
+        self._queues = [queue.Queue(maxsize=queue_size) for _ in range(workers)]
+        self._threads = []
+        self._lock = threading.Lock()
+        self._started = False
+        self._stats = {
+            'accepted': 0,
+            'rejected': 0,
+            'processed': 0,
+            'failed': 0,
+            'total_wait_ms': 0.0,
+            'total_processing_ms': 0.0,
+            'max_wait_ms': 0.0
+        }
+
+    @classmethod
+    def from_config(cls, handler, config) -> 'UpdateWorkerPool':
+        """Build a pool from TELEGRAM_WEBHOOK_* settings"""
+        return cls(
+            handler,
+            workers=config.TELEGRAM_WEBHOOK_WORKERS,
+            queue_size=config.TELEGRAM_WEBHOOK_QUEUE_SIZE
+        )
+
+    def start(self):
+        """Start the worker threads"""
+        with self._lock:
+            if self._started:
+                return
+            self._started = True
+            for i, work_queue in enumerate(self._queues):
+                thread = threading.Thread(
+                    target=self._run, args=(work_queue,), name=f'telegram-update-{i}', daemon=True
+                )
+                thread.start()
+                self._threads.append(thread)
+
+    def submit(self, update: Dict[str, Any]) -> bool:
+        """Queue an update; returns False when the chat's worker is saturated"""
+        if not self._started:
+            # Started lazily so each forked gunicorn worker gets its own threads
+            self.start()
+
+        chat_key = get_update_chat_key(update)
+        index = zlib.crc32(chat_key.encode('utf-8')) % self.worker_count
+        try:
+            self._queues[index].put_nowait((time.monotonic(), update))
+        except queue.Full:
+            with self._lock:
+                self._stats['rejected'] += 1
+            return False
+        with self._lock:
+            self._stats['accepted'] += 1
+        return True
+
+    def _run(self, work_queue: queue.Queue):
+        while True:
+            enqueued_at, update = work_queue.get()
+            started = time.monotonic()
+            failed = False
+            try:
+                self.handler(update)
+            except Exception as e:
+                failed = True
+                print(f"Error processing Telegram update {update.get('update_id')}: {e}")
+            finished = time.monotonic()
+
+            wait_ms = (started - enqueued_at) * 1000
+            with self._lock:
+                self._stats['processed'] += 1
+                self._stats['total_wait_ms'] += wait_ms
+                self._stats['total_processing_ms'] += (finished - started) * 1000
+                self._stats['max_wait_ms'] = max(self._stats['max_wait_ms'], wait_ms)
+                if failed:
+                    self._stats['failed'] += 1
+            work_queue.task_done()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Backpressure metrics: queue depths, rejections and latency"""
+        depths = [work_queue.qsize() for work_queue in self._queues]
+        with self._lock:
+            stats = dict(self._stats)
+        processed = stats['processed']
+        total_wait_ms = stats.pop('total_wait_ms')
+        total_processing_ms = stats.pop('total_processing_ms')
+        stats.update({
+            'running': self._started,
+            'workers': self.worker_count,
+            'queue_capacity': self.queue_size * self.worker_count,
+            'queued': sum(depths),
+            'queue_depths': depths,
+            'saturation': round(max(depths) / self.queue_size, 3) if depths else 0.0,
+            'avg_wait_ms': round(total_wait_ms / processed, 2) if processed else 0.0,
+            'avg_processing_ms': round(total_processing_ms / processed, 2) if processed else 0.0,
+            'max_wait_ms': round(stats['max_wait_ms'], 2)
+        })
+        return stats
@@ -0,0 +1,167 @@
+from typing import Any, Dict, Optional
+
+from firebase_admin import firestore
+
+from services.cache import TTLCache
+from database.firebase import firebase_manager
+
+# Lookup collections keyed by chat ID / lowercase username -> uid
+IDENTITIES_COLLECTION = 'telegramIdentities'
+USERNAMES_COLLECTION = 'telegramUsernames'
+
+_NOT_FOUND = {}
+
+def normalize_chat_id(chat_id: Any) -> str:
+    """Canonical (string) form of a Telegram chat ID"""
+    return str(chat_id).strip()
+
+def normalize_username(username: str) -> str:
+    """Canonical form of a Telegram username (case-insensitive, no @)"""
+    return username.strip().lstrip('@').lower()
+
+def chat_id_variants(chat_id: Any) -> list:
+    """Both stored forms of a chat ID; older documents hold it as an int"""
+    key = normalize_chat_id(chat_id)
+    variants = [key]
+    try:
+        variants.append(int(key))
+    except ValueError:
+        pass
+    return variants
+
+def stage_identity(batch, db, chat_id: Any, uid: str, display_name: Optional[str] = None,
+                   username: Optional[str] = None):
+    """Add the identity index writes for a user to a batch
+
+    Call this in the same batch that creates or links the user document so
+    the index and the user never disagree.
+    """
+    key = normalize_chat_id(chat_id)
+    batch.set(db.collection(IDENTITIES_COLLECTION).document(key), {
+        'uid': uid,
+        'displayName': display_name or 'Player',
+        'username': username or '',
+        'updatedAt': firestore.SERVER_TIMESTAMP
+    })
+    if username:
+        batch.set(db.collection(USERNAMES_COLLECTION).document(normalize_username(username)), {
+            'uid': uid,
+            'chatId': key,
+            'updatedAt': firestore.SERVER_TIMESTAMP
+        })
+
+def stage_link(batch, db, uid: str, chat_id: Any, username: Optional[str] = None,
+               display_name: Optional[str] = None, previous: Optional[Dict[str, Any]] = None):
+    """Add the writes that (re)link a user to a Telegram chat to a batch
+
+    Sets the user's telegramChatId/telegramUsername, indexes the new link
+    and deletes the index entries of the link in `previous` (the user's
+    data before the change) so the old chat no longer resolves to them.
+    Callers must evict the old chat ID from user_resolver after commit.
+    """
+    key = normalize_chat_id(chat_id)
+    batch.set(db.collection('users').document(uid), {
+        'telegramChatId': key,
+        'telegramUsername': username or ''
+    }, merge=True)
+    stage_identity(batch, db, key, uid, display_name, username)
+
+    previous = previous or {}
+    old_chat_id = previous.get('telegramChatId')
+    if old_chat_id not in (None, '') and normalize_chat_id(old_chat_id) != key:
+        batch.delete(db.collection(IDENTITIES_COLLECTION).document(normalize_chat_id(old_chat_id)))
+    old_username = previous.get('telegramUsername')
+    if old_username and normalize_username(old_username) != normalize_username(username or ''):
+        batch.delete(db.collection(USERNAMES_COLLECTION).document(normalize_username(old_username)))
+
+class TelegramUserResolver:
+    """Resolves Telegram chat IDs to Firebase users with an LRU+TTL cache
+
+    Entries map the canonical chat ID to {'uid', 'displayName'}. Cache misses
+    read telegramIdentities/{chatId} (a single document get). A miss there
+    falls back to the telegramChatId field query and indexes what it finds,
+    so users linked by a writer that bypassed stage_link are still found.
+    """
+
+    def __init__(self, firebase_manager, max_size: int = 50000, ttl: float = 600,
+                 negative_ttl: float = 30):
+        self.firebase_manager = firebase_manager
+        self.negative_ttl = negative_ttl
+        self.cache = TTLCache(max_size=max_size, ttl=ttl)
+
+    def resolve(self, chat_id: Any, username: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """Find the user for a chat ID, falling back to (and linking by) username
+
+        Returns {'uid', 'displayName', 'linked'} where linked is True when the
+        chat ID was attached to the user by this call.
+        """
+        key = normalize_chat_id(chat_id)
+        cached = self.cache.get(key)
+        if cached is not None:
+            return dict(cached, linked=False) if cached else None
+
+        db = self.firebase_manager.get_db()
+        if not db:
+            return None
+
+        identity = db.collection(IDENTITIES_COLLECTION).document(key).get()
+        if identity.exists:
+            data = identity.to_dict() or {}
+            return dict(self.remember(key, data['uid'], data.get('displayName')), linked=False)
+
+        # One query covers both the str and int forms of the chat ID
+        users = db.collection('users').where('telegramChatId', 'in', chat_id_variants(chat_id)).limit(1).stream()
+        for doc in users:
+            data = doc.to_dict() or {}
+            batch = db.batch()
+            stage_identity(batch, db, key, doc.id, data.get('displayName'), data.get('telegramUsername'))
+            batch.commit()
+            return dict(self.remember(key, doc.id, data.get('displayName')), linked=False)
+
+        if username:
+            user_doc = self._find_by_username(db, username)
+            if user_doc:
+                data = user_doc.to_dict() or {}
+                batch = db.batch()
+                stage_link(batch, db, user_doc.id, key, username, data.get('displayName'), previous=data)
+                batch.commit()
+                entry = self.relinked(key, user_doc.id, data.get('displayName'), data.get('telegramChatId'))
+                return dict(entry, linked=True)
+
+        self.cache.set(key, _NOT_FOUND, ttl=self.negative_ttl)
+        return None
+
+    def _find_by_username(self, db, username: str):
+        index_doc = db.collection(USERNAMES_COLLECTION).document(normalize_username(username)).get()
+        if index_doc.exists:
+            user_doc = db.collection('users').document(index_doc.to_dict()['uid']).get()
+            if user_doc.exists:
+                return user_doc
+        users_by_username = db.collection('users').where('telegramUsername', '==', username).limit(1).stream()
+        for doc in users_by_username:
+            return doc
+        return None
+
+    def remember(self, chat_id: Any, uid: str, display_name: Optional[str] = None) -> Dict[str, Any]:
+        """Record a link or registration that was just written"""
+        entry = {'uid': uid, 'displayName': display_name or 'Player'}
+        self.cache.set(normalize_chat_id(chat_id), entry)
+        return entry
+
+    def relinked(self, chat_id: Any, uid: str, display_name: Optional[str] = None,
+                 previous_chat_id: Any = None) -> Dict[str, Any]:
+        """Record a committed stage_link: cache the new chat, evict the old one"""
+        if previous_chat_id not in (None, '') and normalize_chat_id(previous_chat_id) != normalize_chat_id(chat_id):
+            self.invalidate(previous_chat_id)
+        return self.remember(chat_id, uid, display_name)
+
+    def invalidate(self, chat_id: Any):
+        """Drop a cached resolution (e.g. after the user's Telegram link changed)"""
+        self.cache.pop(normalize_chat_id(chat_id))
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Cache hit/miss statistics"""
+        return self.cache.get_stats()
+
+# Global resolver instance
+user_resolver = TelegramUserResolver(firebase_manager)
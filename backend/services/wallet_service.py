@@ -0,0 +1,128 @@
+from typing import Any, Dict, Optional
+
+from firebase_admin import firestore
+from google.api_core.exceptions import AlreadyExists, FailedPrecondition
+
+from database.firebase import firebase_manager
+from services.ledger_service import ledger_service
+from services.room_players import room_players
+
+class WalletService:
+    """Wallet mutations committed in a single round trip
+
+    Every credit appends an entry to the wallet ledger (see LedgerService),
+    batched with the transaction record, so there is no read-before-write
+    and no hot balance document. Passing an idempotency key makes it the
+    ledger entry and transaction document ID, both written with create(),
+    so a replayed credit fails the whole commit instead of being applied
+    twice.
+    """
+
+    def __init__(self, firebase_manager, ledger):
+        self.firebase_manager = firebase_manager
+        self.ledger = ledger
+
+    def _get_db(self, db=None):
+        db = db or self.firebase_manager.get_db()
+        if not db:
+            raise RuntimeError('Firestore DB not initialized')
+        return db
+
+    def _stage_record(self, batch, db, transaction_data: Dict[str, Any], idempotency_key: Optional[str]):
+        if idempotency_key:
+            transaction_ref = db.collection('transactions').document(idempotency_key)
+            batch.create(transaction_ref, transaction_data)
+        else:
+            transaction_ref = db.collection('transactions').document()
+            batch.set(transaction_ref, transaction_data)
+        return transaction_ref
+
+    def _commit(self, batch, user_id: str) -> bool:
+        try:
+            batch.commit()
+        except (AlreadyExists, FailedPrecondition):
+            # The idempotency key or guarded transaction was already used
+            return False
+        self.ledger.mark_dirty(user_id)
+        return True
+
+    def credit_wallet(self, user_id: str, amount: float, transaction_data: Dict[str, Any],
+                      idempotency_key: Optional[str] = None, entry_type: str = 'deposit', db=None) -> bool:
+        """Append a ledger credit and record the transaction in one commit
+
+        Returns False if the idempotency key was already used.
+        """
+        db = self._get_db(db)
+        batch = db.batch()
+        transaction_ref = self._stage_record(batch, db, transaction_data, idempotency_key)
+        self.ledger.stage_entry(batch, db, user_id, entry_type, amount,
+                                entry_id=idempotency_key, reference=transaction_ref.id)
+        return self._commit(batch, user_id)
+
+    def credit_user_balance(self, user_id: str, amount: float, transaction_data: Dict[str, Any],
+                            idempotency_key: Optional[str] = None, db=None) -> bool:
+        """Credit a registered user's wallet ledger and record the transaction in one commit
+
+        Raises google.api_core.exceptions.NotFound if the user does not exist.
+        Returns False if the idempotency key was already used.
+        """
+        db = self._get_db(db)
+        batch = db.batch()
+        # Touching the user document makes the commit fail for unknown users
+        batch.update(db.collection('users').document(user_id), {
+            'last_updated': firestore.SERVER_TIMESTAMP
+        })
+        transaction_ref = self._stage_record(batch, db, transaction_data, idempotency_key)
+        self.ledger.stage_entry(batch, db, user_id, 'deposit', amount,
+                                entry_id=idempotency_key, reference=transaction_ref.id)
+        return self._commit(batch, user_id)
+
+    def pay_entry(self, user_id: str, game_id: str, amount: float, transaction_data: Dict[str, Any],
+                  player: Dict[str, Any], idempotency_key: str, listed: bool = True,
+                  room_data: Optional[Dict[str, Any]] = None, db=None) -> bool:
+        """Record an externally paid entry fee and add the player to the room in one commit
+
+        The payment is a deposit and the fee an entry_fee debit of the same
+        amount, so the wallet nets to zero while the ledger still sees the
+        charge (and a refund of it has something to return). The entry_fee
+        entry and the transaction document are keyed by idempotency_key.
+        Returns False if the key was already used or the player had already
+        joined; nothing is written in either case.
+        """
+        db = self._get_db(db)
+        room_players.seed_player_count(db, game_id, room_data)
+        batch = db.batch()
+        transaction_ref = self._stage_record(batch, db, transaction_data, idempotency_key)
+        self.ledger.stage_entry(batch, db, user_id, 'deposit', amount,
+                                entry_id=f"{idempotency_key}_payment", reference=transaction_ref.id)
+        self.ledger.stage_entry(batch, db, user_id, 'entry_fee', -amount,
+                                entry_id=idempotency_key, reference=transaction_ref.id,
+                                metadata={'gameId': game_id})
+        room_players.stage_joins(batch, db, game_id, [player], listed=listed)
+        return self._commit(batch, user_id)
+
+    def complete_pending_credit(self, transaction_snapshot, amount: float, db=None) -> bool:
+        """Credit the ledger for a pending transaction and mark it completed in one commit
+
+        The transaction update is guarded on the snapshot's update time, so if
+        a concurrent callback completed it first this commit is rejected and
+        nothing is credited. Returns False in that case.
+        """
+        db = self._get_db(db)
+        user_id = transaction_snapshot.to_dict().get('userId')
+        batch = db.batch()
+        self.ledger.stage_entry(batch, db, user_id, 'deposit', amount,
+                                entry_id=f"txn_{transaction_snapshot.id}",
+                                reference=transaction_snapshot.id)
+        batch.update(transaction_snapshot.reference, {
+            'status': 'completed',
+            'updatedAt': firestore.SERVER_TIMESTAMP
+        }, option=db.write_option(last_update_time=transaction_snapshot.update_time))
+        return self._commit(batch, user_id)
+
+    def get_balance(self, user_id: str, db=None) -> Optional[float]:
+        """Current wallet balance (ledger snapshot plus tail); None if there is no wallet"""
+        return self.ledger.get_balance(user_id, self._get_db(db))
+
+# Global wallet service instance
+wallet_service = WalletService(firebase_manager, ledger_service)